@@ -0,0 +1,75 @@
+"""Command line entry point for the benchmark suite.
+
+Run from the repository root with ``python -m benchmarks``.
+"""
+
+import argparse
+import sys
+
+from .suite import (ENTITY_COUNTS, GENERATION_SIZES, MAP_SIZES, compare_results,
+                    default_cases, load_results, run_suite, save_results)
+
+
+def _parse_size(value: str):
+    """Parse a WIDTHxHEIGHT map size argument."""
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None) -> int:
+    """Run the benchmark suite.
+    
+    Args:
+        argv: Command line arguments, defaults to sys.argv
+    
+    Returns:
+        Process exit code, 1 if a regression was found
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths.")
+    parser.add_argument("--seed", type=int, default=1234,
+                        help="seed for the random module (default: 1234)")
+    parser.add_argument("--sizes", type=_parse_size, nargs="+", default=MAP_SIZES,
+                        metavar="WxH", help="map sizes to measure")
+    parser.add_argument("--entities", type=int, nargs="+", default=ENTITY_COUNTS,
+                        metavar="N", help="monster/item counts to measure")
+    parser.add_argument("--generation-sizes", type=_parse_size, nargs="*",
+                        default=GENERATION_SIZES, metavar="WxH",
+                        help="large map sizes to only time generation at")
+    parser.add_argument("--filter", default="",
+                        help="only run cases whose key contains this text")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="minimum measured seconds per case (default: 0.5)")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare against this JSON result file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed p50 slowdown vs baseline (default: 0.10)")
+    args = parser.parse_args(argv)
+    
+    cases = [case for case in default_cases(args.sizes, args.entities,
+                                               args.generation_sizes)
+             if args.filter in case.key]
+    
+    print(f"{'case':<44} {'ops/sec':>12} {'p50 ms':>10} {'p99 ms':>10}")
+    
+    def report(key, result):
+        print(f"{key:<44} {result['ops_per_sec']:>12.1f} "
+              f"{result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f}")
+    
+    results = run_suite(cases, args.seed, args.min_time, report)
+    
+    if args.output:
+        save_results(results, args.output)
+    
+    if args.baseline:
+        regressions = compare_results(results, load_results(args.baseline), args.threshold)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: p50 {before:.3f} ms -> {after:.3f} ms")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,440 @@
+"""Benchmark cases and runner for the game's hot paths."""
+
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from game.combat import CombatSystem
+from game.dungeon_generator import DungeonGenerator
+from game.env import ACTIONS, RoguelikeEnv
+from game.fov import FOVCalculator
+from game.game_map import GameMap
+from game.horde import MonsterStore, horde_size
+from game.items import ItemManager
+from game.level import build_level
+from game.level_cache import LevelCache
+from game.map_renderer import Camera, MapRenderer
+from game.monster import MonsterManager
+from game.player import Player
+from game.regions import label_regions
+from game.session import GameSession
+from game.snapshot import load_snapshot, save_snapshot
+
+
+MAP_SIZES = [(80, 40), (200, 100), (500, 500)]
+GENERATION_SIZES = [(2000, 2000)]
+ENTITY_COUNTS = [10, 100, 1000]
+
+
+class BenchmarkCase:
+    """A named hot path measured at one map size and entity count."""
+    
+    def __init__(self, name: str, setup: Callable[[int, int, int], Callable[[], object]],
+                 width: int, height: int, entities: int = 0):
+        """Initialize a benchmark case.
+        
+        Args:
+            name: Name of the measured operation
+            setup: Builds the state and returns the callable to time
+            width: Map width
+            height: Map height
+            entities: Number of monsters and items to spawn
+        """
+        self.name = name
+        self.setup = setup
+        self.width = width
+        self.height = height
+        self.entities = entities
+    
+    @property
+    def key(self) -> str:
+        """Unique key of the case used in result files."""
+        key = f"{self.name}[{self.width}x{self.height}"
+        if self.entities:
+            key += f",n={self.entities}"
+        return key + "]"
+
+
+def _build_world(width: int, height: int, entities: int, horde: bool = False):
+    """Build a populated level with FOV computed from the player start.
+    
+    Args:
+        width: Map width
+        height: Map height
+        entities: Number of monsters and items to spawn
+        horde: Whether to keep the monsters in a MonsterStore
+    
+    Returns:
+        Tuple of (game_map, player, monster_manager, item_manager)
+    """
+    game_map = GameMap(width, height)
+    game_map.place_exit()
+    player = Player(*game_map.player_start)
+    monster_manager = MonsterManager(MonsterStore() if horde else None)
+    monster_manager.spawn_monsters(game_map, entities)
+    item_manager = ItemManager()
+    item_manager.spawn_items(game_map, entities)
+    game_map.update_fov(player.x, player.y)
+    return game_map, player, monster_manager, item_manager
+
+
+def _setup_generation(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time BSP dungeon generation."""
+    generator = DungeonGenerator(width, height)
+    return generator.generate_bsp_dungeon
+
+
+def _setup_build_map(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time generating a map with its wall atlas and floor index."""
+    return lambda: GameMap(width, height)
+
+
+def _setup_label_regions(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time labelling the connected regions of a generated map."""
+    tiles = DungeonGenerator(width, height).generate_bsp_dungeon()
+    return lambda: label_regions(tiles)
+
+
+def _setup_fov(strategy: str) -> Callable[[int, int, int], Callable[[], object]]:
+    """Time FOV from the player start with the given strategy."""
+    def setup(width: int, height: int, entities: int) -> Callable[[], object]:
+        game_map = GameMap(width, height)
+        calculator = FOVCalculator(game_map.tiles, strategy)
+        x, y = game_map.player_start
+        return lambda: calculator.compute_fov(x, y)
+    return setup
+
+
+def _wake_monsters(monster_manager: MonsterManager):
+    """Queue every dormant monster to act on the next turn.
+    
+    Monsters start dormant and fall dormant again when they are out of
+    view and out of reach of the player, which would leave the monster
+    turn cases timing an empty queue.
+    
+    Args:
+        monster_manager: Monsters to wake
+    """
+    scheduler = monster_manager.scheduler
+    for monster in list(scheduler.parked):
+        scheduler.wake(monster)
+
+
+def _setup_update_monsters(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time one round of monster AI with every monster acting."""
+    game_map, player, monster_manager, _ = _build_world(width, height, entities)
+    
+    def update():
+        _wake_monsters(monster_manager)
+        return monster_manager.update_monsters(
+            player.x, player.y, game_map.tiles, game_map.visibility_tracker
+        )
+    return update
+
+
+def _setup_process_turn(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time a full monster turn including attacks on the player."""
+    game_map, player, monster_manager, _ = _build_world(width, height, entities)
+    combat_system = CombatSystem()
+    
+    def turn():
+        player.hp = player.max_hp
+        _wake_monsters(monster_manager)
+        return combat_system.process_turn(
+            player, monster_manager, game_map.tiles, game_map.visibility_tracker
+        )
+    return turn
+
+
+def _setup_horde_turn(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time a player step, FOV update and monster turn among a horde."""
+    game_map, player, monster_manager, _ = _build_world(width, height, entities, horde=True)
+    combat_system = CombatSystem()
+    start = (player.x, player.y)
+    neighbours = [(player.x + dx, player.y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                  if game_map.is_walkable(player.x + dx, player.y + dy)]
+    stops = [start, neighbours[0]] if neighbours else [start]
+    turns = [0]
+    
+    def turn():
+        turns[0] += 1
+        player.x, player.y = stops[turns[0] % len(stops)]
+        player.hp = player.max_hp
+        game_map.update_fov(player.x, player.y)
+        return combat_system.process_turn(
+            player, monster_manager, game_map.tiles, game_map.visibility_tracker
+        )
+    return turn
+
+
+def _setup_horde_turn_awake(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time a monster turn after a noise heard across the map wakes the whole horde.
+    
+    Every monster is queued and chasing at the start of each turn. The
+    ones the distance map does not reach fall dormant again on their
+    turn, so this is the worst case for the per-monster turn path.
+    """
+    game_map, player, monster_manager, _ = _build_world(width, height, entities, horde=True)
+    combat_system = CombatSystem()
+    radius = max(width, height)
+    
+    def turn():
+        player.hp = player.max_hp
+        monster_manager.make_noise(player.x, player.y, radius)
+        return combat_system.process_turn(
+            player, monster_manager, game_map.tiles, game_map.visibility_tracker
+        )
+    return turn
+
+
+def _setup_build_level(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time building a seeded level from scratch."""
+    return lambda: build_level(1, entities, 8, width, height, seed=1234)
+
+
+def _setup_load_cached_level(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time restoring a seeded level from the on-disk cache."""
+    directory = tempfile.TemporaryDirectory()
+    cache = LevelCache(directory.name)
+    build_level(1, entities, 8, width, height, seed=1234, cache=cache)
+    
+    def load():
+        # Referencing the directory keeps it alive while the case runs
+        return build_level(1, entities, 8, width, height, seed=1234,
+                           cache=cache), directory
+    return load
+
+
+def _setup_snapshot(load: bool) -> Callable[[int, int, int], Callable[[], object]]:
+    """Build a setup timing saving or loading a snapshot 100 turns into a game."""
+    def setup(width: int, height: int, entities: int) -> Callable[[], object]:
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "game.tvs")
+        session = GameSession(width, height, seed=1234)
+        actions = random.Random(1234)
+        for _ in range(100):
+            session.step(ACTIONS[actions.randrange(len(ACTIONS))])
+        save_snapshot(session, path)
+        
+        # Referencing the directory keeps it alive while the case runs
+        if load:
+            return lambda: (load_snapshot(path), directory)
+        return lambda: (save_snapshot(session, path), directory)
+    return setup
+
+
+def _setup_env_step(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time one environment step with random actions, resets included."""
+    env = RoguelikeEnv(width, height, max_steps=200)
+    env.reset(1234)
+    actions = random.Random(1234)
+    
+    def step():
+        result = env.step(actions.randrange(env.num_actions))
+        if env.done:
+            env.reset()
+        return result
+    return step
+
+
+def _setup_render(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time a full render of the map with entities."""
+    game_map, player, monster_manager, item_manager = _build_world(width, height, entities)
+    return lambda: game_map.render_with_entities(
+        player.x, player.y, monster_manager, item_manager
+    )
+
+
+def _setup_render_camera(width: int, height: int, entities: int) -> Callable[[], object]:
+    """Time a full redraw of an 80x40 camera view following the player."""
+    game_map, player, monster_manager, item_manager = _build_world(width, height, entities)
+    renderer = MapRenderer(Camera(80, 40))
+    
+    def frame():
+        renderer.invalidate()
+        return renderer.render(game_map, player.x, player.y, monster_manager, item_manager)
+    return frame
+
+
+def default_cases(sizes: Optional[List[Tuple[int, int]]] = None,
+                  entity_counts: Optional[List[int]] = None,
+                  generation_sizes: Optional[List[Tuple[int, int]]] = None
+                  ) -> List[BenchmarkCase]:
+    """Build the standard set of benchmark cases.
+    
+    Args:
+        sizes: Map sizes to measure, defaults to MAP_SIZES
+        entity_counts: Entity counts to measure, defaults to ENTITY_COUNTS
+        generation_sizes: Extra map sizes to only time generation at,
+            defaults to GENERATION_SIZES
+    
+    Returns:
+        List of benchmark cases
+    """
+    sizes = sizes or MAP_SIZES
+    entity_counts = entity_counts or ENTITY_COUNTS
+    if generation_sizes is None:
+        generation_sizes = GENERATION_SIZES
+    
+    cases = []
+    for width, height in sizes:
+        cases.append(BenchmarkCase("generate_bsp_dungeon", _setup_generation, width, height))
+        cases.append(BenchmarkCase("build_level", _setup_build_level, width, height, 10))
+        cases.append(BenchmarkCase("load_cached_level", _setup_load_cached_level,
+                                   width, height, 10))
+        cases.append(BenchmarkCase("fov_shadowcast", _setup_fov('shadowcast'), width, height))
+        cases.append(BenchmarkCase("fov_simple", _setup_fov('simple'), width, height))
+        cases.append(BenchmarkCase("render_with_entities", _setup_render, width, height, 10))
+        cases.append(BenchmarkCase("render_camera", _setup_render_camera, width, height, 10))
+        cases.append(BenchmarkCase("save_snapshot", _setup_snapshot(False), width, height))
+        cases.append(BenchmarkCase("load_snapshot", _setup_snapshot(True), width, height))
+        cases.append(BenchmarkCase("env_step", _setup_env_step, width, height))
+        cases.append(BenchmarkCase("horde_turn", _setup_horde_turn,
+                                   width, height, horde_size(width, height)))
+        cases.append(BenchmarkCase("horde_turn_awake", _setup_horde_turn_awake,
+                                   width, height, horde_size(width, height)))
+        for count in entity_counts:
+            cases.append(BenchmarkCase("update_monsters", _setup_update_monsters,
+                                       width, height, count))
+            cases.append(BenchmarkCase("process_turn", _setup_process_turn,
+                                       width, height, count))
+    
+    for width, height in generation_sizes:
+        cases.append(BenchmarkCase("generate_bsp_dungeon", _setup_generation, width, height))
+        cases.append(BenchmarkCase("build_map", _setup_build_map, width, height))
+        cases.append(BenchmarkCase("label_regions", _setup_label_regions, width, height))
+    return cases
+
+
+def _percentile(sorted_samples: List[int], fraction: float) -> int:
+    """Pick a percentile from sorted samples using the nearest rank.
+    
+    Args:
+        sorted_samples: Samples in ascending order
+        fraction: Percentile as a fraction between 0 and 1
+    
+    Returns:
+        The sample at that percentile
+    """
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+def run_case(case: BenchmarkCase, seed: int = 1234, min_time: float = 0.5,
+             min_iterations: int = 5, max_iterations: int = 10000) -> Dict[str, float]:
+    """Time a single benchmark case.
+    
+    Args:
+        case: Case to run
+        seed: Seed for the global random module before setup
+        min_time: Minimum total measured time in seconds
+        min_iterations: Minimum number of timed calls
+        max_iterations: Maximum number of timed calls
+    
+    Returns:
+        Dictionary with iterations, ops_per_sec, p50_ms and p99_ms
+    """
+    random.seed(seed)
+    operation = case.setup(case.width, case.height, case.entities)
+    operation()
+    
+    samples = []
+    total = 0
+    min_time_ns = int(min_time * 1e9)
+    while len(samples) < max_iterations:
+        start = time.perf_counter_ns()
+        operation()
+        elapsed = time.perf_counter_ns() - start
+        samples.append(elapsed)
+        total += elapsed
+        if len(samples) >= min_iterations and total >= min_time_ns:
+            break
+    
+    samples.sort()
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": len(samples) / (total / 1e9) if total else float("inf"),
+        "p50_ms": _percentile(samples, 0.50) / 1e6,
+        "p99_ms": _percentile(samples, 0.99) / 1e6,
+    }
+
+
+def run_suite(cases: List[BenchmarkCase], seed: int = 1234, min_time: float = 0.5,
+              progress: Optional[Callable[[str, Dict[str, float]], None]] = None) -> Dict:
+    """Run every case and collect the results.
+    
+    Args:
+        cases: Cases to run
+        seed: Seed used for every case
+        min_time: Minimum measured time per case in seconds
+        progress: Optional callback called with each case key and result
+    
+    Returns:
+        Result document with metadata and per-case results
+    """
+    results = {}
+    for case in cases:
+        result = run_case(case, seed, min_time)
+        results[case.key] = result
+        if progress:
+            progress(case.key, result)
+    
+    return {
+        "meta": {
+            "seed": seed,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare_results(current: Dict, baseline: Dict,
+                    threshold: float = 0.10) -> List[Tuple[str, float, float]]:
+    """Find cases whose median latency regressed against a baseline.
+    
+    Args:
+        current: Result document from run_suite
+        baseline: Stored result document to compare against
+        threshold: Allowed slowdown as a fraction (0.10 is 10%)
+    
+    Returns:
+        List of (case key, baseline p50_ms, current p50_ms) for regressions
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if not previous:
+            continue
+        if result["p50_ms"] > previous["p50_ms"] * (1 + threshold):
+            regressions.append((key, previous["p50_ms"], result["p50_ms"]))
+    return regressions
+
+
+def load_results(path: str) -> Dict:
+    """Load a result document from a JSON file.
+    
+    Args:
+        path: Path of the JSON file
+    
+    Returns:
+        Result document
+    """
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_results(results: Dict, path: str):
+    """Write a result document to a JSON file.
+    
+    Args:
+        results: Result document
+        path: Path of the JSON file
+    """
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
@@ -1,6 +1,10 @@
 """ASCII art and visual improvements for the roguelike game."""
 
-from typing import Dict, Tuple
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .tiles import Tile
 
 
 class ASCIIChars:
@@ -39,17 +43,89 @@ class ASCIIChars:
 
 
 class WallRenderer:
-    """Handles intelligent wall rendering with proper line characters."""
+    """Handles intelligent wall rendering with proper line characters.
+    
+    Wall glyphs are computed once per map into a flat table indexed by
+    y * width + x. Each wall's glyph comes from a 4-bit mask of its wall
+    neighbours (up=1, right=2, down=4, left=8) looked up in WALL_GLYPHS.
+    Cells outside the map count as walls.
+    """
     
-    def __init__(self, game_map):
+    WALL_GLYPHS = (
+        ASCIIChars.WALL_VERTICAL,      # no neighbours
+        ASCIIChars.WALL_VERTICAL,      # up
+        ASCIIChars.WALL_HORIZONTAL,    # right
+        ASCIIChars.WALL_BOTTOM_RIGHT,  # up, right
+        ASCIIChars.WALL_VERTICAL,      # down
+        ASCIIChars.WALL_VERTICAL,      # up, down
+        ASCIIChars.WALL_TOP_RIGHT,     # right, down
+        ASCIIChars.WALL_T_LEFT,        # up, right, down
+        ASCIIChars.WALL_HORIZONTAL,    # left
+        ASCIIChars.WALL_BOTTOM_LEFT,   # up, left
+        ASCIIChars.WALL_HORIZONTAL,    # right, left
+        ASCIIChars.WALL_T_UP,          # up, right, left
+        ASCIIChars.WALL_TOP_LEFT,      # down, left
+        ASCIIChars.WALL_T_RIGHT,       # up, down, left
+        ASCIIChars.WALL_T_DOWN,        # right, down, left
+        ASCIIChars.WALL_CROSS,         # all four
+    )
+    
+    def __init__(self, game_map, glyphs: Optional[List[str]] = None):
         """Initialize the wall renderer.
         
         Args:
-            game_map: 2D array representing the game map
+            game_map: Tile grid representing the game map
+            glyphs: Previously computed glyph table for the same tiles
         """
         self.game_map = game_map
-        self.height = len(game_map)
-        self.width = len(game_map[0]) if game_map else 0
+        self.height = game_map.height
+        self.width = game_map.width
+        self.glyphs: List[str] = []
+        if glyphs is not None and len(glyphs) == self.width * self.height:
+            self.glyphs = list(glyphs)
+        else:
+            self.rebuild()
+    
+    def rebuild(self):
+        """Recompute the glyph of every cell on the map.
+        
+        All neighbour masks are built at once. The wall flags are read as
+        one integer with a byte per cell, so shifting it by one byte or
+        one row of bytes lines every cell up with a neighbour, and the
+        shifted copies are ORed into each cell's mask bits.
+        """
+        width, height = self.width, self.height
+        size = width * height
+        if size == 0:
+            self.glyphs = []
+            return
+        
+        walls = int.from_bytes(self.game_map.cells.translate(_WALL_TABLE), 'little')
+        lanes = int.from_bytes(b'\x01' * size, 'little')
+        first_row = int.from_bytes(b'\x01' * width, 'little')
+        last_row = first_row << (8 * (size - width))
+        first_column = int.from_bytes((b'\x01' + bytes(width - 1)) * height, 'little')
+        last_column = first_column << (8 * (width - 1))
+        
+        up = (walls << (8 * width)) & lanes | first_row
+        down = walls >> (8 * width) | last_row
+        left = (walls << 8) & lanes | first_column
+        right = walls >> 8 | last_column
+        codes = up | right << 1 | down << 2 | left << 3 | walls << 4
+        
+        self.glyphs = list(codes.to_bytes(size, 'little').decode('latin-1')
+                           .translate(_GLYPH_TABLE))
+    
+    def invalidate(self, x: int, y: int):
+        """Recompute glyphs around a cell whose tile has changed.
+        
+        Args:
+            x: X coordinate of the changed tile
+            y: Y coordinate of the changed tile
+        """
+        for cx, cy in ((x, y), (x, y - 1), (x + 1, y), (x, y + 1), (x - 1, y)):
+            if 0 <= cx < self.width and 0 <= cy < self.height:
+                self.glyphs[cy * self.width + cx] = self._compute_char(cx, cy)
     
     def get_wall_char(self, x: int, y: int) -> str:
         """Get the appropriate wall character based on surrounding walls.
@@ -61,43 +137,34 @@ class WallRenderer:
         Returns:
             Appropriate wall character
         """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.glyphs[y * self.width + x]
+        return self._compute_char(x, y)
+    
+    def _compute_char(self, x: int, y: int) -> str:
+        """Compute the wall character of a cell from its neighbours.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+            
+        Returns:
+            Appropriate wall character, or the floor character
+        """
         if not self._is_wall(x, y):
             return ASCIIChars.FLOOR
         
-        up = self._is_wall(x, y - 1)
-        down = self._is_wall(x, y + 1)
-        left = self._is_wall(x - 1, y)
-        right = self._is_wall(x + 1, y)
-        
-        connections = (up, right, down, left)
-        
-        if connections == (True, True, True, True):
-            return ASCIIChars.WALL_CROSS
-        elif connections == (False, True, True, True):
-            return ASCIIChars.WALL_T_DOWN
-        elif connections == (True, False, True, True):
-            return ASCIIChars.WALL_T_RIGHT
-        elif connections == (True, True, False, True):
-            return ASCIIChars.WALL_T_UP
-        elif connections == (True, True, True, False):
-            return ASCIIChars.WALL_T_LEFT
-        elif connections == (False, False, True, True):
-            return ASCIIChars.WALL_TOP_LEFT
-        elif connections == (False, True, True, False):
-            return ASCIIChars.WALL_TOP_RIGHT
-        elif connections == (True, False, False, True):
-            return ASCIIChars.WALL_BOTTOM_LEFT
-        elif connections == (True, True, False, False):
-            return ASCIIChars.WALL_BOTTOM_RIGHT
-        elif connections == (True, False, True, False) or connections == (False, False, False, False):
-            return ASCIIChars.WALL_VERTICAL
-        elif connections == (False, True, False, True):
-            return ASCIIChars.WALL_HORIZONTAL
-        else:
-            if up or down:
-                return ASCIIChars.WALL_VERTICAL
-            else:
-                return ASCIIChars.WALL_HORIZONTAL
+        mask = 0
+        if self._is_wall(x, y - 1):
+            mask |= 1
+        if self._is_wall(x + 1, y):
+            mask |= 2
+        if self._is_wall(x, y + 1):
+            mask |= 4
+        if self._is_wall(x - 1, y):
+            mask |= 8
+        
+        return self.WALL_GLYPHS[mask]
     
     def _is_wall(self, x: int, y: int) -> bool:
         """Check if a position contains a wall.
@@ -111,7 +178,14 @@ class WallRenderer:
         """
         if x < 0 or x >= self.width or y < 0 or y >= self.height:
             return True 
-        return self.game_map[y][x] == '#'
+        return self.game_map.cells[y * self.width + x] == Tile.WALL
+
+
+_WALL_TABLE = bytes(1 if code == Tile.WALL else 0 for code in range(256))
+
+# Cell codes are a wall flag (16) plus the neighbour mask
+_GLYPH_TABLE = {code: ASCIIChars.FLOOR for code in range(16)}
+_GLYPH_TABLE.update({16 + mask: glyph for mask, glyph in enumerate(WallRenderer.WALL_GLYPHS)})
 
 
 class ColorScheme:
@@ -150,6 +224,37 @@ def get_colored_char(char: str, color: str) -> str:
     return f"{color}{char}{ColorScheme.RESET}"
 
 
+def coalesce_glyphs(glyphs: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Merge runs of adjacent characters that share a color.
+    
+    Args:
+        glyphs: (character, color) pairs in drawing order
+        
+    Returns:
+        List of (text, color) runs, one per change of color
+    """
+    return [
+        (''.join(char for char, _ in run), color)
+        for color, run in groupby(glyphs, itemgetter(1))
+    ]
+
+
+def glyphs_to_markup(glyphs: Iterable[Tuple[str, str]]) -> str:
+    """Build markup for a line of glyphs with one tag pair per color run.
+    
+    Args:
+        glyphs: (character, color) pairs in drawing order, an empty color
+            meaning no markup
+        
+    Returns:
+        Markup string for the line
+    """
+    return ''.join(
+        f"{color}{text}{ColorScheme.RESET}" if color else text
+        for text, color in coalesce_glyphs(glyphs)
+    )
+
+
 def get_entity_display(entity_type: str, is_alive: bool = True) -> str:
     """Get the display character and color for an entity.
     
@@ -3,13 +3,21 @@
 import random
 from typing import List, Tuple, Optional
 from .monster import Monster
+from .tiles import Tile
 
 
 class CombatSystem:
     """Handles combat mechanics and turn-based gameplay."""
     
-    def __init__(self):
-        """Initialize the combat system."""
+    NOISE_RADIUS = 10
+    
+    def __init__(self, rng: Optional[random.Random] = None):
+        """Initialize the combat system.
+        
+        Args:
+            rng: Random stream for damage rolls, defaults to the global random module
+        """
+        self.rng = rng if rng is not None else random
         self.turn_count = 0
         self.combat_log: List[str] = []
     
@@ -30,7 +38,7 @@ class CombatSystem:
             return messages
 
         base_damage = player.attack_power
-        damage = random.randint(max(1, base_damage - 2), base_damage + 3)
+        damage = self.rng.randint(max(1, base_damage - 2), base_damage + 3)
         
         monster_died = monster.take_damage(damage)
         
@@ -58,7 +66,7 @@ class CombatSystem:
         if not monster.is_alive:
             return messages
         
-        damage = monster.attack(player)
+        damage = monster.attack(player, self.rng)
         player.take_damage(damage)
         
         messages.append(f"The {monster.name} attacks you for {damage} damage!")
@@ -73,6 +81,9 @@ class CombatSystem:
     def process_turn(self, player, monster_manager, game_map, visibility_tracker) -> List[str]:
         """Process a complete turn (player has acted, now monsters act).
         
+        Only monsters whose next action is due act, so faster monsters
+        may act more than once per turn and slower ones skip turns.
+        
         Args:
             player: Player object
             monster_manager: Monster manager
@@ -85,20 +96,12 @@ class CombatSystem:
         self.turn_count += 1
         all_messages = []
         
-        monster_messages = monster_manager.update_monsters(
+        attackers = monster_manager.update_monsters(
             player.x, player.y, game_map, visibility_tracker
         )
-        all_messages.extend(monster_messages)
         
-        for monster in monster_manager.monsters:
-            if (monster.is_alive and 
-                monster.is_adjacent_to(player.x, player.y) and
-                visibility_tracker.is_visible(monster.x, monster.y)):
-                
-                combat_messages = self.monster_attack_player(monster, player)
-                all_messages.extend(combat_messages)
-        
-        monster_manager.remove_dead_monsters()
+        for monster in attackers:
+            all_messages.extend(self.monster_attack_player(monster, player))
         
         self.combat_log.extend(all_messages)
         
@@ -144,9 +147,7 @@ class GameState:
         Returns:
             True if player reached exit
         """
-        if (0 <= player_x < len(game_map[0]) and 
-            0 <= player_y < len(game_map) and
-            game_map[player_y][player_x] == '>'):
+        if game_map.get(player_x, player_y) == Tile.EXIT:
             self.victory = True
             return True
         return False
@@ -171,21 +172,31 @@ class GameState:
         self.victory = False  
         self.score += 100 * self.current_level
     
-    def get_monster_count_for_level(self) -> int:
-        """Get the number of monsters for current level.
+    def get_monster_count_for_level(self, level: Optional[int] = None) -> int:
+        """Get the number of monsters for a level.
         
+        Args:
+            level: Dungeon level, defaults to the current level
+            
         Returns:
             Number of monsters to spawn
         """
-        return min(3 + self.current_level, 10) 
+        if level is None:
+            level = self.current_level
+        return min(3 + level, 10) 
     
-    def get_item_count_for_level(self) -> int:
-        """Get the number of items for current level.
+    def get_item_count_for_level(self, level: Optional[int] = None) -> int:
+        """Get the number of items for a level.
         
+        Args:
+            level: Dungeon level, defaults to the current level
+            
         Returns:
             Number of items to spawn
         """
-        return min(5 + self.current_level, 12)  
+        if level is None:
+            level = self.current_level
+        return min(5 + level, 12)  
     
     def add_score(self, points: int):
         """Add points to the score.
@@ -1,32 +1,41 @@
 """Procedural dungeon generation for the roguelike."""
 
 import random
-from typing import Tuple, List, Set
+from typing import Tuple, List, Optional, Set
+
+from .regions import Regions, label_regions
+from .tiles import Tile, TileGrid
 
 
 class DungeonGenerator:
     """Generates procedural dungeons using various algorithms."""
     
-    def __init__(self, width: int, height: int):
+    # Regions smaller than a 3x3 room are filled in instead of connected
+    MIN_REGION_SIZE = 9
+    
+    def __init__(self, width: int, height: int, rng: Optional[random.Random] = None):
         """Initialize the dungeon generator.
         
         Args:
             width: Width of the dungeon
             height: Height of the dungeon
+            rng: Random stream to draw from, defaults to the global random module
         """
         self.width = width
         self.height = height
+        self.rng = rng if rng is not None else random
+        self.regions: Optional[Regions] = None
     
-    def generate_random_walk(self, steps: int = 1000) -> List[List[str]]:
+    def generate_random_walk(self, steps: int = 1000) -> TileGrid:
         """Generate a dungeon using random walk algorithm.
         
         Args:
             steps: Number of steps to take in the random walk
             
         Returns:
-            2D list representing the generated dungeon
+            Tile grid representing the generated dungeon
         """
-        dungeon = [['#' for _ in range(self.width)] for _ in range(self.height)]
+        dungeon = TileGrid(self.width, self.height)
         
         x, y = self.width // 2, self.height // 2
         
@@ -34,9 +43,9 @@ class DungeonGenerator:
         
         for _ in range(steps):
             if 1 <= x < self.width - 1 and 1 <= y < self.height - 1:
-                dungeon[y][x] = '.'
+                dungeon.set(x, y, Tile.FLOOR)
             
-            dx, dy = random.choice(directions)
+            dx, dy = self.rng.choice(directions)
             new_x, new_y = x + dx, y + dy
             
             if 1 <= new_x < self.width - 1 and 1 <= new_y < self.height - 1:
@@ -44,33 +53,77 @@ class DungeonGenerator:
         
         return dungeon
     
-    def generate_bsp_dungeon(self, min_room_size: int = 6) -> List[List[str]]:
+    def generate_bsp_dungeon(self, min_room_size: int = 6) -> TileGrid:
         """Generate a dungeon using Binary Space Partitioning.
         
+        The finished dungeon is a single connected region, which is kept
+        in self.regions.
+        
         Args:
             min_room_size: Minimum size for rooms
             
         Returns:
-            2D list representing the generated dungeon
+            Tile grid representing the generated dungeon
         """
-        dungeon = [['#' for _ in range(self.width)] for _ in range(self.height)]
+        dungeon = TileGrid(self.width, self.height)
         
         rooms = self._split_space(1, 1, self.width - 2, self.height - 2, min_room_size)
         
         for room in rooms:
             x, y, w, h = room
-            for ry in range(y, y + h):
-                for rx in range(x, x + w):
-                    if 0 <= rx < self.width and 0 <= ry < self.height:
-                        dungeon[ry][rx] = '.'
+            dungeon.fill_rect(x, y, w, h, Tile.FLOOR)
         
         self._connect_rooms(dungeon, rooms)
+        self.regions = self.connect_regions(dungeon)
         
         return dungeon
     
+    def connect_regions(self, dungeon: TileGrid) -> Regions:
+        """Make every walkable cell of a dungeon reachable from every other.
+        
+        Regions other than the largest are filled with wall if they are
+        smaller than MIN_REGION_SIZE. The rest are joined to the largest
+        region by a corridor to its nearest cell.
+        
+        Args:
+            dungeon: The dungeon map to modify
+        
+        Returns:
+            Regions of the dungeon after connecting, at most one
+        """
+        regions = label_regions(dungeon)
+        if len(regions) <= 1:
+            return regions
+        
+        main = regions.largest()
+        orphans = [region for region in range(len(regions)) if region != main]
+        
+        # Fill small regions first so no corridor is carved through them
+        wall = bytes([Tile.WALL])
+        for region in orphans:
+            if regions.sizes[region] < self.MIN_REGION_SIZE:
+                for run in regions.region_runs[region]:
+                    start, end = regions.starts[run], regions.ends[run]
+                    dungeon.cells[start:end] = wall * (end - start)
+        
+        for region in orphans:
+            if regions.sizes[region] < self.MIN_REGION_SIZE:
+                continue
+            x1, y1 = regions.anchor(region)
+            x2, y2 = regions.nearest(main, x1, y1)
+            self._carve_corridor(dungeon, x1, y1, x2, y1)
+            self._carve_corridor(dungeon, x2, y1, x2, y2)
+        
+        return label_regions(dungeon)
+    
     def _split_space(self, x: int, y: int, width: int, height: int, 
                      min_size: int) -> List[Tuple[int, int, int, int]]:
-        """Recursively split space into rooms.
+        """Split space into rooms.
+        
+        Spaces are split depth-first from an explicit stack, so map size
+        is not limited by the recursion limit. The second half of each
+        split is pushed first, which visits spaces and draws random
+        numbers in the same order as splitting the first half first.
         
         Args:
             x, y: Top-left corner of the space
@@ -81,31 +134,33 @@ class DungeonGenerator:
             List of room tuples (x, y, width, height)
         """
         rooms = []
+        stack = [(x, y, width, height)]
         
-        if width < min_size * 2 or height < min_size * 2:
-            room_width = max(3, width - 2)
-            room_height = max(3, height - 2)
-            room_x = x + random.randint(0, max(0, width - room_width))
-            room_y = y + random.randint(0, max(0, height - room_height))
-            rooms.append((room_x, room_y, room_width, room_height))
-            return rooms
-        
-        split_horizontal = random.choice([True, False])
-        
-        if split_horizontal:
-            split_point = random.randint(min_size, height - min_size)
-            rooms.extend(self._split_space(x, y, width, split_point, min_size))
-            rooms.extend(self._split_space(x, y + split_point, width, 
-                                         height - split_point, min_size))
-        else:
-            split_point = random.randint(min_size, width - min_size)
-            rooms.extend(self._split_space(x, y, split_point, height, min_size))
-            rooms.extend(self._split_space(x + split_point, y, 
-                                         width - split_point, height, min_size))
+        while stack:
+            x, y, width, height = stack.pop()
+            
+            if width < min_size * 2 or height < min_size * 2:
+                room_width = max(3, width - 2)
+                room_height = max(3, height - 2)
+                room_x = x + self.rng.randint(0, max(0, width - room_width))
+                room_y = y + self.rng.randint(0, max(0, height - room_height))
+                rooms.append((room_x, room_y, room_width, room_height))
+                continue
+            
+            split_horizontal = self.rng.choice([True, False])
+            
+            if split_horizontal:
+                split_point = self.rng.randint(min_size, height - min_size)
+                stack.append((x, y + split_point, width, height - split_point))
+                stack.append((x, y, width, split_point))
+            else:
+                split_point = self.rng.randint(min_size, width - min_size)
+                stack.append((x + split_point, y, width - split_point, height))
+                stack.append((x, y, split_point, height))
         
         return rooms
     
-    def _connect_rooms(self, dungeon: List[List[str]], 
+    def _connect_rooms(self, dungeon: TileGrid, 
                        rooms: List[Tuple[int, int, int, int]]):
         """Connect rooms with corridors.
         
@@ -125,7 +180,7 @@ class DungeonGenerator:
             self._carve_corridor(dungeon, x1, y1, x2, y1)  
             self._carve_corridor(dungeon, x2, y1, x2, y2)  
     
-    def _carve_corridor(self, dungeon: List[List[str]], x1: int, y1: int, 
+    def _carve_corridor(self, dungeon: TileGrid, x1: int, y1: int, 
                         x2: int, y2: int):
         """Carve a corridor between two points.
         
@@ -139,15 +194,10 @@ class DungeonGenerator:
         if y1 > y2:
             y1, y2 = y2, y1
         
-        for x in range(x1, x2 + 1):
-            if 0 <= x < self.width and 0 <= y1 < self.height:
-                dungeon[y1][x] = '.'
-        
-        for y in range(y1, y2 + 1):
-            if 0 <= x2 < self.width and 0 <= y < self.height:
-                dungeon[y][x2] = '.'
+        dungeon.hline(x1, x2, y1, Tile.FLOOR)
+        dungeon.vline(x2, y1, y2, Tile.FLOOR)
     
-    def find_valid_positions(self, dungeon: List[List[str]], 
+    def find_valid_positions(self, dungeon: TileGrid, 
                            count: int = 2) -> List[Tuple[int, int]]:
         """Find valid floor positions in the dungeon.
         
@@ -158,14 +208,10 @@ class DungeonGenerator:
         Returns:
             List of (x, y) tuples for valid positions
         """
-        floor_tiles = []
-        for y in range(len(dungeon)):
-            for x in range(len(dungeon[0])):
-                if dungeon[y][x] == '.':
-                    floor_tiles.append((x, y))
+        floor_tiles = dungeon.positions_of(Tile.FLOOR)
         
         if len(floor_tiles) < count:
             return floor_tiles
         
-        return random.sample(floor_tiles, count)
+        return self.rng.sample(floor_tiles, count)
 
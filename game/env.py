@@ -0,0 +1,294 @@
+"""Gym-style environment for training and evaluating bots."""
+
+import random
+from array import array
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .items import ItemType
+from .level_cache import LevelCache
+from .monster import MonsterType
+from .shared_obs import ObservationSlot
+from .session import Action, EventType, GameSession
+from .tiles import Tile
+
+
+ACTIONS = tuple(action for action in Action if action is not Action.RESTART)
+
+# Default radius of FOVCalculator.compute_fov, nothing further can be in view
+SIGHT_RADIUS = 8
+
+# Cell codes of the observation map
+UNKNOWN = 0
+TILE_CODES = {Tile.WALL: 1, Tile.FLOOR: 2, Tile.EXIT: 3}
+PLAYER = 4
+MONSTER_CODES = {monster_type: 5 + i for i, monster_type in enumerate(MonsterType)}
+ITEM_CODES = {item_type: 5 + len(MONSTER_CODES) + i for i, item_type in enumerate(ItemType)}
+
+STAT_NAMES = ('hp', 'max_hp', 'attack_power', 'level', 'gold',
+              'potions', 'scrolls', 'x', 'y')
+
+EVENT_REWARDS = {
+    EventType.MONSTER_KILLED: 1.0,
+    EventType.ITEM_PICKED_UP: 0.1,
+    EventType.LEVEL_ADVANCED: 10.0,
+    EventType.PLAYER_DIED: -10.0,
+}
+
+Observation = Dict[str, Any]
+
+
+def _map_table() -> bytes:
+    """Build the translation from packed cell bytes to map codes.
+    
+    Returns:
+        Table mapping tile | explored << 2 to the code of the cell
+    """
+    table = bytearray([UNKNOWN]) * 256
+    for tile, code in TILE_CODES.items():
+        table[tile | 4] = code
+    return bytes(table)
+
+
+_MAP_TABLE = _map_table()
+
+
+class RoguelikeEnv:
+    """Runs one game behind a reset/step interface like Gym's.
+    
+    Observations are dictionaries holding a "map" of one byte per cell
+    and a "stats" tuple ordered like STAT_NAMES. Cells the player has
+    never seen are UNKNOWN, explored cells hold their tile code, and the
+    player and the monsters and items in view are drawn over them.
+    Rewards come from the events of each step, see EVENT_REWARDS.
+    
+    When slot is set, observations are written into those shared planes
+    with observe_into() instead, and reset() and step() return the slot.
+    """
+    
+    def __init__(self, width: int = 80, height: int = 40, horde: bool = False,
+                 max_steps: Optional[int] = 1000, level_cache: Optional[LevelCache] = None):
+        """Initialize the environment.
+        
+        Args:
+            width: Width of generated maps
+            height: Height of generated maps
+            horde: Whether to fill levels with a horde scaled to the map size
+            max_steps: Steps after which an episode is cut off, None for no limit
+            level_cache: Cache of compiled levels shared by every episode
+        """
+        self.width = width
+        self.height = height
+        self.horde = horde
+        self.max_steps = max_steps
+        self.level_cache = level_cache
+        self.session: Optional[GameSession] = None
+        self.steps = 0
+        self.done = True
+        self.slot: Optional[ObservationSlot] = None
+        self._seeds = random.Random()
+    
+    @property
+    def num_actions(self) -> int:
+        """Number of actions step() accepts."""
+        return len(ACTIONS)
+    
+    def reset(self, seed: Optional[int] = None) -> Observation:
+        """Start a new episode.
+        
+        Args:
+            seed: Seed of the new game. Without one, the seed is drawn from
+                a stream seeded by the last explicit seed, so a seeded run
+                of episodes is reproducible.
+        
+        Returns:
+            First observation of the episode
+        """
+        if seed is not None:
+            self._seeds.seed(seed)
+        else:
+            seed = self._seeds.getrandbits(63)
+        
+        self.session = GameSession(self.width, self.height, horde=self.horde,
+                                   seed=seed, level_cache=self.level_cache)
+        self.steps = 0
+        self.done = False
+        return self._observation()
+    
+    def step(self, action: Union[int, Action]) -> Tuple[Observation, float, bool, Dict[str, Any]]:
+        """Perform one player action.
+        
+        Args:
+            action: Index into ACTIONS, or an Action
+        
+        Returns:
+            Tuple of (observation, reward, done, info). info holds the
+            event type names of the step, the level, score and seed, and
+            "truncated", which is True when max_steps ended the episode.
+        
+        Raises:
+            RuntimeError: If the episode is over and reset() was not called
+        """
+        if self.done:
+            raise RuntimeError("episode is over, call reset() first")
+        
+        if not isinstance(action, Action):
+            action = ACTIONS[action]
+        
+        session = self.session
+        events = session.step(action)
+        self.steps += 1
+        
+        reward = 0.0
+        for event in events:
+            reward += EVENT_REWARDS.get(event.event_type, 0.0)
+        
+        died = session.game_state.game_over
+        truncated = not died and self.max_steps is not None and self.steps >= self.max_steps
+        self.done = died or truncated
+        
+        info = {
+            'events': [event.event_type.value for event in events],
+            'level': session.game_state.current_level,
+            'score': session.game_state.score,
+            'seed': session.seed,
+            'truncated': truncated,
+        }
+        return self._observation(), reward, self.done, info
+    
+    def _observation(self) -> Union[Observation, ObservationSlot]:
+        """Observe the game the way the environment is set up to.
+        
+        Returns:
+            The filled slot when one is set, otherwise observe()
+        """
+        if self.slot is not None:
+            self.observe_into(self.slot)
+            return self.slot
+        return self.observe()
+    
+    def observe(self) -> Observation:
+        """Build the observation of the current game state.
+        
+        Returns:
+            Dictionary with the "map" bytes and the "stats" tuple
+        """
+        session = self.session
+        game_map = session.game_map
+        player = session.player
+        tracker = game_map.visibility_tracker
+        width = game_map.width
+        size = width * game_map.height
+        
+        # Pack each cell's tile and explored flag into one byte lane so the
+        # whole map goes through a single translate
+        packed = (int.from_bytes(game_map.tiles.cells, 'little') |
+                  int.from_bytes(tracker.explored_mask, 'little') << 2)
+        cells = bytearray(packed.to_bytes(size, 'little').translate(_MAP_TABLE))
+        
+        visible = tracker.visible_mask
+        left, top = player.x - SIGHT_RADIUS, player.y - SIGHT_RADIUS
+        span = 2 * SIGHT_RADIUS + 1
+        for item in session.item_manager.get_items_in_rect(left, top, span, span):
+            index = item.y * width + item.x
+            if visible[index]:
+                cells[index] = ITEM_CODES[item.item_type]
+        for monster in session.monster_manager.get_monsters_in_rect(left, top, span, span):
+            index = monster.y * width + monster.x
+            if visible[index]:
+                cells[index] = MONSTER_CODES[monster.monster_type]
+        cells[player.y * width + player.x] = PLAYER
+        
+        return {'map': bytes(cells), 'stats': self.stats()}
+    
+    def stats(self) -> Tuple[int, ...]:
+        """Collect the player stats ordered like STAT_NAMES.
+        
+        Returns:
+            Tuple of stat values
+        """
+        session = self.session
+        player = session.player
+        inventory = player.inventory
+        return (player.hp, player.max_hp, player.attack_power,
+                session.game_state.current_level, inventory.gold,
+                inventory.get_item_count(ItemType.HEALTH_POTION),
+                inventory.get_item_count(ItemType.MAGIC_SCROLL),
+                player.x, player.y)
+    
+    def observe_into(self, slot: ObservationSlot):
+        """Write the current game state into a slot of shared planes.
+        
+        The tiles plane holds raw Tile codes of the whole level and is
+        only rewritten when the level changes. The entities plane uses
+        the codes of the observation map for the player and what is in
+        view, and the hp plane holds their hit points. Only the cells
+        drawn last time are cleared, so drawing costs O(entities).
+        
+        Args:
+            slot: Slot of this game in a SharedObservations block
+        """
+        session = self.session
+        game_map = session.game_map
+        player = session.player
+        tracker = game_map.visibility_tracker
+        width = game_map.width
+        
+        if slot.source is not game_map:
+            slot.tiles[:] = game_map.tiles.cells
+            slot.source = game_map
+        slot.visible[:] = tracker.visible_mask
+        slot.explored[:] = tracker.explored_mask
+        
+        entities, hp = slot.entities, slot.hp
+        for index in slot.marked:
+            entities[index] = 0
+            hp[index] = 0
+        marked = slot.marked = []
+        
+        visible = tracker.visible_mask
+        left, top = player.x - SIGHT_RADIUS, player.y - SIGHT_RADIUS
+        span = 2 * SIGHT_RADIUS + 1
+        for item in session.item_manager.get_items_in_rect(left, top, span, span):
+            index = item.y * width + item.x
+            if visible[index]:
+                entities[index] = ITEM_CODES[item.item_type]
+                marked.append(index)
+        for monster in session.monster_manager.get_monsters_in_rect(left, top, span, span):
+            index = monster.y * width + monster.x
+            if visible[index]:
+                entities[index] = MONSTER_CODES[monster.monster_type]
+                hp[index] = monster.hp
+                marked.append(index)
+        index = player.y * width + player.x
+        entities[index] = PLAYER
+        hp[index] = player.hp
+        marked.append(index)
+        
+        slot.stats[:] = array('i', self.stats())
+    
+    def close(self):
+        """Release the current game."""
+        if self.session is not None:
+            self.session.shutdown()
+            self.session = None
+        self.done = True
+
+
+def render_observation(observation: Observation, width: int) -> List[str]:
+    """Draw an observation map as text, for debugging bots.
+    
+    Args:
+        observation: Observation from RoguelikeEnv
+        width: Width of the map
+    
+    Returns:
+        One string per map row
+    """
+    chars = {UNKNOWN: ' ', PLAYER: '@'}
+    chars.update({code: '#.>'[i] for i, code in enumerate(TILE_CODES.values())})
+    chars.update({code: monster_type.value[0] for monster_type, code in MONSTER_CODES.items()})
+    chars.update({code: item_type.value[0] for item_type, code in ITEM_CODES.items()})
+    
+    cells = observation['map']
+    return [''.join(chars.get(code, '?') for code in cells[start:start + width])
+            for start in range(0, len(cells), width)]
@@ -1,21 +1,143 @@
 """Field of View (FOV) system for the roguelike."""
 
 import math
-from typing import Set, Tuple, List
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from .tiles import OPAQUE, TileGrid
 
 
 class FOVCalculator:
     """Calculates field of view using shadowcasting algorithm."""
     
-    def __init__(self, game_map: List[List[str]]):
+    STRATEGIES = ('shadowcast', 'simple', 'rays')
+    # Strategies where every visible tile can see the origin back
+    SYMMETRIC_STRATEGIES = ('shadowcast',)
+    
+    # (xx, xy, yx, yy) transforms mapping (col, depth) into each octant
+    OCTANTS = (
+        (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+        (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+    )
+    
+    def __init__(self, game_map: TileGrid, strategy: str = 'shadowcast'):
         """Initialize the FOV calculator.
         
         Args:
             game_map: The game map to calculate FOV on
+            strategy: FOV algorithm used by compute_fov
+                ('shadowcast', 'simple' or 'rays'). Only 'shadowcast' is
+                symmetric, which monster AI depends on, so the game always
+                uses it and the others are kept for comparison.
         """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown FOV strategy: {strategy}")
+        
         self.game_map = game_map
-        self.width = len(game_map[0]) if game_map else 0
-        self.height = len(game_map)
+        self.width = game_map.width
+        self.height = game_map.height
+        self.strategy = strategy
+    
+    @property
+    def symmetric(self) -> bool:
+        """Whether every tile in view can see the origin back."""
+        return self.strategy in self.SYMMETRIC_STRATEGIES
+    
+    def compute_fov(self, player_x: int, player_y: int, 
+                    radius: int = 8) -> Set[Tuple[int, int]]:
+        """Calculate field of view using the configured strategy.
+        
+        Args:
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            radius: Maximum sight radius
+            
+        Returns:
+            Set of (x, y) tuples that are visible
+        """
+        if self.strategy == 'shadowcast':
+            return self.calculate_shadowcast_fov(player_x, player_y, radius)
+        elif self.strategy == 'simple':
+            return self.calculate_simple_fov(player_x, player_y, radius)
+        else:
+            return self.calculate_fov(player_x, player_y, radius)
+    
+    def calculate_shadowcast_fov(self, player_x: int, player_y: int, 
+                                 radius: int = 8) -> Set[Tuple[int, int]]:
+        """Calculate field of view using symmetric recursive shadowcasting.
+        
+        Each octant is scanned row by row outwards from the player, so every
+        tile in the radius is visited once. Slopes are kept as integer
+        fractions to avoid floating point drift.
+        
+        Args:
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            radius: Maximum sight radius
+            
+        Returns:
+            Set of (x, y) tuples that are visible
+        """
+        visible = set()
+        visible.add((player_x, player_y))
+        
+        for octant in self.OCTANTS:
+            self._scan_octant(player_x, player_y, radius, octant, 
+                              1, 0, 1, 1, 1, visible)
+        
+        return visible
+    
+    def _scan_octant(self, origin_x: int, origin_y: int, radius: int, 
+                     octant: Tuple[int, int, int, int], depth: int,
+                     start_num: int, start_den: int, end_num: int, end_den: int,
+                     visible: Set[Tuple[int, int]]):
+        """Scan one row of an octant and recurse into the rows behind it.
+        
+        Args:
+            origin_x, origin_y: Position the FOV is calculated from
+            radius: Maximum sight radius
+            octant: Transform from (col, depth) to map offsets
+            depth: Distance of the row from the origin
+            start_num, start_den: Start slope of the visible wedge
+            end_num, end_den: End slope of the visible wedge
+            visible: Set to add visible tiles to
+        """
+        if depth > radius:
+            return
+        
+        xx, xy, yx, yy = octant
+        cells = self.game_map.cells
+        width = self.width
+        radius_sq = radius * radius
+        depth_sq = depth * depth
+        
+        min_col = (2 * depth * start_num + start_den) // (2 * start_den)
+        max_col = -((end_den - 2 * depth * end_num) // (2 * end_den))
+        
+        prev_wall = None
+        for col in range(min_col, max_col + 1):
+            x = origin_x + col * xx + depth * xy
+            y = origin_y + col * yx + depth * yy
+            
+            in_bounds = 0 <= x < width and 0 <= y < self.height
+            is_wall = not in_bounds or OPAQUE[cells[y * width + x]] == 1
+            
+            if (in_bounds and col * col + depth_sq <= radius_sq and
+                (is_wall or (col * start_den >= depth * start_num and 
+                             col * end_den <= depth * end_num))):
+                visible.add((x, y))
+            
+            if prev_wall and not is_wall:
+                start_num, start_den = 2 * col - 1, 2 * depth
+            elif prev_wall is False and is_wall:
+                self._scan_octant(origin_x, origin_y, radius, octant, depth + 1,
+                                  start_num, start_den, 2 * col - 1, 2 * depth,
+                                  visible)
+            
+            prev_wall = is_wall
+        
+        if prev_wall is False:
+            self._scan_octant(origin_x, origin_y, radius, octant, depth + 1,
+                              start_num, start_den, end_num, end_den, visible)
     
     def calculate_fov(self, player_x: int, player_y: int, 
                       radius: int = 8) -> Set[Tuple[int, int]]:
@@ -69,7 +191,7 @@ class FOVCalculator:
             
             visible.add((x, y))
             
-            if self.game_map[y][x] == '#':
+            if self.game_map.is_opaque(x, y):
                 break
     
     def calculate_simple_fov(self, player_x: int, player_y: int, 
@@ -119,7 +241,7 @@ class FOVCalculator:
         error = dx - dy
         
         while True:
-            if (x, y) != (x1, y1) and self.game_map[y][x] == '#':
+            if (x, y) != (x1, y1) and self.game_map.is_opaque(x, y):
                 return False
             
             if x == x2 and y == y2:
@@ -139,21 +261,157 @@ class FOVCalculator:
 
 
 class VisibilityTracker:
-    """Tracks what the player has seen (explored vs currently visible)."""
+    """Tracks what the player has seen (explored vs currently visible).
     
-    def __init__(self):
-        """Initialize the visibility tracker."""
-        self.explored: Set[Tuple[int, int]] = set()
-        self.visible: Set[Tuple[int, int]] = set()
+    Visibility is stored in two bytearray masks with one slot per map cell,
+    indexed by y * width + x, so lookups are plain array reads. The
+    generation counter goes up on every update, so callers can tell
+    whether the last visibility changes cover everything they missed;
+    changes_cleared says whether those changes were since dropped by
+    clear_changes().
+    """
     
-    def update_visibility(self, new_visible: Set[Tuple[int, int]]):
+    def __init__(self, width: int = 80, height: int = 40):
+        """Initialize the visibility tracker.
+        
+        Args:
+            width: Width of the tracked map
+            height: Height of the tracked map
+        """
+        self.width = width
+        self.height = height
+        self.visible_mask = bytearray(width * height)
+        self.explored_mask = bytearray(width * height)
+        self._visible_indices: List[int] = []
+        self._newly_explored: List[int] = []
+        self._changed_indices: List[int] = []
+        self.generation = 0
+        self.changes_cleared = False
+    
+    @property
+    def visible(self) -> Set[Tuple[int, int]]:
+        """Set of currently visible tiles."""
+        return set(self.iter_visible())
+    
+    @property
+    def visible_count(self) -> int:
+        """Number of currently visible tiles."""
+        return len(self._visible_indices)
+    
+    @property
+    def explored(self) -> Set[Tuple[int, int]]:
+        """Set of explored tiles."""
+        width = self.width
+        return {(index % width, index // width) 
+                for index, seen in enumerate(self.explored_mask) if seen}
+    
+    def update_visibility(self, new_visible: Iterable[Tuple[int, int]]):
         """Update the current visibility and explored areas.
         
         Args:
             new_visible: Set of currently visible tiles
         """
-        self.visible = new_visible
-        self.explored.update(new_visible)
+        visible_mask = self.visible_mask
+        previous = self._visible_indices
+        
+        # Mark the previous view with 2 so the new view can tell which of
+        # its tiles were already visible (3) and which just appeared (1)
+        for index in previous:
+            visible_mask[index] = 2
+        
+        width, height = self.width, self.height
+        indices = []
+        changed = []
+        for x, y in new_visible:
+            if 0 <= x < width and 0 <= y < height:
+                index = y * width + x
+                state = visible_mask[index]
+                if state == 2:
+                    visible_mask[index] = 3
+                elif state == 0:
+                    visible_mask[index] = 1
+                    changed.append(index)
+                else:
+                    continue
+                indices.append(index)
+        
+        for index in previous:
+            if visible_mask[index] == 2:
+                visible_mask[index] = 0
+                changed.append(index)
+            else:
+                visible_mask[index] = 1
+        
+        self._visible_indices = indices
+        self._changed_indices = changed
+        self.changes_cleared = False
+        self.generation += 1
+        
+        self.merge_visible_into_explored()
+    
+    def merge_visible_into_explored(self) -> int:
+        """Mark every currently visible tile as explored.
+        
+        Returns:
+            Number of tiles that were explored for the first time
+        """
+        explored_mask = self.explored_mask
+        newly_explored = []
+        for index in self._visible_indices:
+            if not explored_mask[index]:
+                explored_mask[index] = 1
+                newly_explored.append(index)
+        self._newly_explored = newly_explored
+        return len(newly_explored)
+    
+    def iter_visible(self) -> Iterator[Tuple[int, int]]:
+        """Iterate over the currently visible tiles.
+        
+        Yields:
+            (x, y) tuples of visible tiles
+        """
+        width = self.width
+        for index in self._visible_indices:
+            yield index % width, index // width
+    
+    def iter_newly_explored(self) -> Iterator[Tuple[int, int]]:
+        """Iterate over tiles explored for the first time by the last merge.
+        
+        Yields:
+            (x, y) tuples of newly explored tiles
+        """
+        width = self.width
+        for index in self._newly_explored:
+            yield index % width, index // width
+    
+    def iter_visibility_changes(self) -> Iterator[Tuple[int, int]]:
+        """Iterate over tiles that entered or left view in the last update.
+        
+        Yields:
+            (x, y) tuples of tiles whose visibility changed
+        """
+        width = self.width
+        for index in self._changed_indices:
+            yield index % width, index // width
+    
+    def clear_changes(self):
+        """Mark the last update's changes as handled when nothing was updated.
+        
+        The generation is left alone, as visibility itself has not changed.
+        """
+        self._newly_explored = []
+        self._changed_indices = []
+        self.changes_cleared = True
+    
+    def clear(self):
+        """Forget all visible and explored tiles."""
+        self.visible_mask = bytearray(self.width * self.height)
+        self.explored_mask = bytearray(self.width * self.height)
+        self._visible_indices = []
+        self._newly_explored = []
+        self._changed_indices = []
+        self.changes_cleared = False
+        self.generation += 1
     
     def is_visible(self, x: int, y: int) -> bool:
         """Check if a tile is currently visible.
@@ -164,7 +422,9 @@ class VisibilityTracker:
         Returns:
             True if tile is currently visible
         """
-        return (x, y) in self.visible
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.visible_mask[y * self.width + x] == 1
+        return False
     
     def is_explored(self, x: int, y: int) -> bool:
         """Check if a tile has been explored.
@@ -175,5 +435,6 @@ class VisibilityTracker:
         Returns:
             True if tile has been seen before
         """
-        return (x, y) in self.explored
-
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.explored_mask[y * self.width + x] == 1
+        return False
@@ -1,84 +1,148 @@
 """Game map system for the roguelike."""
 
-from typing import List, Tuple, Optional
+import random
+from typing import List, Sequence, Tuple, Optional
 from .dungeon_generator import DungeonGenerator
 from .fov import FOVCalculator, VisibilityTracker
-from .ascii_art import WallRenderer, ASCIIChars, ColorScheme, get_colored_char
+from .ascii_art import WallRenderer, ASCIIChars, ColorScheme, get_colored_char, glyphs_to_markup
+from .placement import FloorIndex
+from .regions import Regions, label_regions
+from .tiles import Tile, TileGrid, TILE_CHARS
+
+
+MONSTER_COLORS = {
+    'GOBLIN': ColorScheme.GOBLIN,
+    'ORC': ColorScheme.ORC,
+    'DRAGON': ColorScheme.DRAGON,
+}
+
+ITEM_COLORS = {
+    'HEALTH_POTION': ColorScheme.HEALTH_POTION,
+    'GOLD': ColorScheme.GOLD,
+    'MAGIC_SCROLL': ColorScheme.MAGIC_SCROLL,
+    'WEAPON': ColorScheme.WEAPON,
+}
 
 
 class GameMap:
     """Represents the game map and handles map-related operations."""
     
-    def __init__(self, width: int = 80, height: int = 40, use_procedural: bool = True):
+    def __init__(self, width: int = 80, height: int = 40, use_procedural: bool = True,
+                 dungeon_rng: Optional[random.Random] = None,
+                 placement_rng: Optional[random.Random] = None):
         """Initialize a game map.
         
         Args:
             width: Width of the map
             height: Height of the map
             use_procedural: Whether to use procedural generation
+            dungeon_rng: Random stream for generation, defaults to the global random module
+            placement_rng: Random stream for spawn placement, defaults to the global random module
         """
         self.width = width
         self.height = height
         self.use_procedural = use_procedural
+        self.dungeon_rng = dungeon_rng
         
         if use_procedural:
             self.tiles = self._generate_procedural_map()
         else:
             self.tiles = self._create_simple_map()
         
-        self.fov_calculator = FOVCalculator(self.tiles)
-        self.visibility_tracker = VisibilityTracker()
-        
-        self.wall_renderer = WallRenderer(self.tiles)
+        self._init_state(placement_rng)
         
         self.player_start, self.exit_pos = self._find_special_positions()
     
-    def _generate_procedural_map(self) -> List[List[str]]:
-        """Generate a procedural map.
+    @classmethod
+    def from_compiled(cls, tiles: TileGrid, wall_glyphs: Optional[List[str]],
+                      player_start: Tuple[int, int], exit_pos: Tuple[int, int],
+                      placement_rng: Optional[random.Random] = None,
+                      regions: Optional[Regions] = None,
+                      reserved: Sequence[Tuple[int, int]] = ()) -> 'GameMap':
+        """Rebuild a map from previously generated tiles without regenerating it.
+        
+        Args:
+            tiles: Tile grid of the map, with the exit already placed
+            wall_glyphs: Wall atlas computed for the tiles, None to rebuild it
+            player_start: Player start position
+            exit_pos: Exit position
+            placement_rng: Random stream for spawn placement
+            regions: Regions labelled for the tiles, None to label them
+            reserved: Other positions to reserve in the floor index
+            
+        Returns:
+            Game map with the player start, exit and reserved positions
+            taken out of its floor index
+        """
+        game_map = cls.__new__(cls)
+        game_map.width = tiles.width
+        game_map.height = tiles.height
+        game_map.use_procedural = True
+        game_map.dungeon_rng = None
+        game_map.tiles = tiles
+        game_map.regions = regions if regions is not None else label_regions(tiles)
+        game_map._init_state(placement_rng, wall_glyphs,
+                             [player_start, exit_pos, *reserved])
+        
+        game_map.player_start = player_start
+        game_map.exit_pos = exit_pos
+        return game_map
+    
+    def _init_state(self, placement_rng: Optional[random.Random],
+                    wall_glyphs: Optional[List[str]] = None,
+                    reserved: Sequence[Tuple[int, int]] = ()):
+        """Set up the placement, FOV and wall state derived from the tiles.
+        
+        Args:
+            placement_rng: Random stream for spawn placement
+            wall_glyphs: Wall atlas computed for the tiles, None to build it
+            reserved: Positions already taken out of the floor index
+        """
+        self.floor_index = FloorIndex(self.tiles, placement_rng, reserved)
+        
+        self.fov_calculator = FOVCalculator(self.tiles)
+        self.visibility_tracker = VisibilityTracker(self.width, self.height)
+        self._fov_origin: Optional[Tuple[int, int]] = None
+        
+        self.wall_renderer = WallRenderer(self.tiles, wall_glyphs)
+    
+    def _generate_procedural_map(self) -> TileGrid:
+        """Generate a procedural map and keep its regions in self.regions.
         
         Returns:
-            2D list representing the map
+            Tile grid representing the map
         """
-        generator = DungeonGenerator(self.width, self.height)
+        generator = DungeonGenerator(self.width, self.height, self.dungeon_rng)
+        tiles = generator.generate_bsp_dungeon()
+        self.regions = generator.regions
         
-        return generator.generate_bsp_dungeon()
+        return tiles
     
-    def _create_simple_map(self) -> List[List[str]]:
-        """Create a simple hardcoded map for testing.
+    def _create_simple_map(self) -> TileGrid:
+        """Create a simple hardcoded map for testing and label its regions.
         
         Returns:
-            2D list representing the map
+            Tile grid representing the map
         """
-        map_data = []
-        
-        for y in range(self.height):
-            row = []
-            for x in range(self.width):
-                if (x == 0 or x == self.width - 1 or 
-                    y == 0 or y == self.height - 1):
-                    row.append('#')  
-                else:
-                    row.append('.')  
-            map_data.append(row)
-        
-        for y in range(5, 15):
-            if y < len(map_data) and 10 < len(map_data[y]):
-                map_data[y][10] = '#'
-        
-        for x in range(15, 25):
-            if 10 < len(map_data) and x < len(map_data[10]):
-                map_data[10][x] = '#'
+        map_data = TileGrid(self.width, self.height)
+        
+        map_data.fill_rect(1, 1, self.width - 2, self.height - 2, Tile.FLOOR)
+        
+        map_data.vline(10, 5, 14, Tile.WALL)
+        map_data.hline(15, 24, 10, Tile.WALL)
+        self.regions = label_regions(map_data)
             
         return map_data
     
     def _find_special_positions(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
         """Find positions for player start and exit.
         
+        Both positions are reserved in the floor index.
+        
         Returns:
             Tuple of (player_start, exit_position)
         """
-        generator = DungeonGenerator(self.width, self.height)
-        positions = generator.find_valid_positions(self.tiles, 2)
+        positions = self.floor_index.sample(2)
         
         if len(positions) >= 2:
             return positions[0], positions[1]
@@ -92,7 +156,9 @@ class GameMap:
         if self.exit_pos:
             x, y = self.exit_pos
             if 0 <= x < self.width and 0 <= y < self.height:
-                self.tiles[y][x] = '>'
+                self.tiles.set(x, y, Tile.EXIT)
+                self.wall_renderer.invalidate(x, y)
+                self._fov_origin = None
     
     def get_tile(self, x: int, y: int) -> str:
         """Get the tile at given coordinates.
@@ -104,9 +170,7 @@ class GameMap:
         Returns:
             Character representing the tile
         """
-        if 0 <= x < self.width and 0 <= y < self.height:
-            return self.tiles[y][x]
-        return '#'  
+        return TILE_CHARS[self.tiles.get(x, y)]
     
     def is_walkable(self, x: int, y: int) -> bool:
         """Check if a tile is walkable.
@@ -118,17 +182,29 @@ class GameMap:
         Returns:
             True if the tile can be walked on
         """
-        tile = self.get_tile(x, y)
-        return tile in ['.', '>']  
+        return self.tiles.is_walkable(x, y)
     
     def update_fov(self, player_x: int, player_y: int):
         """Update the field of view from player position.
         
+        Nothing is recomputed when the player has not moved since the last
+        update, as the visible tiles would be the same, but the previous
+        update's changes are cleared so they are not redrawn again.
+        
         Args:
             player_x: Player's X coordinate
             player_y: Player's Y coordinate
         """
-        visible_tiles = self.fov_calculator.calculate_simple_fov(player_x, player_y)
+        if self._fov_origin == (player_x, player_y):
+            self.visibility_tracker.clear_changes()
+            return
+        self._fov_origin = (player_x, player_y)
+        
+        # Monster AI takes the tiles the player sees as the tiles that can
+        # see the player, which only holds for a symmetric strategy
+        assert self.fov_calculator.symmetric, "game FOV must be symmetric"
+        
+        visible_tiles = self.fov_calculator.compute_fov(player_x, player_y)
         self.visibility_tracker.update_visibility(visible_tiles)
     
     def render_with_entities(self, player_x: int, player_y: int, 
@@ -144,86 +220,125 @@ class GameMap:
         Returns:
             String representation of the map
         """
-        lines = []
-        for y in range(self.height):
-            line = ""
-            for x in range(self.width):
-                if x == player_x and y == player_y:
-                    line += get_colored_char('☺', ColorScheme.PLAYER)
-                elif (monster_manager and 
-                      self.visibility_tracker.is_visible(x, y)):
-                    monster = monster_manager.get_monster_at(x, y)
-                    if monster:
-                        if monster.is_alive:
-                            if monster.monster_type.name == 'GOBLIN':
-                                line += get_colored_char(monster.symbol, ColorScheme.GOBLIN)
-                            elif monster.monster_type.name == 'ORC':
-                                line += get_colored_char(monster.symbol, ColorScheme.ORC)
-                            elif monster.monster_type.name == 'DRAGON':
-                                line += get_colored_char(monster.symbol, ColorScheme.DRAGON)
-                            else:
-                                line += monster.symbol
-                        else:
-                            line += get_colored_char(monster.symbol, ColorScheme.CORPSE)
-                    elif (item_manager):
-                        item = item_manager.get_item_at(x, y)
-                        if item:
-                            if item.item_type.name == 'HEALTH_POTION':
-                                line += get_colored_char(item.symbol, ColorScheme.HEALTH_POTION)
-                            elif item.item_type.name == 'GOLD':
-                                line += get_colored_char(item.symbol, ColorScheme.GOLD)
-                            elif item.item_type.name == 'MAGIC_SCROLL':
-                                line += get_colored_char(item.symbol, ColorScheme.MAGIC_SCROLL)
-                            elif item.item_type.name == 'WEAPON':
-                                line += get_colored_char(item.symbol, ColorScheme.WEAPON)
-                            else:
-                                line += item.symbol
-                        else:
-                            if self.tiles[y][x] == '>':
-                                line += get_colored_char('▼', ColorScheme.EXIT)
-                            else:
-                                line += get_colored_char('·', ColorScheme.FLOOR)
-                    else:
-                        if self.tiles[y][x] == '>':
-                            line += get_colored_char('▼', ColorScheme.EXIT)
-                        else:
-                            line += get_colored_char('·', ColorScheme.FLOOR)
-                elif self.visibility_tracker.is_visible(x, y):
-                    if item_manager:
-                        item = item_manager.get_item_at(x, y)
-                        if item:
-                            if item.item_type.name == 'HEALTH_POTION':
-                                line += get_colored_char(item.symbol, ColorScheme.HEALTH_POTION)
-                            elif item.item_type.name == 'GOLD':
-                                line += get_colored_char(item.symbol, ColorScheme.GOLD)
-                            elif item.item_type.name == 'MAGIC_SCROLL':
-                                line += get_colored_char(item.symbol, ColorScheme.MAGIC_SCROLL)
-                            elif item.item_type.name == 'WEAPON':
-                                line += get_colored_char(item.symbol, ColorScheme.WEAPON)
-                            else:
-                                line += item.symbol
-                        else:
-                            if self.tiles[y][x] == '>':
-                                line += get_colored_char('▼', ColorScheme.EXIT)
-                            else:
-                                line += get_colored_char('·', ColorScheme.FLOOR)
-                    else:
-                        if self.tiles[y][x] == '>':
-                            line += get_colored_char('▼', ColorScheme.EXIT)
-                        else:
-                            line += get_colored_char('·', ColorScheme.FLOOR)
-                elif self.visibility_tracker.is_explored(x, y) or self.tiles[y][x] == '#':
-                    tile = self.tiles[y][x]
-                    if tile == '#':
-                        wall_char = self.wall_renderer.get_wall_char(x, y)
-                        if self.visibility_tracker.is_explored(x, y):
-                            line += get_colored_char(wall_char, ColorScheme.WALL)
-                        else:
-                            line += get_colored_char(wall_char, ColorScheme.WALL_EXPLORED)
-                    else:
-                        line += get_colored_char('░', ColorScheme.FLOOR_EXPLORED)
-                else:
-                    line += ' '
-            lines.append(line)
-        return '\n'.join(lines)
-
+        return '\n'.join(
+            self.render_row(y, player_x, player_y, monster_manager, item_manager)
+            for y in range(self.height)
+        )
+    
+    def render_row(self, y: int, player_x: int, player_y: int, 
+                   monster_manager=None, item_manager=None,
+                   x_start: int = 0, x_end: Optional[int] = None) -> str:
+        """Render a single row of the map with entities.
+        
+        Args:
+            y: Row to render
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            monster_manager: Monster manager for rendering monsters
+            item_manager: Item manager for rendering items
+            x_start: First column to render
+            x_end: Column to stop before, defaults to the map width
+            
+        Returns:
+            Markup string for the row, with one tag pair per run of
+            same-colored cells
+        """
+        return glyphs_to_markup(self.glyph_row(
+            y, player_x, player_y, monster_manager, item_manager, x_start, x_end
+        ))
+    
+    def glyph_row(self, y: int, player_x: int, player_y: int, 
+                  monster_manager=None, item_manager=None,
+                  x_start: int = 0, x_end: Optional[int] = None) -> List[Tuple[str, str]]:
+        """Get the character and color of each cell in a row.
+        
+        Args:
+            y: Row to render
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            monster_manager: Monster manager for rendering monsters
+            item_manager: Item manager for rendering items
+            x_start: First column to render
+            x_end: Column to stop before, defaults to the map width
+            
+        Returns:
+            List of (character, color) tuples, see cell_glyph
+        """
+        if x_end is None:
+            x_end = self.width
+        return [
+            self.cell_glyph(x, y, player_x, player_y, monster_manager, item_manager)
+            for x in range(max(0, x_start), min(self.width, x_end))
+        ]
+    
+    def render_cell(self, x: int, y: int, player_x: int, player_y: int, 
+                    monster_manager=None, item_manager=None) -> str:
+        """Render a single map cell with entities.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            monster_manager: Monster manager for rendering monsters
+            item_manager: Item manager for rendering items
+            
+        Returns:
+            Markup string for the cell
+        """
+        char, color = self.cell_glyph(x, y, player_x, player_y, monster_manager, item_manager)
+        if color:
+            return get_colored_char(char, color)
+        return char
+    
+    def cell_glyph(self, x: int, y: int, player_x: int, player_y: int, 
+                   monster_manager=None, item_manager=None) -> Tuple[str, str]:
+        """Get the character and color a map cell is drawn with.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            monster_manager: Monster manager for rendering monsters
+            item_manager: Item manager for rendering items
+            
+        Returns:
+            Tuple of (character, ColorScheme color), the color is empty for
+            cells drawn without one
+        """
+        if x == player_x and y == player_y:
+            return '☺', ColorScheme.PLAYER
+        
+        tile = self.tiles.cells[y * self.width + x]
+        
+        if self.visibility_tracker.is_visible(x, y):
+            if tile == Tile.WALL:
+                return self.wall_renderer.glyphs[y * self.width + x], ColorScheme.WALL
+            
+            if monster_manager:
+                monster = monster_manager.get_monster_at(x, y)
+                if monster:
+                    if not monster.is_alive:
+                        return monster.symbol, ColorScheme.CORPSE
+                    return monster.symbol, MONSTER_COLORS.get(monster.monster_type.name, '')
+            
+            if item_manager:
+                item = item_manager.get_item_at(x, y)
+                if item:
+                    return item.symbol, ITEM_COLORS.get(item.item_type.name, '')
+            
+            if tile == Tile.EXIT:
+                return '▼', ColorScheme.EXIT
+            return '·', ColorScheme.FLOOR
+        
+        if tile == Tile.WALL:
+            wall_char = self.wall_renderer.glyphs[y * self.width + x]
+            if self.visibility_tracker.is_explored(x, y):
+                return wall_char, ColorScheme.WALL
+            return wall_char, ColorScheme.WALL_EXPLORED
+        
+        if self.visibility_tracker.is_explored(x, y):
+            return '░', ColorScheme.FLOOR_EXPLORED
+        
+        return ' ', ''
@@ -0,0 +1,219 @@
+"""Struct-of-arrays monster storage for horde-sized populations."""
+
+from array import array
+from itertools import compress
+from typing import List
+
+from .monster import MonsterBase, MonsterType
+
+
+HORDE_DENSITY = 25
+
+MONSTER_KINDS = list(MonsterType)
+
+COLUMNS = ('x', 'y', 'hp', 'max_hp', 'attack_power', 'speed')
+
+_DEAD = bytes([1]) + bytes(255)
+
+
+def horde_size(width: int, height: int) -> int:
+    """Get the number of monsters a horde level of a given size holds.
+    
+    Args:
+        width: Width of the map
+        height: Height of the map
+    
+    Returns:
+        One monster per HORDE_DENSITY map cells
+    """
+    return width * height // HORDE_DENSITY
+
+
+def _column(name: str) -> property:
+    """Build a property that reads and writes one column of the store.
+    
+    Args:
+        name: Name of the column
+    
+    Returns:
+        Property for MonsterView
+    """
+    def get(self):
+        return getattr(self.store, name)[self.index]
+    
+    def set(self, value):
+        getattr(self.store, name)[self.index] = value
+    
+    return property(get, set)
+
+
+class MonsterView(MonsterBase):
+    """A monster whose state lives in a row of a MonsterStore.
+    
+    Views behave like Monster objects, so the monster manager, combat
+    and rendering code work with them unchanged. A view holds nothing
+    but its store and row, so the per-monster object is a few dozen
+    bytes on top of the columns.
+    """
+    
+    __slots__ = ('store', 'index')
+    
+    x = _column('x')
+    y = _column('y')
+    hp = _column('hp')
+    max_hp = _column('max_hp')
+    attack_power = _column('attack_power')
+    speed = _column('speed')
+    
+    def __init__(self, store: 'MonsterStore', index: int):
+        """Initialize a view.
+        
+        Args:
+            store: Store holding the monster
+            index: Row of the monster in the store
+        """
+        self.store = store
+        self.index = index
+    
+    @property
+    def monster_type(self) -> MonsterType:
+        """Type of the monster."""
+        return MONSTER_KINDS[self.store.kind[self.index]]
+    
+    @property
+    def name(self) -> str:
+        """Display name of the monster."""
+        return self.monster_type.value[3]
+    
+    @property
+    def symbol(self) -> str:
+        """Character the monster is drawn with."""
+        if self.store.alive[self.index]:
+            return self.monster_type.value[0]
+        return '☠'
+    
+    @property
+    def is_alive(self) -> bool:
+        """Whether the monster is still alive."""
+        return self.store.alive[self.index] == 1
+    
+    def take_damage(self, damage: int) -> bool:
+        """Apply damage to the monster.
+        
+        Args:
+            damage: Amount of damage to take
+        
+        Returns:
+            True if monster died from this damage
+        """
+        store, index = self.store, self.index
+        store.hp[index] = max(0, store.hp[index] - damage)
+        if store.hp[index] <= 0:
+            store.alive[index] = 0
+            return True
+        return False
+
+
+class MonsterStore:
+    """Monsters stored as parallel arrays, one row per monster.
+    
+    Positions, hit points, attack and speed live in typed arrays and the
+    type and alive flag in bytearrays, so a horde of thousands costs a
+    few bytes per field instead of an object per monster. Checks over
+    the whole horde, such as finding dead monsters, run as single
+    bytearray operations.
+    """
+    
+    def __init__(self):
+        """Initialize an empty store."""
+        self.x = array('i')
+        self.y = array('i')
+        self.hp = array('i')
+        self.max_hp = array('i')
+        self.attack_power = array('i')
+        self.speed = array('i')
+        self.kind = bytearray()
+        self.alive = bytearray()
+        self.views: List[MonsterView] = []
+    
+    def __len__(self) -> int:
+        """Number of rows in the store, dead monsters included."""
+        return len(self.views)
+    
+    @property
+    def living_count(self) -> int:
+        """Number of living monsters."""
+        return self.alive.count(1)
+    
+    @property
+    def dead_count(self) -> int:
+        """Number of dead monsters not swept yet."""
+        return self.alive.count(0)
+    
+    def add(self, x: int, y: int, monster_type: MonsterType) -> MonsterView:
+        """Add a monster with its type's base stats.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+            monster_type: Type of monster
+        
+        Returns:
+            View of the new monster
+        """
+        _, hp, attack_power, _, speed = monster_type.value
+        self.x.append(x)
+        self.y.append(y)
+        self.hp.append(hp)
+        self.max_hp.append(hp)
+        self.attack_power.append(attack_power)
+        self.speed.append(speed)
+        self.kind.append(MONSTER_KINDS.index(monster_type))
+        self.alive.append(1)
+        
+        view = MonsterView(self, len(self.views))
+        self.views.append(view)
+        return view
+    
+    def sweep_dead(self) -> List[MonsterView]:
+        """Drop the rows of dead monsters and compact the arrays.
+        
+        Views of removed monsters are moved to a store of their own, so
+        they keep reading their final state.
+        
+        Returns:
+            Views of the removed monsters
+        """
+        alive = self.alive
+        if alive.find(0) == -1:
+            return []
+        
+        removed = list(compress(self.views, alive.translate(_DEAD)))
+        for view in removed:
+            self._detach(view)
+        
+        for name in COLUMNS:
+            setattr(self, name, array('i', compress(getattr(self, name), alive)))
+        self.kind = bytearray(compress(self.kind, alive))
+        self.views = list(compress(self.views, alive))
+        self.alive = bytearray([1]) * len(self.views)
+        
+        for index, view in enumerate(self.views):
+            view.index = index
+        
+        return removed
+    
+    def _detach(self, view: MonsterView):
+        """Move a view's row into a new single-row store.
+        
+        Args:
+            view: View to detach
+        """
+        store = MonsterStore()
+        for name in COLUMNS:
+            getattr(store, name).append(getattr(self, name)[view.index])
+        store.kind.append(self.kind[view.index])
+        store.alive.append(self.alive[view.index])
+        store.views.append(view)
+        view.store = store
+        view.index = 0
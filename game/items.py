@@ -34,27 +34,30 @@ class Item:
         self.value = value
         self.is_collected = False
     
-    def use(self, player) -> str:
+    def use(self, player, rng: Optional[random.Random] = None) -> str:
         """Use the item on the player.
         
         Args:
             player: Player object
+            rng: Random stream for magic effects, defaults to the global random module
             
         Returns:
             Message describing the effect
         """
+        rng = rng if rng is not None else random
+        
         if self.item_type == ItemType.HEALTH_POTION:
             heal_amount = min(25, player.max_hp - player.hp)
             player.hp += heal_amount
             return f"You drink the health potion and recover {heal_amount} HP!"
         
         elif self.item_type == ItemType.MAGIC_SCROLL:
-            effect = random.choice([
+            effect = rng.choice([
                 "heal", "damage_boost", "nothing"
             ])
             
             if effect == "heal":
-                heal_amount = random.randint(10, 30)
+                heal_amount = rng.randint(10, 30)
                 player.hp = min(player.max_hp, player.hp + heal_amount)
                 return f"The scroll glows and heals you for {heal_amount} HP!"
             elif effect == "damage_boost":
@@ -100,12 +103,14 @@ class Inventory:
                 self.items[item.item_type] = item.value
             return f"Picked up {item.name}!"
     
-    def use_item(self, item_type: ItemType, player) -> Optional[str]:
+    def use_item(self, item_type: ItemType, player,
+                 rng: Optional[random.Random] = None) -> Optional[str]:
         """Use an item from the inventory.
         
         Args:
             item_type: Type of item to use
             player: Player object
+            rng: Random stream for magic effects, defaults to the global random module
             
         Returns:
             Message describing the effect, or None if item not available
@@ -114,7 +119,7 @@ class Inventory:
             return None
         
         temp_item = Item(0, 0, item_type)
-        effect_message = temp_item.use(player)
+        effect_message = temp_item.use(player, rng)
         
         self.items[item_type] -= 1
         if self.items[item_type] <= 0:
@@ -153,26 +158,35 @@ class ItemManager:
     def __init__(self):
         """Initialize the item manager."""
         self.items: List[Item] = []
+        self._positions: Dict[Tuple[int, int], List[Item]] = {}
+    
+    def add_item(self, item: Item):
+        """Add an item to the world and register its position.
+        
+        Args:
+            item: Item to add
+        """
+        self.items.append(item)
+        self._positions.setdefault((item.x, item.y), []).append(item)
     
-    def spawn_items(self, game_map, count: int = 8):
+    def spawn_items(self, game_map, count: int = 8, rng: Optional[random.Random] = None):
         """Spawn items randomly on the map.
         
         Args:
-            game_map: Game map to spawn items on
+            game_map: Game map whose floor index supplies free cells
             count: Number of items to spawn
+            rng: Random stream for item types, defaults to the global random module
         """
-        from .dungeon_generator import DungeonGenerator
-        
-        generator = DungeonGenerator(len(game_map[0]), len(game_map))
-        positions = generator.find_valid_positions(game_map, count)
+        rng = rng if rng is not None else random
+        positions = game_map.floor_index.sample(count)
         
         for i, (x, y) in enumerate(positions):
             # Choose item type with weighted probability
-            rand = random.random()
+            rand = rng.random()
             
             if rand < 0.4:  # 40% chance
                 item_type = ItemType.GOLD
-                value = random.randint(5, 20)
+                value = rng.randint(5, 20)
             elif rand < 0.7:  # 30% chance
                 item_type = ItemType.HEALTH_POTION
                 value = 1
@@ -184,7 +198,7 @@ class ItemManager:
                 value = 1
             
             item = Item(x, y, item_type, value)
-            self.items.append(item)
+            self.add_item(item)
     
     def get_item_at(self, x: int, y: int) -> Optional[Item]:
         """Get item at specific position.
@@ -196,11 +210,36 @@ class ItemManager:
         Returns:
             Item at position or None
         """
-        for item in self.items:
-            if item.x == x and item.y == y and not item.is_collected:
+        for item in self._positions.get((x, y), ()):
+            if not item.is_collected:
                 return item
         return None
     
+    def get_items_in_rect(self, x: int, y: int, 
+                          width: int, height: int) -> List[Item]:
+        """Get all uncollected items inside a rectangle.
+        
+        Args:
+            x, y: Top-left corner of the rectangle
+            width, height: Dimensions of the rectangle
+            
+        Returns:
+            List of items inside the rectangle
+        """
+        if width * height < len(self._positions):
+            found = []
+            for cy in range(y, y + height):
+                for cx in range(x, x + width):
+                    for item in self._positions.get((cx, cy), ()):
+                        if not item.is_collected:
+                            found.append(item)
+            return found
+        
+        return [item for (cx, cy), stack in self._positions.items()
+                for item in stack
+                if not item.is_collected and 
+                x <= cx < x + width and y <= cy < y + height]
+    
     def collect_item(self, x: int, y: int) -> Optional[Item]:
         """Collect an item at the specified position.
         
@@ -214,6 +253,10 @@ class ItemManager:
         item = self.get_item_at(x, y)
         if item:
             item.is_collected = True
+            stack = self._positions[(x, y)]
+            stack.remove(item)
+            if not stack:
+                del self._positions[(x, y)]
             return item
         return None
     
@@ -0,0 +1,236 @@
+"""Level construction and background pre-generation for the roguelike."""
+
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from .game_map import GameMap
+from .monster import MonsterManager, MonsterType
+from .horde import MonsterStore
+from .items import Item, ItemManager, ItemType
+from .level_cache import LevelCache
+from .regions import Regions
+from .seeding import level_streams
+from .tiles import TileGrid
+
+
+class Level:
+    """A fully built dungeon level ready to be played."""
+    
+    def __init__(self, number: int, game_map: GameMap,
+                 monster_manager: MonsterManager, item_manager: ItemManager):
+        """Initialize a level.
+        
+        Args:
+            number: Dungeon level number
+            game_map: Generated map with the exit placed
+            monster_manager: Monsters spawned on the map
+            item_manager: Items spawned on the map
+        """
+        self.number = number
+        self.game_map = game_map
+        self.monster_manager = monster_manager
+        self.item_manager = item_manager
+    
+    @property
+    def player_start(self) -> Tuple[int, int]:
+        """Position the player starts the level at."""
+        return self.game_map.player_start
+    
+    def compile(self) -> Dict[str, Any]:
+        """Capture the generated state of the level in a compact form.
+        
+        Only what generation produced is kept: the tiles, the wall atlas,
+        the region labels, the special positions and the spawn tables.
+        FOV, turn order and other play state are rebuilt when the level
+        is restored.
+        
+        Returns:
+            Dictionary of bytes, strings, arrays, ints and tuples
+        """
+        game_map = self.game_map
+        regions = game_map.regions
+        return {
+            'number': self.number,
+            'width': game_map.width,
+            'height': game_map.height,
+            'tiles': bytes(game_map.tiles.cells),
+            'wall_glyphs': ''.join(game_map.wall_renderer.glyphs),
+            'player_start': game_map.player_start,
+            'exit_pos': game_map.exit_pos,
+            'regions': (array('i', regions.starts), array('i', regions.ends),
+                        array('i', regions.run_regions)),
+            'monsters': [(m.x, m.y, m.monster_type.name, m.max_hp, m.attack_power)
+                         for m in self.monster_manager.monsters if m.is_alive],
+            'items': [(item.x, item.y, item.item_type.name, item.value)
+                      for item in self.item_manager.items],
+        }
+    
+    @classmethod
+    def from_compiled(cls, data: Dict[str, Any], horde: bool = False) -> 'Level':
+        """Restore a level captured by compile().
+        
+        Args:
+            data: Compiled level data
+            horde: Whether to keep the monsters in a MonsterStore
+        
+        Returns:
+            The restored level with FOV computed from the player start
+        """
+        width, height = data['width'], data['height']
+        tiles = TileGrid(width, height)
+        tiles.cells[:] = data['tiles']
+        spawns = [entry[:2] for entry in data['monsters']]
+        spawns.extend(entry[:2] for entry in data['items'])
+        game_map = GameMap.from_compiled(tiles, data['wall_glyphs'],
+                                         tuple(data['player_start']),
+                                         tuple(data['exit_pos']),
+                                         regions=Regions.from_runs(width, height,
+                                                                   *data['regions']),
+                                         reserved=spawns)
+        
+        monster_manager = MonsterManager(MonsterStore() if horde else None)
+        for x, y, type_name, max_hp, attack_power in data['monsters']:
+            monster = monster_manager.create_monster(x, y, MonsterType[type_name])
+            monster.max_hp = max_hp
+            monster.hp = max_hp
+            monster.attack_power = attack_power
+            monster_manager.add_monster(monster)
+        
+        item_manager = ItemManager()
+        for x, y, type_name, value in data['items']:
+            item_manager.add_item(Item(x, y, ItemType[type_name], value))
+        
+        start_x, start_y = game_map.player_start
+        game_map.update_fov(start_x, start_y)
+        
+        return cls(data['number'], game_map, monster_manager, item_manager)
+
+
+def build_level(number: int, monster_count: int, item_count: int,
+                width: int = 80, height: int = 40, horde: bool = False,
+                seed: Optional[int] = None, cache: Optional[LevelCache] = None) -> Level:
+    """Generate a map, place the exit and spawn monsters and items.
+    
+    With a seed, every subsystem draws from its own stream derived from
+    the seed and level number, so the same arguments always produce the
+    same level. Seeded levels are also looked up in and saved to the
+    cache, if one is given.
+    
+    Args:
+        number: Dungeon level number used for difficulty scaling
+        monster_count: Number of monsters to spawn
+        item_count: Number of items to spawn
+        width: Width of the map
+        height: Height of the map
+        horde: Whether to keep the monsters in a MonsterStore
+        seed: Seed of the game, or None to use the global random module
+        cache: Cache of compiled levels
+    
+    Returns:
+        The built level with FOV computed from the player start
+    """
+    if seed is None:
+        streams = {}
+        cache = None
+    else:
+        streams = level_streams(seed, number)
+        key = (seed, width, height, number, monster_count, item_count, horde)
+    
+    if cache is not None:
+        data = cache.load(key)
+        if data is not None:
+            return Level.from_compiled(data, horde)
+    
+    game_map = GameMap(width, height, dungeon_rng=streams.get('dungeon'),
+                       placement_rng=streams.get('placement'))
+    game_map.place_exit()
+    
+    monster_manager = MonsterManager(MonsterStore() if horde else None)
+    item_manager = ItemManager()
+    monster_manager.spawn_monsters(game_map, monster_count, number,
+                                   streams.get('monsters'))
+    item_manager.spawn_items(game_map, item_count, streams.get('items'))
+    
+    level = Level(number, game_map, monster_manager, item_manager)
+    if cache is not None:
+        cache.store(key, level.compile())
+    
+    start_x, start_y = game_map.player_start
+    game_map.update_fov(start_x, start_y)
+    
+    return level
+
+
+class LevelPrefetcher:
+    """Builds upcoming levels in a worker thread while the current one is played."""
+    
+    def __init__(self, cache: Optional[LevelCache] = None):
+        """Initialize the prefetcher.
+        
+        Args:
+            cache: Cache of compiled levels shared by every build
+        """
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="level-prefetch")
+        self._pending: Dict[Tuple[int, int, int, int, int, bool, Optional[int]], Future] = {}
+    
+    def prefetch(self, number: int, monster_count: int, item_count: int,
+                 width: int = 80, height: int = 40, horde: bool = False,
+                 seed: Optional[int] = None):
+        """Start building a level in the background.
+        
+        Args:
+            number: Dungeon level number
+            monster_count: Number of monsters to spawn
+            item_count: Number of items to spawn
+            width: Width of the map
+            height: Height of the map
+            horde: Whether to keep the monsters in a MonsterStore
+            seed: Seed of the game, or None to use the global random module
+        """
+        key = (number, monster_count, item_count, width, height, horde, seed)
+        if key not in self._pending:
+            self._pending[key] = self._executor.submit(build_level, *key,
+                                                      cache=self.cache)
+    
+    def take(self, number: int, monster_count: int, item_count: int,
+             width: int = 80, height: int = 40, horde: bool = False,
+             seed: Optional[int] = None) -> Level:
+        """Get a level, using the prefetched one when there is one.
+        
+        A prefetch that is still queued or running is waited for, since
+        building the same level again here would only compete with it for
+        the GIL. The level is built synchronously when no prefetch was
+        started or it failed.
+        
+        Args:
+            number: Dungeon level number
+            monster_count: Number of monsters to spawn
+            item_count: Number of items to spawn
+            width: Width of the map
+            height: Height of the map
+            horde: Whether to keep the monsters in a MonsterStore
+            seed: Seed of the game, or None to use the global random module
+        
+        Returns:
+            The built level
+        """
+        key = (number, monster_count, item_count, width, height, horde, seed)
+        future = self._pending.pop(key, None)
+        
+        if future is not None:
+            try:
+                return future.result()
+            except Exception:
+                pass
+        
+        return build_level(*key, cache=self.cache)
+    
+    def shutdown(self):
+        """Stop the worker thread and drop pending levels."""
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,329 @@
+"""On-disk cache of compiled levels with size-bounded LRU eviction."""
+
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from .items import ItemType
+from .monster import MonsterType
+from .packing import MAX_EXPANSION, Reader, check, on_map, pack_array
+from .tiles import Tile
+
+
+LevelKey = Tuple[int, int, int, int, int, int, bool]
+
+MAGIC = b'TVLC'
+
+COMPRESS_LEVEL = 1
+
+MONSTER_KINDS = list(MonsterType)
+ITEM_KINDS = list(ItemType)
+
+# Magic, format version and payload size before compression
+_HEADER = struct.Struct('<4sHI')
+# Map size, level, player start, exit, wall atlas size in bytes and the
+# number of walkable runs, monsters and items
+_LEVEL = struct.Struct('<IIIiiiiIIII')
+
+# Deleting every valid tile code from a tile plane leaves nothing behind
+_TILE_CODES = bytes(range(max(Tile) + 1))
+
+
+def default_cache_dir() -> str:
+    """Get the directory levels are cached in by default.
+    
+    Returns:
+        Path under XDG_CACHE_HOME, or ~/.cache when it is not set
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "terminus-veil", "levels")
+
+
+class LevelCache:
+    """Stores compiled levels as files keyed by seed, size and level.
+    
+    Loading a level touches its file, so file modification times order
+    the entries from least to most recently used. Storing a level evicts
+    the least recently used files until the cache fits in max_bytes.
+    Files are written to a temporary name and renamed into place, so a
+    reader never sees a partial level, which also lets worker processes
+    share a cache directory. A cache sent to another process gets a new
+    lock there.
+    
+    Levels are stored as zlib-compressed struct records and arrays, and
+    every value is range-checked when it is read back, so a damaged or
+    foreign file is deleted and treated as a miss. The cache is only
+    meant for seeded runs that build the same levels again, such as
+    replays.
+    """
+    
+    # Bump when the compiled form or what generation produces changes
+    FORMAT_VERSION = 3
+    SUFFIX = ".level"
+    
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024):
+        """Initialize the cache.
+        
+        Args:
+            directory: Directory to keep levels in, defaults to default_cache_dir()
+            max_bytes: Total size the cached files may take up
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError:
+            pass
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """Drop the lock so the cache can be sent to worker processes."""
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        """Restore a cache sent to this process with a lock of its own."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def path_for(self, key: LevelKey) -> str:
+        """Get the file a level is cached in.
+        
+        Args:
+            key: Tuple of (seed, width, height, level, monster_count,
+                item_count, horde)
+        
+        Returns:
+            Path of the cache file
+        """
+        seed, width, height, level, monster_count, item_count, horde = key
+        name = f"{seed}-{width}x{height}-L{level}-m{monster_count}-i{item_count}"
+        if horde:
+            name += "-horde"
+        return os.path.join(self.directory, name + self.SUFFIX)
+    
+    def load(self, key: LevelKey) -> Optional[Dict[str, Any]]:
+        """Load a compiled level and mark it as recently used.
+        
+        A file that cannot be decoded, or holds a level other than the
+        one asked for, is deleted.
+        
+        Args:
+            key: Key the level was stored under
+        
+        Returns:
+            Compiled level data, or None when it is missing or unreadable
+        """
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as handle:
+                body = handle.read()
+        except OSError:
+            return None
+        
+        _, width, height, level, _, _, _ = key
+        try:
+            data = self._decode(body)
+            check((data['width'], data['height'], data['number']) == (width, height, level))
+        except (ValueError, struct.error, zlib.error):
+            self._discard(path)
+            return None
+        
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+    
+    def store(self, key: LevelKey, data: Dict[str, Any]):
+        """Write a compiled level and evict old levels if over budget.
+        
+        Args:
+            key: Key to store the level under
+            data: Compiled level data
+        """
+        path = self.path_for(key)
+        payload = self._encode(data)
+        body = (_HEADER.pack(MAGIC, self.FORMAT_VERSION, len(payload)) +
+                zlib.compress(payload, COMPRESS_LEVEL))
+        
+        with self._lock:
+            try:
+                handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(handle, "wb") as temp_file:
+                    temp_file.write(body)
+                os.replace(temp_path, path)
+            except OSError:
+                return
+            self._evict()
+    
+    @staticmethod
+    def _encode(data: Dict[str, Any]) -> bytes:
+        """Serialize a compiled level, uncompressed.
+        
+        Args:
+            data: Compiled level data
+        
+        Returns:
+            Struct header followed by the tile plane, wall atlas, region
+            runs and one packed array per spawn field
+        """
+        glyphs = data['wall_glyphs'].encode('utf-8')
+        starts, ends, run_regions = data['regions']
+        monsters = data['monsters']
+        items = data['items']
+        
+        chunks: List[bytes] = [
+            _LEVEL.pack(data['width'], data['height'], data['number'],
+                        *data['player_start'], *data['exit_pos'], len(glyphs),
+                        len(starts), len(monsters), len(items)),
+            bytes(data['tiles']),
+            glyphs,
+            pack_array('i', starts),
+            pack_array('i', ends),
+            pack_array('i', run_regions),
+        ]
+        for column in (0, 1, 3, 4):
+            chunks.append(pack_array('i', [monster[column] for monster in monsters]))
+        chunks.append(bytes(MONSTER_KINDS.index(MonsterType[monster[2]])
+                            for monster in monsters))
+        for column in (0, 1, 3):
+            chunks.append(pack_array('i', [item[column] for item in items]))
+        chunks.append(bytes(ITEM_KINDS.index(ItemType[item[2]]) for item in items))
+        return b''.join(chunks)
+    
+    @staticmethod
+    def _decode(body: bytes) -> Dict[str, Any]:
+        """Rebuild a compiled level from a cache file.
+        
+        Args:
+            body: Contents of the file, header included
+        
+        Returns:
+            Compiled level data in the form Level.compile() returns
+        
+        Raises:
+            ValueError: If the file is not a level of this format version,
+                is truncated or holds values out of range
+            struct.error: If a record is truncated
+            zlib.error: If the payload does not decompress
+        """
+        check(len(body) >= _HEADER.size)
+        magic, version, size = _HEADER.unpack_from(body)
+        check(magic == MAGIC and version == LevelCache.FORMAT_VERSION)
+        check(size <= (len(body) - _HEADER.size) * MAX_EXPANSION)
+        payload = zlib.decompress(body[_HEADER.size:], bufsize=max(size, 1))
+        check(len(payload) == size)
+        
+        reader = Reader(payload)
+        (width, height, number, start_x, start_y, exit_x, exit_y, glyph_size,
+         run_count, monster_count, item_count) = reader.unpack(_LEVEL)
+        cells = width * height
+        check(0 < cells and 2 * cells <= reader.remaining)
+        check(on_map((start_x, exit_x), (start_y, exit_y), width, height))
+        
+        tiles = reader.bytes(cells)
+        check(not tiles.translate(None, _TILE_CODES))
+        wall_glyphs = reader.bytes(glyph_size).decode('utf-8')
+        check(len(wall_glyphs) == cells)
+        
+        starts = reader.array('i', run_count)
+        ends = reader.array('i', run_count)
+        run_regions = reader.array('i', run_count)
+        check(all(0 <= start < end <= cells for start, end in zip(starts, ends)))
+        check(min(run_regions, default=0) >= 0 and
+              max(run_regions, default=0) < max(run_count, 1))
+        
+        monster_columns = [reader.array('i', monster_count) for _ in range(4)]
+        monster_kinds = reader.bytes(monster_count)
+        check(on_map(monster_columns[0], monster_columns[1], width, height))
+        check(max(monster_kinds, default=0) < len(MONSTER_KINDS))
+        
+        item_columns = [reader.array('i', item_count) for _ in range(3)]
+        item_kinds = reader.bytes(item_count)
+        check(on_map(item_columns[0], item_columns[1], width, height))
+        check(max(item_kinds, default=0) < len(ITEM_KINDS))
+        check(reader.remaining == 0)
+        
+        xs, ys, max_hps, attack_powers = monster_columns
+        monsters = [(x, y, MONSTER_KINDS[kind].name, max_hp, attack_power)
+                    for x, y, kind, max_hp, attack_power
+                    in zip(xs, ys, monster_kinds, max_hps, attack_powers)]
+        xs, ys, values = item_columns
+        items = [(x, y, ITEM_KINDS[kind].name, value)
+                 for x, y, kind, value in zip(xs, ys, item_kinds, values)]
+        
+        return {
+            'number': number,
+            'width': width,
+            'height': height,
+            'tiles': tiles,
+            'wall_glyphs': wall_glyphs,
+            'player_start': (start_x, start_y),
+            'exit_pos': (exit_x, exit_y),
+            'regions': (starts, ends, run_regions),
+            'monsters': monsters,
+            'items': items,
+        }
+    
+    @staticmethod
+    def _discard(path: str):
+        """Delete a cache file that could not be used.
+        
+        Args:
+            path: File to delete
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def clear(self):
+        """Delete every cached level."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                self._discard(path)
+    
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        """List the cached files.
+        
+        Returns:
+            List of (path, modification time, size) tuples
+        """
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        
+        for name in names:
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+    
+    def _evict(self):
+        """Delete least recently used files until the cache fits its budget."""
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        if total <= self.max_bytes:
+            return
+        
+        entries.sort(key=lambda entry: entry[1])
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
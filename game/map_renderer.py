@@ -0,0 +1,249 @@
+"""Incremental map rendering for the roguelike."""
+
+from typing import List, Optional, Set, Tuple
+
+from .ascii_art import glyphs_to_markup
+
+
+class Camera:
+    """A viewport onto the map that follows the player.
+    
+    The camera only scrolls when the player gets within `margin` tiles of
+    the edge of the view, so most moves leave the window where it is and
+    cached rows can be reused.
+    """
+    
+    def __init__(self, width: int = 0, height: int = 0, margin: int = 5):
+        """Initialize the camera.
+        
+        Args:
+            width: Width of the view in cells
+            height: Height of the view in cells
+            margin: Distance from the view edge at which the camera scrolls
+        """
+        self.x = 0
+        self.y = 0
+        self.width = width
+        self.height = height
+        self.margin = margin
+    
+    def resize(self, width: int, height: int):
+        """Change the size of the view.
+        
+        Args:
+            width: New width in cells
+            height: New height in cells
+        """
+        self.width = max(0, width)
+        self.height = max(0, height)
+    
+    def follow(self, target_x: int, target_y: int, map_width: int, map_height: int):
+        """Scroll the view so the target stays inside it.
+        
+        Args:
+            target_x: X coordinate to keep in view
+            target_y: Y coordinate to keep in view
+            map_width: Width of the map
+            map_height: Height of the map
+        """
+        self.x = self._follow_axis(self.x, target_x, self.width, map_width)
+        self.y = self._follow_axis(self.y, target_y, self.height, map_height)
+    
+    def _follow_axis(self, origin: int, target: int, size: int, limit: int) -> int:
+        """Compute the new view origin along one axis.
+        
+        Args:
+            origin: Current view origin
+            target: Coordinate to keep in view
+            size: Size of the view along the axis
+            limit: Size of the map along the axis
+        
+        Returns:
+            New view origin
+        """
+        if size >= limit:
+            return 0
+        
+        margin = min(self.margin, (size - 1) // 2)
+        if target < origin + margin:
+            origin = target - margin
+        elif target > origin + size - 1 - margin:
+            origin = target - size + 1 + margin
+        
+        return max(0, min(origin, limit - size))
+    
+    def rect(self, map_width: int, map_height: int) -> Tuple[int, int, int, int]:
+        """Get the part of the map covered by the view.
+        
+        Args:
+            map_width: Width of the map
+            map_height: Height of the map
+        
+        Returns:
+            Tuple of (x, y, width, height) clipped to the map
+        """
+        return (self.x, self.y,
+                min(self.width, map_width - self.x),
+                min(self.height, map_height - self.y))
+
+
+class MapRenderer:
+    """Renders a game map row by row, re-rendering only rows that changed.
+    
+    Rows are cached between frames as lists of (character, color) glyphs.
+    Each frame the renderer diffs the player, monster and item positions
+    against the previous frame and reads the FOV delta from the visibility
+    tracker, marking the rows of every changed cell dirty. Only dirty rows
+    are rendered again. render() turns the glyph rows into markup, while
+    widgets that draw styled segments can read glyph_rows directly.
+    
+    With a camera only the part of the map inside its view is rendered,
+    so frame cost depends on the view size rather than the map size.
+    """
+    
+    def __init__(self, camera: Optional[Camera] = None):
+        """Initialize the map renderer.
+        
+        Args:
+            camera: Optional camera limiting rendering to its view
+        """
+        self.camera = camera
+        self.glyph_rows: List[List[Tuple[str, str]]] = []
+        self.rows: List[str] = []
+        self.dirty_rows: Set[int] = set()
+        self._game_map = None
+        self._visibility_tracker = None
+        self._rect: Optional[Tuple[int, int, int, int]] = None
+        self._entity_cells: Set[Tuple[int, int, object]] = set()
+        self._full_redraw = True
+    
+    def invalidate(self):
+        """Force every row to be rendered on the next frame."""
+        self._full_redraw = True
+    
+    def mark_row_dirty(self, y: int):
+        """Mark a map row as needing a redraw on the next frame.
+        
+        Rows are redrawn whole, so a change to a single cell marks its row.
+        
+        Args:
+            y: Map row to redraw
+        """
+        self.dirty_rows.add(y)
+    
+    def render(self, game_map, player_x: int, player_y: int,
+               monster_manager=None, item_manager=None) -> str:
+        """Render the map, reusing cached rows that have not changed.
+        
+        Args:
+            game_map: Game map to render
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            monster_manager: Monster manager for rendering monsters
+            item_manager: Item manager for rendering items
+        
+        Returns:
+            String representation of the map, or of the camera's view
+        """
+        dirty_rows = self.update_rows(
+            game_map, player_x, player_y, monster_manager, item_manager
+        )
+        
+        if len(self.rows) != len(self.glyph_rows):
+            self.rows = [''] * len(self.glyph_rows)
+            dirty_rows = range(len(self.glyph_rows))
+        
+        for row in dirty_rows:
+            self.rows[row] = glyphs_to_markup(self.glyph_rows[row])
+        return '\n'.join(self.rows)
+    
+    def update_rows(self, game_map, player_x: int, player_y: int,
+                    monster_manager=None, item_manager=None) -> Set[int]:
+        """Bring the cached rows up to date with the game state.
+        
+        Args:
+            game_map: Game map to render
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            monster_manager: Monster manager for rendering monsters
+            item_manager: Item manager for rendering items
+        
+        Returns:
+            Set of indices into glyph_rows that were re-rendered
+        """
+        tracker = game_map.visibility_tracker
+        
+        if self.camera:
+            self.camera.follow(player_x, player_y, game_map.width, game_map.height)
+            rect = self.camera.rect(game_map.width, game_map.height)
+        else:
+            rect = (0, 0, game_map.width, game_map.height)
+        
+        if (game_map is not self._game_map or
+            tracker is not self._visibility_tracker or
+            rect != self._rect):
+            self._game_map = game_map
+            self._visibility_tracker = tracker
+            self._rect = rect
+            self._full_redraw = True
+        
+        view_x, view_y, view_width, view_height = rect
+        
+        entity_cells = self._collect_entity_cells(
+            rect, player_x, player_y, monster_manager, item_manager
+        )
+        
+        if self._full_redraw:
+            dirty_rows = set(range(view_height))
+            self.glyph_rows = [[] for _ in range(view_height)]
+            self._full_redraw = False
+        else:
+            world_rows = self.dirty_rows
+            for _, y, _ in entity_cells.symmetric_difference(self._entity_cells):
+                world_rows.add(y)
+            for _, y in tracker.iter_visibility_changes():
+                world_rows.add(y)
+            dirty_rows = {y - view_y for y in world_rows
+                          if view_y <= y < view_y + view_height}
+        
+        self._entity_cells = entity_cells
+        self.dirty_rows = set()
+        
+        for row in dirty_rows:
+            self.glyph_rows[row] = game_map.glyph_row(
+                view_y + row, player_x, player_y, monster_manager, item_manager,
+                view_x, view_x + view_width
+            )
+        
+        return dirty_rows
+    
+    def _collect_entity_cells(self, rect: Tuple[int, int, int, int],
+                              player_x: int, player_y: int,
+                              monster_manager=None,
+                              item_manager=None) -> Set[Tuple[int, int, object]]:
+        """Collect the cells in view currently drawn with an entity on them.
+        
+        Cells are keyed together with the entity drawn on them, so an entity
+        stepping into a cell another one just left still marks it dirty.
+        
+        Args:
+            rect: Rendered part of the map as (x, y, width, height)
+            player_x: Player's X coordinate
+            player_y: Player's Y coordinate
+            monster_manager: Monster manager for rendering monsters
+            item_manager: Item manager for rendering items
+        
+        Returns:
+            Set of (x, y, entity) tuples for the player, monsters and items
+        """
+        cells = {(player_x, player_y, 'player')}
+        
+        if monster_manager:
+            for monster in monster_manager.get_monsters_in_rect(*rect):
+                cells.add((monster.x, monster.y, monster))
+        
+        if item_manager:
+            for item in item_manager.get_items_in_rect(*rect):
+                cells.add((item.x, item.y, item))
+        
+        return cells
@@ -1,20 +1,76 @@
 """Monster system for the roguelike game."""
 
 import random
-from typing import List, Tuple, Optional
+from typing import Dict, List, Set, Tuple, Optional
 from enum import Enum
+from .pathing import DistanceMap
+from .scheduler import TurnScheduler, action_delay
 
 
 class MonsterType(Enum):
     """Different types of monsters."""
-    GOBLIN = ("♠", 20, 5, "Goblin")
-    ORC = ("♣", 35, 8, "Orc")
-    DRAGON = ("♦", 100, 15, "Dragon")
+    GOBLIN = ("♠", 20, 5, "Goblin", 120)
+    ORC = ("♣", 35, 8, "Orc", 100)
+    DRAGON = ("♦", 100, 15, "Dragon", 80)
 
 
-class Monster:
+class MonsterBase:
+    """Behaviour shared by every monster, with no storage of its own.
+    
+    Subclasses decide where the fields live: Monster keeps them in
+    slots, MonsterView in the columns of a MonsterStore.
+    """
+    
+    __slots__ = ()
+    
+    def attack(self, target, rng: Optional[random.Random] = None) -> int:
+        """Attack a target.
+        
+        Args:
+            target: Target to attack (usually player)
+            rng: Random stream for the damage roll, defaults to the global random module
+            
+        Returns:
+            Damage dealt
+        """
+        if not self.is_alive:
+            return 0
+        
+        rng = rng if rng is not None else random
+        damage = rng.randint(max(1, self.attack_power - 2), self.attack_power + 2)
+        return damage
+    
+    def distance_to(self, x: int, y: int) -> float:
+        """Calculate distance to a point.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+            
+        Returns:
+            Distance to the point
+        """
+        return ((self.x - x) ** 2 + (self.y - y) ** 2) ** 0.5
+    
+    def is_adjacent_to(self, x: int, y: int) -> bool:
+        """Check if monster is adjacent to a position.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+            
+        Returns:
+            True if adjacent
+        """
+        return abs(self.x - x) <= 1 and abs(self.y - y) <= 1 and (self.x != x or self.y != y)
+
+
+class Monster(MonsterBase):
     """Represents a monster in the game."""
     
+    __slots__ = ('x', 'y', 'monster_type', 'symbol', 'max_hp', 'hp',
+                 'attack_power', 'name', 'speed', 'is_alive')
+    
     def __init__(self, x: int, y: int, monster_type: MonsterType):
         """Initialize a monster.
         
@@ -31,6 +87,7 @@ class Monster:
         self.hp = self.max_hp
         self.attack_power = monster_type.value[2]
         self.name = monster_type.value[3]
+        self.speed = monster_type.value[4]
         self.is_alive = True
     
     def take_damage(self, damage: int) -> bool:
@@ -48,108 +105,154 @@ class Monster:
             self.symbol = '☠'  
             return True
         return False
+
+
+class MonsterManager:
+    """Manages all monsters in the game.
     
-    def attack(self, target) -> int:
-        """Attack a target.
+    Monsters are either active, queued in the turn scheduler, or dormant,
+    parked there at no per-turn cost. Monsters start dormant and wake
+    when they come into the player's view or hear a noise. They fall
+    dormant again once they are neither in view nor chasing the player.
+    
+    Given a MonsterStore, spawned monsters are rows in its arrays,
+    which keeps horde-sized populations compact.
+    """
+    
+    def __init__(self, store=None):
+        """Initialize the monster manager.
         
         Args:
-            target: Target to attack (usually player)
+            store: Optional MonsterStore to spawn monsters into
+        """
+        self.store = store
+        self.monsters: List[Monster] = []
+        self._positions: Dict[Tuple[int, int], Monster] = {}
+        self.distance_map: Optional[DistanceMap] = None
+        self.scheduler = TurnScheduler()
+        self._alerted: Set[Monster] = set()
+        self._woken_view: Optional[Tuple[object, int]] = None
+        self._dead_listed = 0
+    
+    def get_distance_map(self, game_map) -> DistanceMap:
+        """Get the shared distance map used for chasing the player.
+        
+        Args:
+            game_map: Game map the monsters move on
             
         Returns:
-            Damage dealt
+            Distance map for the given game map
         """
-        if not self.is_alive:
-            return 0
-        
-        damage = random.randint(max(1, self.attack_power - 2), self.attack_power + 2)
-        return damage
+        if self.distance_map is None or self.distance_map.game_map is not game_map:
+            self.distance_map = DistanceMap(game_map)
+        return self.distance_map
     
-    def move_towards(self, target_x: int, target_y: int, game_map) -> bool:
-        """Move one step towards target position.
+    def _is_occupied(self, x: int, y: int) -> bool:
+        """Check if a living monster stands on a tile.
         
         Args:
-            target_x: Target X coordinate
-            target_y: Target Y coordinate
-            game_map: Game map for collision detection
+            x: X coordinate
+            y: Y coordinate
             
         Returns:
-            True if moved successfully
+            True if the tile is occupied
         """
-        if not self.is_alive:
-            return False
+        return self.get_monster_at(x, y) is not None
+    
+    def add_monster(self, monster: Monster):
+        """Add a monster and register its position.
         
-        dx = 0
-        dy = 0
+        Args:
+            monster: Monster to add
+        """
+        self.monsters.append(monster)
+        self._positions[(monster.x, monster.y)] = monster
+        self.scheduler.park(monster)
+        self._woken_view = None
+    
+    def remove_monster(self, monster: Monster):
+        """Remove a monster from the level.
         
-        if target_x > self.x:
-            dx = 1
-        elif target_x < self.x:
-            dx = -1
+        A dead monster leaves the map and the turn order at once but stays
+        in self.monsters until dead monsters are the majority, when the
+        list (and the store's rows) are compacted in one pass, so a kill
+        costs amortized O(1) however large the horde.
         
-        if target_y > self.y:
-            dy = 1
-        elif target_y < self.y:
-            dy = -1
+        Args:
+            monster: Monster to remove
+        """
+        self._unindex(monster, monster.x, monster.y)
+        self.scheduler.remove(monster)
+        self._alerted.discard(monster)
         
-        new_x = self.x + dx
-        new_y = self.y + dy
+        if monster.is_alive:
+            if monster in self.monsters:
+                self.monsters.remove(monster)
+            return
         
-        if (0 <= new_x < len(game_map[0]) and 
-            0 <= new_y < len(game_map) and 
-            game_map[new_y][new_x] != '#'):
-            self.x = new_x
-            self.y = new_y
-            return True
+        self._dead_listed += 1
+        if self._dead_listed * 2 > len(self.monsters):
+            self.remove_dead_monsters()
+    
+    @property
+    def dormant_count(self) -> int:
+        """Number of monsters parked until something wakes them."""
+        return len(self.scheduler.parked)
+    
+    def move_monster(self, monster: Monster, x: int, y: int):
+        """Move a monster and keep the position index up to date.
         
-        return False
+        Args:
+            monster: Monster to move
+            x: New X coordinate
+            y: New Y coordinate
+        """
+        self._unindex(monster, monster.x, monster.y)
+        monster.x = x
+        monster.y = y
+        self._positions[(x, y)] = monster
     
-    def distance_to(self, x: int, y: int) -> float:
-        """Calculate distance to a point.
+    def _unindex(self, monster: Monster, x: int, y: int):
+        """Remove a monster from the position index if it is registered there.
         
         Args:
-            x: X coordinate
-            y: Y coordinate
-            
-        Returns:
-            Distance to the point
+            monster: Monster to remove
+            x: X coordinate it is registered at
+            y: Y coordinate it is registered at
         """
-        return ((self.x - x) ** 2 + (self.y - y) ** 2) ** 0.5
+        if self._positions.get((x, y)) is monster:
+            del self._positions[(x, y)]
     
-    def is_adjacent_to(self, x: int, y: int) -> bool:
-        """Check if monster is adjacent to a position.
+    def create_monster(self, x: int, y: int, monster_type: MonsterType) -> Monster:
+        """Create a monster with its type's base stats without adding it.
         
         Args:
             x: X coordinate
             y: Y coordinate
+            monster_type: Type of monster
             
         Returns:
-            True if adjacent
+            A Monster, or a MonsterView when the manager has a store
         """
-        return abs(self.x - x) <= 1 and abs(self.y - y) <= 1 and (self.x != x or self.y != y)
-
-
-class MonsterManager:
-    """Manages all monsters in the game."""
-    
-    def __init__(self):
-        """Initialize the monster manager."""
-        self.monsters: List[Monster] = []
+        if self.store is not None:
+            return self.store.add(x, y, monster_type)
+        return Monster(x, y, monster_type)
     
-    def spawn_monsters(self, game_map, count: int = 5, level: int = 1):
+    def spawn_monsters(self, game_map, count: int = 5, level: int = 1,
+                       rng: Optional[random.Random] = None):
         """Spawn monsters on the map.
         
         Args:
-            game_map: Game map to spawn monsters on
+            game_map: Game map whose floor index supplies free cells
             count: Number of monsters to spawn
             level: Current dungeon level for difficulty scaling
+            rng: Random stream for monster types, defaults to the global random module
         """
-        from .dungeon_generator import DungeonGenerator
-        
-        generator = DungeonGenerator(len(game_map[0]), len(game_map))
-        positions = generator.find_valid_positions(game_map, count)
+        rng = rng if rng is not None else random
+        positions = game_map.floor_index.sample(count)
         
         for i, (x, y) in enumerate(positions):
-            rand = random.random()
+            rand = rng.random()
             
             if level == 1:
                 if rand < 0.8:
@@ -171,7 +274,7 @@ class MonsterManager:
                 else:
                     monster_type = MonsterType.DRAGON
             
-            monster = Monster(x, y, monster_type)
+            monster = self.create_monster(x, y, monster_type)
             
             if level > 1:
                 bonus_hp = (level - 1) * 5
@@ -180,7 +283,7 @@ class MonsterManager:
                 monster.hp += bonus_hp
                 monster.attack_power += bonus_attack
             
-            self.monsters.append(monster)
+            self.add_monster(monster)
     
     def get_monster_at(self, x: int, y: int) -> Optional[Monster]:
         """Get monster at specific position.
@@ -192,18 +295,63 @@ class MonsterManager:
         Returns:
             Monster at position or None
         """
-        for monster in self.monsters:
-            if monster.x == x and monster.y == y and monster.is_alive:
-                return monster
+        monster = self._positions.get((x, y))
+        if monster and monster.is_alive:
+            return monster
         return None
     
+    def get_monsters_in_rect(self, x: int, y: int, 
+                             width: int, height: int) -> List[Monster]:
+        """Get all living monsters inside a rectangle.
+        
+        Args:
+            x, y: Top-left corner of the rectangle
+            width, height: Dimensions of the rectangle
+            
+        Returns:
+            List of monsters inside the rectangle
+        """
+        if width * height < len(self._positions):
+            found = []
+            for cy in range(y, y + height):
+                for cx in range(x, x + width):
+                    monster = self._positions.get((cx, cy))
+                    if monster and monster.is_alive:
+                        found.append(monster)
+            return found
+        
+        return [monster for (cx, cy), monster in self._positions.items()
+                if monster.is_alive and 
+                x <= cx < x + width and y <= cy < y + height]
+    
     def remove_dead_monsters(self):
         """Remove dead monsters from the list."""
+        if self.store is not None:
+            dead = self.store.sweep_dead()
+        else:
+            dead = [m for m in self.monsters if not m.is_alive]
+        if not dead:
+            return
+        
+        for monster in dead:
+            self._unindex(monster, monster.x, monster.y)
+            self.scheduler.remove(monster)
+            self._alerted.discard(monster)
         self.monsters = [m for m in self.monsters if m.is_alive]
+        self._dead_listed = 0
     
     def update_monsters(self, player_x: int, player_y: int, game_map, 
-                       visibility_tracker) -> List[str]:
-        """Update all monsters (AI and movement).
+                       visibility_tracker) -> List[Monster]:
+        """Let every monster whose action is due take its turn.
+        
+        The scheduler clock advances by one player action. Dormant
+        monsters in view are woken first. Due monsters that are out of the
+        player's sight and not chasing a noise fall dormant, so distant
+        monsters cost nothing per turn. Monsters next to the player spend
+        their action attacking, which is resolved by the caller.
+        
+        The player's view stands in for each monster's line of sight,
+        which needs the map's FOV to be symmetric (see GameMap.update_fov).
         
         Args:
             player_x: Player's X coordinate
@@ -212,77 +360,141 @@ class MonsterManager:
             visibility_tracker: FOV tracker
             
         Returns:
-            List of action messages
+            Monsters attacking the player this turn, once per attack
         """
-        messages = []
+        attackers = []
+        scheduler = self.scheduler
+        scheduler.advance()
         
-        for monster in self.monsters[:]: 
-            if not monster.is_alive:
-                continue
-            
-            if not visibility_tracker.is_visible(monster.x, monster.y):
-                continue
-            
-            if monster.is_adjacent_to(player_x, player_y):
-                damage = monster.attack(None)  
-                messages.append(f"{monster.name} attacks for {damage} damage!")
-            else:
-                distance = monster.distance_to(player_x, player_y)
-                if distance <= 8:  
-                    if self._can_see_player(monster, player_x, player_y, game_map):
-                        old_x, old_y = monster.x, monster.y
-                        if monster.move_towards(player_x, player_y, game_map):
-                            conflicting_monster = self.get_monster_at(monster.x, monster.y)
-                            if conflicting_monster and conflicting_monster != monster:
-                                monster.x, monster.y = old_x, old_y
-        
-        return messages
+        if scheduler.parked:
+            self._wake_visible(visibility_tracker)
+        
+        # The field is only flooded once some monster is due to act
+        distance_map = None
+        
+        due = scheduler.pop_due()
+        while due:
+            time, monster = due
+            if monster.is_alive:
+                if distance_map is None:
+                    distance_map = self.get_distance_map(game_map)
+                    distance_map.update(player_x, player_y)
+                self._take_turn(monster, time, player_x, player_y, 
+                                distance_map, visibility_tracker, attackers)
+            due = scheduler.pop_due()
+        
+        return attackers
+    
+    def make_noise(self, x: int, y: int, radius: int):
+        """Wake dormant monsters within earshot of a noise.
+        
+        Monsters that hear the noise chase the player for as long as the
+        distance map reaches them, even out of sight.
+        
+        Args:
+            x: X coordinate of the noise
+            y: Y coordinate of the noise
+            radius: Distance in tiles the noise carries
+        """
+        parked = self.scheduler.parked
+        heard = [monster for monster in self.get_monsters_in_rect(
+                     x - radius, y - radius, 2 * radius + 1, 2 * radius + 1)
+                 if monster not in self._alerted]
+        self._alerted.update(heard)
+        self._wake([monster for monster in heard if monster in parked])
+    
+    def _wake_visible(self, visibility_tracker):
+        """Wake dormant monsters that have come into the player's view.
+        
+        Dormant monsters never move, so only tiles that entered view since
+        the last call can hold one to wake. When the tracker was updated
+        exactly once since then and still holds that update's changed
+        tiles, they are enough, otherwise whichever is smaller of the
+        dormant monsters and the visible tiles is searched.
+        
+        Args:
+            visibility_tracker: FOV tracker
+        """
+        parked = self.scheduler.parked
+        generation = visibility_tracker.generation
+        previous = self._woken_view
+        self._woken_view = (visibility_tracker, generation)
+        
+        if previous and previous[0] is visibility_tracker:
+            if previous[1] == generation:
+                return
+            if (previous[1] + 1 == generation and
+                    not visibility_tracker.changes_cleared):
+                woken = []
+                for position in visibility_tracker.iter_visibility_changes():
+                    monster = self._positions.get(position)
+                    if monster in parked and visibility_tracker.is_visible(*position):
+                        woken.append(monster)
+                self._wake(woken)
+                return
+        
+        if len(parked) <= visibility_tracker.visible_count:
+            woken = [monster for monster in parked 
+                     if visibility_tracker.is_visible(monster.x, monster.y)]
+        else:
+            woken = []
+            for position in visibility_tracker.iter_visible():
+                monster = self._positions.get(position)
+                if monster in parked:
+                    woken.append(monster)
+        self._wake(woken)
     
-    def _can_see_player(self, monster: Monster, player_x: int, player_y: int, 
-                       game_map) -> bool:
-        """Check if monster can see the player.
+    def _wake(self, monsters: List[Monster]):
+        """Queue dormant monsters to act this turn.
         
         Args:
-            monster: The monster
+            monsters: Monsters to wake
+        """
+        # Wake in map order so turn order does not depend on set ordering
+        monsters.sort(key=lambda monster: (monster.y, monster.x))
+        for monster in monsters:
+            self.scheduler.wake(monster)
+    
+    def _take_turn(self, monster: Monster, time: int, player_x: int, player_y: int,
+                   distance_map: DistanceMap, visibility_tracker, 
+                   attackers: List[Monster]):
+        """Perform one scheduled action for a monster.
+        
+        Args:
+            monster: Monster whose action is due
+            time: Time the action was scheduled for
             player_x: Player's X coordinate
             player_y: Player's Y coordinate
-            game_map: Game map
-            
-        Returns:
-            True if monster can see player
+            distance_map: Distance map flooded from the player
+            visibility_tracker: FOV tracker
+            attackers: List collecting monsters that attack the player
         """
-        dx = abs(player_x - monster.x)
-        dy = abs(player_y - monster.y)
+        # Store-backed monsters are read straight from the columns
+        store = self.store
+        if store is not None:
+            index = monster.index
+            x, y, speed = store.x[index], store.y[index], store.speed[index]
+        else:
+            x, y, speed = monster.x, monster.y, monster.speed
         
-        if dx == 0 and dy == 0:
-            return True
+        visible = visibility_tracker.is_visible(x, y)
+        alerted = (monster in self._alerted and
+                   distance_map.get_distance(x, y) > 0)
         
-        x1, y1 = monster.x, monster.y
-        x2, y2 = player_x, player_y
-        
-        x_step = 1 if x1 < x2 else -1
-        y_step = 1 if y1 < y2 else -1
-        
-        if dx > dy:
-            error = dx / 2
-            y = y1
-            for x in range(x1, x2, x_step):
-                if game_map[y][x] == '#':
-                    return False
-                error -= dy
-                if error < 0:
-                    y += y_step
-                    error += dx
-        else:
-            error = dy / 2
-            x = x1
-            for y in range(y1, y2, y_step):
-                if game_map[y][x] == '#':
-                    return False
-                error -= dx
-                if error < 0:
-                    x += x_step
-                    error += dy
-        
-        return True
-
+        if not visible and not alerted:
+            self._alerted.discard(monster)
+            self.scheduler.park(monster)
+            return
+        
+        dx = x - player_x
+        dy = y - player_y
+        if visible and -1 <= dx <= 1 and -1 <= dy <= 1 and (dx or dy):
+            attackers.append(monster)
+        elif alerted or dx * dx + dy * dy <= 64:
+            # FOV is symmetric, so a monster the player can see within 8
+            # tiles can see the player too
+            step = distance_map.best_step(x, y, self._is_occupied)
+            if step:
+                self.move_monster(monster, step[0], step[1])
+        
+        self.scheduler.reschedule(monster, time, action_delay(speed))
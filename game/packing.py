@@ -0,0 +1,98 @@
+"""Little-endian binary packing shared by snapshots and the level cache."""
+
+import struct
+import sys
+from array import array
+from typing import Sequence
+
+
+# zlib cannot expand its input by more than about 1032 times, so a
+# payload size beyond that is corrupt and not worth allocating for
+MAX_EXPANSION = 1032
+
+_SWAP = sys.byteorder == 'big'
+
+
+def pack_array(typecode: str, values: Sequence[int]) -> bytes:
+    """Pack values as a little-endian array.
+    
+    Args:
+        typecode: Array typecode of the values
+        values: Values to pack
+    
+    Returns:
+        Packed bytes
+    """
+    packed = array(typecode, values)
+    if _SWAP:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+class Reader:
+    """Reads the sections of a binary payload in order."""
+    
+    def __init__(self, buffer):
+        """Initialize the reader.
+        
+        Args:
+            buffer: Bytes-like payload
+        """
+        self.buffer = buffer
+        self.offset = 0
+    
+    @property
+    def remaining(self) -> int:
+        """Number of bytes left to read."""
+        return len(self.buffer) - self.offset
+    
+    def unpack(self, layout: struct.Struct) -> tuple:
+        """Read one fixed-size record."""
+        values = layout.unpack_from(self.buffer, self.offset)
+        self.offset += layout.size
+        return values
+    
+    def bytes(self, size: int) -> bytes:
+        """Read a run of raw bytes."""
+        start = self.offset
+        self.offset += size
+        if self.offset > len(self.buffer):
+            raise ValueError("data is truncated")
+        return bytes(self.buffer[start:self.offset])
+    
+    def array(self, typecode: str, count: int) -> array:
+        """Read a little-endian array."""
+        values = array(typecode)
+        values.frombytes(self.bytes(count * values.itemsize))
+        if _SWAP:
+            values.byteswap()
+        return values
+
+
+def check(condition: bool):
+    """Reject data holding a value out of range.
+    
+    Args:
+        condition: Whether the value is in range
+    
+    Raises:
+        ValueError: If it is not
+    """
+    if not condition:
+        raise ValueError("data is corrupt")
+
+
+def on_map(xs: Sequence[int], ys: Sequence[int], width: int, height: int) -> bool:
+    """Check that positions lie on a map.
+    
+    Args:
+        xs: X coordinates
+        ys: Y coordinates, one per X coordinate
+        width: Width of the map
+        height: Height of the map
+    
+    Returns:
+        True if every position is on the map
+    """
+    return (all(0 <= x < width for x in xs) and
+            all(0 <= y < height for y in ys))
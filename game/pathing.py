@@ -0,0 +1,136 @@
+"""Shared pathfinding for monster AI."""
+
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+from .tiles import WALKABLE, TileGrid
+
+
+class DistanceMap:
+    """Breadth-first distance field flooded out from a single source.
+    
+    Every monster chasing the player reads its next step from the same
+    field, so a turn costs one bounded flood fill instead of one path or
+    line trace per monster. The fill stops at max_distance steps, which
+    keeps its cost independent of the map size.
+    """
+    
+    NEIGHBOURS = (
+        (0, -1), (1, 0), (0, 1), (-1, 0),
+        (1, -1), (1, 1), (-1, 1), (-1, -1),
+    )
+    
+    def __init__(self, game_map: TileGrid, max_distance: int = 16):
+        """Initialize the distance map.
+        
+        Args:
+            game_map: The game map to path over
+            max_distance: Number of steps the flood fill expands to
+        """
+        self.game_map = game_map
+        self.width = game_map.width
+        self.height = game_map.height
+        self.max_distance = max_distance
+        self.distances: List[int] = [-1] * (self.width * self.height)
+        self.source: Optional[Tuple[int, int]] = None
+        self._reached: List[int] = []
+    
+    def update(self, source_x: int, source_y: int):
+        """Make sure the field is flooded from the given source.
+        
+        The previous field is reused when the source has not moved.
+        
+        Args:
+            source_x: Source X coordinate
+            source_y: Source Y coordinate
+        """
+        if self.source != (source_x, source_y):
+            self.recompute(source_x, source_y)
+    
+    def recompute(self, source_x: int, source_y: int):
+        """Flood the distance field from the given source.
+        
+        Args:
+            source_x: Source X coordinate
+            source_y: Source Y coordinate
+        """
+        distances = self.distances
+        for index in self._reached:
+            distances[index] = -1
+        
+        self.source = (source_x, source_y)
+        self._reached = reached = []
+        
+        width, height = self.width, self.height
+        if not (0 <= source_x < width and 0 <= source_y < height):
+            return
+        
+        cells = self.game_map.cells
+        max_distance = self.max_distance
+        neighbours = self.NEIGHBOURS
+        
+        start = source_y * width + source_x
+        distances[start] = 0
+        reached.append(start)
+        frontier = deque([(source_x, source_y)])
+        
+        while frontier:
+            x, y = frontier.popleft()
+            next_distance = distances[y * width + x] + 1
+            if next_distance > max_distance:
+                continue
+            
+            for dx, dy in neighbours:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                index = ny * width + nx
+                if distances[index] != -1 or not WALKABLE[cells[index]]:
+                    continue
+                distances[index] = next_distance
+                reached.append(index)
+                frontier.append((nx, ny))
+    
+    def get_distance(self, x: int, y: int) -> int:
+        """Get the number of steps from a tile to the source.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        
+        Returns:
+            Distance in steps, or -1 if the tile was not reached
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.distances[y * self.width + x]
+        return -1
+    
+    def best_step(self, x: int, y: int,
+                  is_blocked: Optional[Callable[[int, int], bool]] = None
+                  ) -> Optional[Tuple[int, int]]:
+        """Find the neighbouring tile that gets closest to the source.
+        
+        Args:
+            x: X coordinate to step from
+            y: Y coordinate to step from
+            is_blocked: Optional check for tiles that are occupied
+        
+        Returns:
+            (x, y) of the best step, or None if no step gets closer
+        """
+        current = self.get_distance(x, y)
+        if current <= 0:
+            return None
+        
+        best = None
+        best_distance = current
+        for dx, dy in self.NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            distance = self.get_distance(nx, ny)
+            if 0 < distance < best_distance:
+                if is_blocked and is_blocked(nx, ny):
+                    continue
+                best = (nx, ny)
+                best_distance = distance
+        
+        return best
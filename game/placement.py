@@ -0,0 +1,125 @@
+"""Spawn placement on free floor cells."""
+
+import random
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+from .tiles import Tile, TileGrid
+
+
+class FloorIndex:
+    """Index of the floor cells of a map that nothing has been placed on.
+    
+    Free cells are kept in a list, and a per-cell array stores each
+    cell's slot in that list. Taking a cell swaps the last free cell
+    into its slot, so reserving a cell is O(1). Sampling count cells
+    without replacement is O(count). The player start, the exit,
+    monsters and items all draw from the same index, so they never
+    share a cell. The index only covers placement: it does not follow
+    things that move afterwards.
+    
+    The tables are built on first use, so a map restored from a cache or
+    a save, which nothing samples from again, never pays for them.
+    """
+    
+    def __init__(self, tiles: TileGrid, rng: Optional[random.Random] = None,
+                 reserved: Sequence[Tuple[int, int]] = ()):
+        """Initialize the index for a generated map.
+        
+        Args:
+            tiles: Tile grid of the map
+            rng: Random stream to sample with, defaults to the global random module
+            reserved: Positions already taken, reserved when the tables are built
+        """
+        self.rng = rng if rng is not None else random
+        self.width = tiles.width
+        self.height = tiles.height
+        self._tiles = tiles
+        self._reserved = list(reserved)
+        self._free: Optional[List[int]] = None
+        self._slots: Optional[array] = None
+    
+    def __len__(self) -> int:
+        """Number of free floor cells."""
+        return len(self._tables()[0])
+    
+    def _tables(self) -> Tuple[List[int], array]:
+        """Get the free list and slot table, building them if needed.
+        
+        Returns:
+            Tuple of (free cell indices, slot of every cell)
+        """
+        if self._slots is None:
+            self._free = self._tiles.indices_of(Tile.FLOOR)
+            self._slots = array('i', [-1]) * (self.width * self.height)
+            for slot, index in enumerate(self._free):
+                self._slots[index] = slot
+            for x, y in self._reserved:
+                self.reserve(x, y)
+            self._tiles = None
+            self._reserved = []
+        return self._free, self._slots
+    
+    def is_free(self, x: int, y: int) -> bool:
+        """Check if a position is a floor cell nothing was placed on.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        
+        Returns:
+            True if the position is free
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self._tables()[1][y * self.width + x] >= 0
+        return False
+    
+    def reserve(self, x: int, y: int) -> bool:
+        """Take a specific cell out of the index.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        
+        Returns:
+            True if the cell was free and is now reserved
+        """
+        if not self.is_free(x, y):
+            return False
+        self._take(self._slots[y * self.width + x])
+        return True
+    
+    def sample(self, count: int) -> List[Tuple[int, int]]:
+        """Take random free cells without replacement.
+        
+        Args:
+            count: Number of cells to take
+        
+        Returns:
+            List of up to count (x, y) tuples, fewer when the index runs out
+        """
+        width = self.width
+        free, _ = self._tables()
+        positions = []
+        for _ in range(min(count, len(free))):
+            index = self._take(self.rng.randrange(len(free)))
+            positions.append((index % width, index // width))
+        return positions
+    
+    def _take(self, slot: int) -> int:
+        """Remove the free cell at a slot by moving the last cell into it.
+        
+        Args:
+            slot: Slot of the cell in the free list
+        
+        Returns:
+            Cell index of the removed cell
+        """
+        free = self._free
+        index = free[slot]
+        last = free.pop()
+        if last != index:
+            free[slot] = last
+            self._slots[last] = slot
+        self._slots[index] = -1
+        return index
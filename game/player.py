@@ -35,9 +35,7 @@ class Player:
         new_x = self.x + dx
         new_y = self.y + dy
         
-        if (0 <= new_x < len(game_map[0]) and 
-            0 <= new_y < len(game_map) and 
-            game_map[new_y][new_x] != '#'):
+        if game_map.is_walkable(new_x, new_y):
             self.x = new_x
             self.y = new_y
             return True
@@ -0,0 +1,181 @@
+"""Per-phase turn timing with rolling histograms."""
+
+from array import array
+from time import perf_counter_ns
+from typing import Dict, List, Tuple
+
+
+# Each power of two of nanoseconds is split into this many equal
+# buckets, so a bucket is at most 25% wide
+SUB_BUCKETS = 4
+_SUB_BITS = 2
+BUCKET_COUNT = 64 * SUB_BUCKETS
+
+
+def bucket_of(ns: int) -> int:
+    """Get the histogram bucket of a duration.
+    
+    Args:
+        ns: Duration in nanoseconds
+    
+    Returns:
+        Bucket index, ordered by duration
+    """
+    bits = ns.bit_length()
+    if bits <= _SUB_BITS:
+        return ns
+    return (bits - _SUB_BITS) * SUB_BUCKETS + ((ns >> (bits - _SUB_BITS - 1)) & (SUB_BUCKETS - 1))
+
+
+def bucket_floor(bucket: int) -> int:
+    """Get the shortest duration that falls in a bucket.
+    
+    Args:
+        bucket: Bucket index
+    
+    Returns:
+        Duration in nanoseconds
+    """
+    if bucket < SUB_BUCKETS:
+        return bucket
+    shift, sub = divmod(bucket, SUB_BUCKETS)
+    return (SUB_BUCKETS + sub) << (shift - 1)
+
+
+class RollingHistogram:
+    """Log-scale histogram of the most recent samples of a duration.
+    
+    Samples go into a ring of the last window bucket indices, so adding
+    one costs O(1) and old samples drop out of the counts as new ones
+    arrive. Percentiles walk the bucket counts and are accurate to a
+    bucket's width.
+    """
+    
+    def __init__(self, window: int = 512):
+        """Initialize an empty histogram.
+        
+        Args:
+            window: Number of recent samples the histogram covers
+        """
+        self.window = window
+        self.counts = array('I', [0]) * BUCKET_COUNT
+        self._ring = array('H', [0]) * window
+        self._next = 0
+        self.count = 0
+        self.last = 0
+    
+    def add(self, ns: int):
+        """Add a sample.
+        
+        Args:
+            ns: Duration in nanoseconds
+        """
+        bucket = min(bucket_of(ns), BUCKET_COUNT - 1)
+        slot = self._next
+        if self.count < self.window:
+            self.count += 1
+        else:
+            self.counts[self._ring[slot]] -= 1
+        self._ring[slot] = bucket
+        self.counts[bucket] += 1
+        self._next = slot + 1 if slot + 1 < self.window else 0
+        self.last = ns
+    
+    def percentile(self, fraction: float) -> int:
+        """Estimate a percentile of the samples in the window.
+        
+        Args:
+            fraction: Percentile as a fraction, e.g. 0.99
+        
+        Returns:
+            Lower bound of the bucket holding the percentile, in
+            nanoseconds, or 0 without samples
+        """
+        if not self.count:
+            return 0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return bucket_floor(bucket)
+        return bucket_floor(BUCKET_COUNT - 1)
+    
+    def clear(self):
+        """Drop every sample."""
+        self.counts = array('I', [0]) * BUCKET_COUNT
+        self._next = 0
+        self.count = 0
+        self.last = 0
+
+
+class PhaseTimer:
+    """Times named phases of a turn into rolling histograms.
+    
+    Phases are timed by pairing start() with stop(), and stop() returns
+    the time it stopped at so consecutive phases can chain. While the
+    timer is disabled, start() returns 0 and stop() returns at once, so
+    instrumented code costs one call per hook.
+    """
+    
+    def __init__(self, window: int = 512):
+        """Initialize a disabled timer.
+        
+        Args:
+            window: Number of recent samples each phase's histogram covers
+        """
+        self.window = window
+        self.enabled = False
+        self.histograms: Dict[str, RollingHistogram] = {}
+    
+    def start(self) -> int:
+        """Start timing a phase.
+        
+        Returns:
+            Start time to pass to stop(), 0 when disabled
+        """
+        return perf_counter_ns() if self.enabled else 0
+    
+    def stop(self, phase: str, start: int) -> int:
+        """Finish timing a phase.
+        
+        Args:
+            phase: Name of the phase
+            start: Value start() returned
+        
+        Returns:
+            Current time, usable as the start of the next phase, or 0
+            when the phase was not being timed
+        """
+        if not start:
+            return 0
+        now = perf_counter_ns()
+        self.record(phase, now - start)
+        return now
+    
+    def record(self, phase: str, ns: int):
+        """Add a duration measured elsewhere.
+        
+        Args:
+            phase: Name of the phase
+            ns: Duration in nanoseconds
+        """
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = RollingHistogram(self.window)
+        histogram.add(ns)
+    
+    def summary(self) -> List[Tuple[str, int, int, int]]:
+        """Summarize every phase timed so far.
+        
+        Returns:
+            List of (phase, samples, p50 ns, p99 ns) tuples in the order
+            the phases were first timed
+        """
+        return [(phase, histogram.count, histogram.percentile(0.5),
+                 histogram.percentile(0.99))
+                for phase, histogram in self.histograms.items()]
+    
+    def clear(self):
+        """Forget every phase."""
+        self.histograms.clear()
@@ -0,0 +1,251 @@
+"""Connected region labelling for generated maps."""
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import List, Tuple
+
+from .tiles import WALKABLE, TileGrid
+
+
+_RUN = re.compile(b'\x01+')
+
+
+class Regions:
+    """Connected walkable regions of a map, stored as horizontal runs.
+    
+    Every maximal horizontal run of walkable cells in a row is one run.
+    Runs are kept in row-major order as half-open [start, end) ranges of
+    cell indices, so the run holding a cell is found by bisecting the
+    run starts and no per-cell label table is needed. Regions are
+    numbered in the order their first cell appears in the map.
+    """
+    
+    def __init__(self, width: int, height: int, starts: array, ends: array,
+                 run_regions: array, region_runs: List[List[int]]):
+        """Initialize the regions.
+        
+        Args:
+            width: Width of the map
+            height: Height of the map
+            starts: First cell index of each run
+            ends: Cell index one past the end of each run
+            run_regions: Region of each run
+            region_runs: Run numbers of each region
+        """
+        self.width = width
+        self.height = height
+        self.starts = starts
+        self.ends = ends
+        self.run_regions = run_regions
+        self.region_runs = region_runs
+        self.sizes = [sum(ends[run] - starts[run] for run in runs) for runs in region_runs]
+    
+    @classmethod
+    def from_runs(cls, width: int, height: int, starts: array, ends: array,
+                  run_regions: array) -> 'Regions':
+        """Rebuild regions from the runs and run labels of a labelled map.
+        
+        Args:
+            width: Width of the map
+            height: Height of the map
+            starts: First cell index of each run
+            ends: Cell index one past the end of each run
+            run_regions: Region of each run, numbered from 0
+        
+        Returns:
+            The same regions label_regions() found
+        """
+        region_runs: List[List[int]] = [[] for _ in range(max(run_regions, default=-1) + 1)]
+        for run, region in enumerate(run_regions):
+            region_runs[region].append(run)
+        return cls(width, height, starts, ends, run_regions, region_runs)
+    
+    def __len__(self) -> int:
+        """Number of regions."""
+        return len(self.region_runs)
+    
+    def region_at(self, x: int, y: int) -> int:
+        """Get the region a cell belongs to.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        
+        Returns:
+            Region number, or -1 for walls and positions off the map
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return -1
+        index = y * self.width + x
+        run = bisect_right(self.starts, index) - 1
+        if run >= 0 and index < self.ends[run]:
+            return self.run_regions[run]
+        return -1
+    
+    def connected(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Check if a walkable path links two cells.
+        
+        Args:
+            x1, y1: First cell
+            x2, y2: Second cell
+        
+        Returns:
+            True if both cells are walkable and in the same region
+        """
+        region = self.region_at(x1, y1)
+        return region >= 0 and region == self.region_at(x2, y2)
+    
+    def largest(self) -> int:
+        """Get the region with the most cells.
+        
+        Returns:
+            Region number, or -1 if the map has no walkable cells
+        """
+        if not self.sizes:
+            return -1
+        return max(range(len(self.sizes)), key=self.sizes.__getitem__)
+    
+    def indices(self, region: int) -> List[int]:
+        """List the cells of a region.
+        
+        Args:
+            region: Region number
+        
+        Returns:
+            Cell indices (y * width + x) in ascending order
+        """
+        indices = []
+        for run in self.region_runs[region]:
+            indices.extend(range(self.starts[run], self.ends[run]))
+        return indices
+    
+    def nearest(self, region: int, x: int, y: int) -> Tuple[int, int]:
+        """Find the cell of a region closest to a position.
+        
+        Args:
+            region: Region number
+            x: X coordinate of the position
+            y: Y coordinate of the position
+        
+        Returns:
+            (x, y) cell of the region with the smallest Manhattan distance
+        """
+        width = self.width
+        best, best_distance = None, None
+        for run in self.region_runs[region]:
+            start = self.starts[run]
+            row = start // width
+            first = start - row * width
+            last = first + self.ends[run] - start - 1
+            column = min(max(x, first), last)
+            distance = abs(column - x) + abs(row - y)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = (column, row), distance
+        return best
+    
+    def anchor(self, region: int) -> Tuple[int, int]:
+        """Get a cell near the middle of a region's middle run.
+        
+        Args:
+            region: Region number
+        
+        Returns:
+            (x, y) position inside the region
+        """
+        runs = self.region_runs[region]
+        run = runs[len(runs) // 2]
+        index = (self.starts[run] + self.ends[run] - 1) // 2
+        return index % self.width, index // self.width
+
+
+def _find(parent: List[int], run: int) -> int:
+    """Find the root of a run in the union-find forest, halving paths.
+    
+    Args:
+        parent: Parent of each run
+        run: Run to look up
+    
+    Returns:
+        Root run of the set
+    """
+    while parent[run] != run:
+        parent[run] = parent[parent[run]]
+        run = parent[run]
+    return run
+
+
+def label_regions(tiles: TileGrid) -> Regions:
+    """Label the connected walkable regions of a map.
+    
+    Walkable runs are found with one regex scan over the walkable mask.
+    Each run is then joined with union-find to the runs above it that
+    share a column, so the pass is linear in the number of runs rather
+    than the number of cells.
+    
+    Args:
+        tiles: Tile grid of the map
+    
+    Returns:
+        Regions of 4-connected walkable cells
+    """
+    width = tiles.width
+    starts = array('i')
+    ends = array('i')
+    parent: List[int] = []
+    
+    current_row = -1
+    row_first = above_first = above_end = 0
+    pointer = 0
+    
+    for match in _RUN.finditer(tiles.mask(WALKABLE)):
+        start, end = match.span()
+        # A run that wraps past the end of a row is split per row
+        while start < end:
+            row = start // width
+            run_end = min(end, (row + 1) * width)
+            
+            if row != current_row:
+                if row == current_row + 1:
+                    above_first, above_end = row_first, len(parent)
+                else:
+                    above_first = above_end = len(parent)
+                row_first = len(parent)
+                pointer = above_first
+                current_row = row
+            
+            run = len(parent)
+            parent.append(run)
+            starts.append(start)
+            ends.append(run_end)
+            
+            # Join the runs directly above that share at least one column,
+            # always keeping the smaller run number as the root
+            while pointer < above_end and ends[pointer] <= start - width:
+                pointer += 1
+            above = pointer
+            root = run
+            while above < above_end and starts[above] < run_end - width:
+                other = _find(parent, above)
+                if other < root:
+                    parent[root] = other
+                    root = other
+                elif other > root:
+                    parent[other] = root
+                above += 1
+            
+            start = run_end
+    
+    run_regions = array('i', [0]) * len(parent)
+    region_runs: List[List[int]] = []
+    root_regions = {}
+    for run in range(len(parent)):
+        root = _find(parent, run)
+        region = root_regions.get(root)
+        if region is None:
+            region = root_regions[root] = len(region_runs)
+            region_runs.append([])
+        run_regions[run] = region
+        region_runs[region].append(run)
+    
+    return Regions(width, tiles.height, starts, ends, run_regions, region_runs)
@@ -0,0 +1,438 @@
+"""Action log recording and headless replay of recorded games.
+
+Run a log from the repository root with ``python -m game.replay PATH``.
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from typing import Callable, Optional
+
+from .level_cache import LevelCache
+from .profiling import PhaseTimer
+from .session import Action, GameSession
+from .snapshot import default_data_dir
+
+
+MAGIC = b'TVAL'
+VERSION = 1
+SUFFIX = ".tvl"
+
+FLAG_CHECKSUMS = 1
+FLAG_HORDE = 2
+
+# Magic, version, flags, seed and map size
+_HEADER = struct.Struct('<4sHHQII')
+# Action and state checksum after it
+_RECORD = struct.Struct('<BI')
+# Player position and stats, gold, level, score, combat turns,
+# scheduler clock and number of monsters
+_STATE = struct.Struct('<iiiiiiIqIqI')
+
+ACTIONS_BY_VALUE = {action.value: action for action in Action}
+
+# Number of action logs the game keeps before deleting the oldest
+MAX_LOGS = 20
+
+_SWAP = sys.byteorder == 'big'
+
+
+def default_log_dir() -> str:
+    """Get the directory action logs are kept in by default.
+    
+    Returns:
+        Logs directory under default_data_dir()
+    """
+    return os.path.join(default_data_dir(), "logs")
+
+
+def default_log_path(seed: int) -> str:
+    """Get the file the actions of a game are logged to by default.
+    
+    Args:
+        seed: Seed of the game
+    
+    Returns:
+        Path in default_log_dir()
+    """
+    return os.path.join(default_log_dir(), f"{seed}{SUFFIX}")
+
+
+def prune_logs(directory: str, keep: int = MAX_LOGS) -> int:
+    """Delete all but the most recently written action logs in a directory.
+    
+    Args:
+        directory: Directory holding the logs
+        keep: Number of logs to keep
+    
+    Returns:
+        Number of logs deleted
+    """
+    logs = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        if not name.endswith(SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            logs.append((os.stat(path).st_mtime, path))
+        except OSError:
+            continue
+    
+    logs.sort(reverse=True)
+    deleted = 0
+    for _, path in logs[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        deleted += 1
+    return deleted
+
+
+def state_checksum(session: GameSession) -> int:
+    """Checksum the parts of a game that any divergence soon shows up in.
+    
+    Covers the player, the game state, the turn clocks and the position
+    and hit points of every monster, but not the map or the items, which
+    only change through those.
+    
+    Args:
+        session: Session to checksum
+    
+    Returns:
+        CRC-32 of the state
+    """
+    player = session.player
+    game_state = session.game_state
+    monster_manager = session.monster_manager
+    monsters = [monster for monster in monster_manager.monsters if monster.is_alive]
+    
+    checksum = zlib.crc32(_STATE.pack(
+        player.x, player.y, player.hp, player.max_hp, player.attack_power,
+        player.inventory.gold, game_state.current_level, game_state.score,
+        session.combat_system.turn_count, monster_manager.scheduler.now, len(monsters),
+    ))
+    
+    fields = array('i')
+    for monster in monsters:
+        fields.append(monster.x)
+        fields.append(monster.y)
+        fields.append(monster.hp)
+    if _SWAP:
+        fields.byteswap()
+    return zlib.crc32(fields, checksum)
+
+
+class ActionLog:
+    """Append-only log of the actions of one game.
+    
+    The log starts with a header holding the game's seed, map size and
+    horde flag, which is all it takes to rebuild the game's first level,
+    followed by one byte per action. With checksums, each action is
+    followed by a 4-byte state_checksum() of the game after it, so a
+    replay can tell the first turn it went differently.
+    
+    Attach a log to a session as session.action_log and every step is
+    recorded. A game resumed from a save continues the log at the save's
+    step count, so steps logged after the save by a run that crashed
+    before saving again are dropped rather than replayed twice.
+    """
+    
+    def __init__(self, path: str, seed: int, width: int, height: int,
+                 horde: bool = False, checksums: bool = False, resume: bool = False,
+                 records: Optional[int] = None):
+        """Open the log.
+        
+        Args:
+            path: File to write
+            seed: Seed of the game
+            width: Width of the game's maps
+            height: Height of the game's maps
+            horde: Whether the game fills levels with a horde
+            checksums: Whether to record a state checksum per action
+            resume: Whether to append to the existing log of a resumed game
+                instead of starting a new one
+            records: Number of records to keep when resuming, usually the
+                step count of the save, or None to keep every whole record
+        
+        Raises:
+            OSError: If the file cannot be opened, or is missing when resuming
+            ValueError: If resuming a log that records a different game, or
+                that holds fewer than records records
+        """
+        self.path = path
+        self.checksums = checksums
+        flags = (FLAG_CHECKSUMS if checksums else 0) | (FLAG_HORDE if horde else 0)
+        header = _HEADER.pack(MAGIC, VERSION, flags, seed, width, height)
+        
+        if resume:
+            with open(path, "rb") as handle:
+                if handle.read(_HEADER.size) != header:
+                    raise ValueError(f"{path} records a different game")
+                size = os.fstat(handle.fileno()).st_size
+            # Drop a record left half-written by a crash, and any records
+            # past the save that a crash kept from being saved again
+            record_size = _RECORD.size if checksums else 1
+            whole = (size - _HEADER.size) // record_size
+            if records is not None:
+                if whole < records:
+                    raise ValueError(f"{path} ends before the saved game")
+                whole = records
+            end = _HEADER.size + whole * record_size
+            if end != size:
+                os.truncate(path, end)
+            self._file = open(path, "ab")
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "wb")
+            self._file.write(header)
+    
+    def __enter__(self) -> 'ActionLog':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def record(self, session: GameSession, action: Action):
+        """Append an action the session just performed.
+        
+        Args:
+            session: Session after the action
+            action: Action performed
+        """
+        if self.checksums:
+            self._file.write(_RECORD.pack(action.value, state_checksum(session)))
+        else:
+            self._file.write(bytes((action.value,)))
+    
+    def flush(self):
+        """Write buffered records to the file."""
+        self._file.flush()
+    
+    def close(self):
+        """Flush and close the file."""
+        if not self._file.closed:
+            self._file.close()
+
+
+def start_recording(session: GameSession, path: str, checksums: bool = False,
+                    resume: bool = False) -> ActionLog:
+    """Record every following action of a session.
+    
+    Args:
+        session: Session to record
+        path: File to write
+        checksums: Whether to record a state checksum per action
+        resume: Whether the session was resumed and continues the log at
+            path from its step count
+    
+    Returns:
+        The log, which the caller closes when done
+    """
+    log = ActionLog(path, session.seed, session.width, session.height,
+                    session.horde, checksums, resume,
+                    session.step_count if resume else None)
+    session.action_log = log
+    return log
+
+
+class RecordedGame:
+    """Contents of an action log."""
+    
+    def __init__(self, seed: int, width: int, height: int, horde: bool,
+                 actions: bytes, checksums: Optional[array]):
+        """Initialize a recorded game.
+        
+        Args:
+            seed: Seed of the game
+            width: Width of the game's maps
+            height: Height of the game's maps
+            horde: Whether the game fills levels with a horde
+            actions: Value of each action, one byte per turn
+            checksums: State checksum after each action, if recorded
+        """
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.horde = horde
+        self.actions = actions
+        self.checksums = checksums
+    
+    def __len__(self) -> int:
+        """Number of recorded turns."""
+        return len(self.actions)
+
+
+def read_action_log(path: str) -> RecordedGame:
+    """Read an action log.
+    
+    Args:
+        path: File written by ActionLog
+    
+    Returns:
+        The recorded game, without any half-written last record
+    
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not an action log of this version
+    """
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is not an action log")
+    magic, version, flags, seed, width, height = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an action log")
+    if version != VERSION:
+        raise ValueError(f"{path} is a version {version} action log, "
+                         f"expected version {VERSION}")
+    
+    body = memoryview(data)[_HEADER.size:]
+    checksums = None
+    if flags & FLAG_CHECKSUMS:
+        body = body[:len(body) // _RECORD.size * _RECORD.size]
+        actions = bytes(body[0::_RECORD.size])
+        checksums = array('I', [checksum for _, checksum in _RECORD.iter_unpack(body)])
+    else:
+        actions = bytes(body)
+    
+    unknown = set(actions) - ACTIONS_BY_VALUE.keys()
+    if unknown:
+        raise ValueError(f"{path} holds unknown actions {sorted(unknown)}")
+    return RecordedGame(seed, width, height, bool(flags & FLAG_HORDE), actions, checksums)
+
+
+class ReplayResult:
+    """Outcome of replaying an action log."""
+    
+    def __init__(self, session: GameSession, turns: int, seconds: float,
+                 divergence: Optional[int]):
+        """Initialize a replay result.
+        
+        Args:
+            session: Session in its state after the last replayed turn
+            turns: Number of turns replayed
+            seconds: Wall time the replay took
+            divergence: Index of the first turn whose checksum did not
+                match the log, or None
+        """
+        self.session = session
+        self.turns = turns
+        self.seconds = seconds
+        self.divergence = divergence
+    
+    @property
+    def turns_per_second(self) -> float:
+        """Replay speed."""
+        return self.turns / self.seconds if self.seconds > 0 else 0.0
+
+
+def replay(game: RecordedGame, verify: bool = True,
+           level_cache: Optional[LevelCache] = None,
+           on_turn: Optional[Callable[[int, GameSession], None]] = None,
+           timings: bool = False) -> ReplayResult:
+    """Re-run a recorded game as fast as the engine allows.
+    
+    Levels are built synchronously with no UI, so nothing but the game
+    itself is timed.
+    
+    Args:
+        game: Recorded game from read_action_log()
+        verify: Whether to compare each turn against the recorded checksums
+        level_cache: Cache of compiled levels to load levels from
+        on_turn: Called with the turn index and session after every turn
+        timings: Whether to time the phases of every turn in session.timer
+    
+    Returns:
+        Result of the replay, stopped at the first diverging turn
+    """
+    session = GameSession(game.width, game.height, horde=game.horde,
+                          seed=game.seed, level_cache=level_cache)
+    actions = [ACTIONS_BY_VALUE[value] for value in game.actions]
+    if timings:
+        session.timer = PhaseTimer(window=max(1, len(actions)))
+        session.timer.enabled = True
+    checksums = game.checksums if verify else None
+    step = session.step
+    divergence = None
+    turns = 0
+    
+    start = time.perf_counter()
+    if checksums is None and on_turn is None:
+        for action in actions:
+            step(action)
+        turns = len(actions)
+    else:
+        for turn, action in enumerate(actions):
+            step(action)
+            turns += 1
+            if on_turn is not None:
+                on_turn(turn, session)
+            if checksums is not None and state_checksum(session) != checksums[turn]:
+                divergence = turn
+                break
+    seconds = time.perf_counter() - start
+    
+    return ReplayResult(session, turns, seconds, divergence)
+
+
+def main(argv=None) -> int:
+    """Replay an action log.
+    
+    Args:
+        argv: Command line arguments, defaults to sys.argv
+    
+    Returns:
+        Process exit code, 1 if the replay diverged from the log
+    """
+    parser = argparse.ArgumentParser(description="Replay a recorded game headlessly.")
+    parser.add_argument("path", help="action log to replay")
+    parser.add_argument("--no-verify", action="store_true",
+                        help="skip the per-turn checksum comparison")
+    parser.add_argument("--cache", action="store_true",
+                        help="load levels from the on-disk level cache")
+    parser.add_argument("--timings", action="store_true",
+                        help="print p50/p99 times of each phase of a turn")
+    parser.add_argument("--profile", type=int, default=0, metavar="N",
+                        help="profile the replay and print the N slowest functions")
+    args = parser.parse_args(argv)
+    
+    game = read_action_log(args.path)
+    level_cache = LevelCache() if args.cache else None
+    verify = not args.no_verify
+    
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        result = profiler.runcall(replay, game, verify, level_cache, None, args.timings)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.profile)
+    else:
+        result = replay(game, verify, level_cache, timings=args.timings)
+    
+    game_state = result.session.game_state
+    print(f"replayed {result.turns} of {len(game)} turns in {result.seconds:.2f}s "
+          f"({result.turns_per_second:.0f} turns/s), "
+          f"level {game_state.current_level}, score {game_state.score}")
+    if args.timings:
+        print(f"{'phase':<16} {'p50 ms':>10} {'p99 ms':>10}")
+        for phase, _, p50, p99 in result.session.timer.summary():
+            print(f"{phase:<16} {p50 / 1e6:>10.3f} {p99 / 1e6:>10.3f}")
+    if game.checksums is None and verify:
+        print("log has no checksums, divergence was not checked")
+    if result.divergence is not None:
+        print(f"diverged from the log at turn {result.divergence}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Energy-based turn scheduling for actors."""
+
+import heapq
+from itertools import count
+from typing import Dict, List, Set, Tuple
+
+
+ACTION_TIME = 100
+NORMAL_SPEED = 100
+
+
+def action_delay(speed: int) -> int:
+    """Get the time an actor of a given speed needs for one action.
+    
+    Args:
+        speed: Actor speed, NORMAL_SPEED acts once per player action
+    
+    Returns:
+        Time until the actor acts again
+    """
+    return max(1, ACTION_TIME * NORMAL_SPEED // max(1, speed))
+
+
+class TurnScheduler:
+    """Priority queue of actors ordered by the time of their next action.
+    
+    The clock advances by ACTION_TIME for every player action and only
+    actors whose next action is due are popped, so idle actors cost
+    nothing. Actors with equal times act in the order they were
+    scheduled. Actors that have nothing to do can be parked, which takes
+    them out of the queue until they are woken again.
+    """
+    
+    def __init__(self):
+        """Initialize an empty scheduler."""
+        self.now = 0
+        self.parked: Set[object] = set()
+        self._queue: List[Tuple[int, int, object]] = []
+        self._counter = count()
+        self._scheduled: Dict[object, int] = {}
+    
+    def __len__(self) -> int:
+        """Number of actors waiting in the queue."""
+        return len(self._scheduled)
+    
+    def schedule(self, actor, delay: int = 0):
+        """Queue an actor to act after a delay.
+        
+        An actor that is already queued keeps only its latest entry.
+        
+        Args:
+            actor: Actor to schedule
+            delay: Time from now until the actor acts
+        """
+        time = self.now + delay
+        self.parked.discard(actor)
+        self._scheduled[actor] = time
+        heapq.heappush(self._queue, (time, next(self._counter), actor))
+    
+    def reschedule(self, actor, time: int, delay: int):
+        """Queue an actor that just acted at a given time.
+        
+        Args:
+            actor: Actor that acted
+            time: Time the actor acted at
+            delay: Time the action took
+        """
+        self._scheduled[actor] = time + delay
+        heapq.heappush(self._queue, (time + delay, next(self._counter), actor))
+    
+    def advance(self, time: int = ACTION_TIME):
+        """Move the clock forward.
+        
+        Args:
+            time: Time to advance by
+        """
+        self.now += time
+    
+    def pop_due(self):
+        """Pop the next actor whose action is due.
+        
+        Returns:
+            Tuple of (time, actor), or None when no actor is due
+        """
+        queue = self._queue
+        while queue and queue[0][0] <= self.now:
+            time, _, actor = heapq.heappop(queue)
+            if self._scheduled.get(actor) == time:
+                del self._scheduled[actor]
+                return time, actor
+        return None
+    
+    def park(self, actor):
+        """Take an actor out of the queue until it is woken.
+        
+        Args:
+            actor: Actor to park
+        """
+        self._scheduled.pop(actor, None)
+        self.parked.add(actor)
+    
+    def wake(self, actor):
+        """Queue a parked actor to act on the current turn.
+        
+        Args:
+            actor: Actor to wake
+        """
+        if actor in self.parked:
+            self.schedule(actor)
+    
+    def remove(self, actor):
+        """Forget an actor entirely.
+        
+        Args:
+            actor: Actor to remove
+        """
+        self._scheduled.pop(actor, None)
+        self.parked.discard(actor)
+    
+    def pending(self) -> List[Tuple[int, object]]:
+        """List the queued actors in the order they will act.
+        
+        Returns:
+            List of (time, actor) tuples, ordered like pop_due() pops them
+        """
+        first: Dict[object, Tuple[int, int]] = {}
+        for time, sequence, actor in self._queue:
+            if self._scheduled.get(actor) == time:
+                entry = first.get(actor)
+                if entry is None or sequence < entry[1]:
+                    first[actor] = (time, sequence)
+        order = sorted(first.items(), key=lambda item: item[1])
+        return [(time, actor) for actor, (time, _) in order]
+    
+    def is_scheduled(self, actor) -> bool:
+        """Check if an actor is waiting in the queue.
+        
+        Args:
+            actor: Actor to check
+        
+        Returns:
+            True if the actor is queued
+        """
+        return actor in self._scheduled
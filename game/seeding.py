@@ -0,0 +1,53 @@
+"""Seeded random streams for reproducible levels and games."""
+
+import hashlib
+import random
+from typing import Dict
+
+
+SUBSYSTEMS = ('dungeon', 'placement', 'monsters', 'items')
+
+
+def derive_seed(seed: int, level: int, subsystem: str) -> int:
+    """Derive the seed of one subsystem's stream from a game seed.
+    
+    Args:
+        seed: Seed of the whole game
+        level: Dungeon level number, or 0 for streams shared by all levels
+        subsystem: Name of the subsystem drawing from the stream
+    
+    Returns:
+        64-bit seed that is stable across runs and platforms
+    """
+    digest = hashlib.sha256(f"{seed}:{level}:{subsystem}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def subsystem_rng(seed: int, level: int, subsystem: str) -> random.Random:
+    """Create the random stream of one subsystem.
+    
+    Args:
+        seed: Seed of the whole game
+        level: Dungeon level number, or 0 for streams shared by all levels
+        subsystem: Name of the subsystem drawing from the stream
+    
+    Returns:
+        Independent random stream
+    """
+    return random.Random(derive_seed(seed, level, subsystem))
+
+
+def level_streams(seed: int, level: int) -> Dict[str, random.Random]:
+    """Create the streams used to generate and populate one level.
+    
+    Each subsystem draws from its own stream, so a change in how many
+    numbers one of them consumes does not shift what the others get.
+    
+    Args:
+        seed: Seed of the whole game
+        level: Dungeon level number
+    
+    Returns:
+        Dictionary mapping each name in SUBSYSTEMS to its stream
+    """
+    return {name: subsystem_rng(seed, level, name) for name in SUBSYSTEMS}
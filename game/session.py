@@ -0,0 +1,390 @@
+"""Headless game engine that runs the roguelike without any UI."""
+
+import random
+from enum import Enum
+from typing import List, Optional
+
+from .player import Player
+from .combat import CombatSystem, GameState
+from .items import ItemType
+from .level import Level, LevelPrefetcher, build_level
+from .level_cache import LevelCache
+from .profiling import PhaseTimer
+from .horde import horde_size
+from .seeding import subsystem_rng
+
+
+class Action(Enum):
+    """Actions the player can take, one per turn."""
+    MOVE_UP = 0
+    MOVE_DOWN = 1
+    MOVE_LEFT = 2
+    MOVE_RIGHT = 3
+    USE_POTION = 4
+    USE_SCROLL = 5
+    USE_ITEM = 6
+    RESTART = 7
+
+
+MOVE_DELTAS = {
+    Action.MOVE_UP: (0, -1),
+    Action.MOVE_DOWN: (0, 1),
+    Action.MOVE_LEFT: (-1, 0),
+    Action.MOVE_RIGHT: (1, 0),
+}
+
+
+class EventType(Enum):
+    """Kinds of events produced by a game step."""
+    MOVED = "moved"
+    BLOCKED = "blocked"
+    ATTACKED = "attacked"
+    MONSTER_KILLED = "monster_killed"
+    ITEM_PICKED_UP = "item_picked_up"
+    ITEM_USED = "item_used"
+    NO_ITEM = "no_item"
+    MONSTER_TURN = "monster_turn"
+    LEVEL_ADVANCED = "level_advanced"
+    LEVEL_RESTARTED = "level_restarted"
+    PLAYER_DIED = "player_died"
+
+
+class GameEvent:
+    """Something that happened during a game step."""
+    
+    def __init__(self, event_type: EventType, message: str = ""):
+        """Initialize a game event.
+        
+        Args:
+            event_type: Kind of event
+            message: Human readable description
+        """
+        self.event_type = event_type
+        self.message = message
+    
+    def __repr__(self) -> str:
+        return f"GameEvent({self.event_type.name}, {self.message!r})"
+
+
+class GameSession:
+    """Owns the full game state and advances it one action at a time.
+    
+    The session has no UI dependency, so it can be stepped directly by
+    tests, bots and simulations. RoguelikeApp is a view over it. Set
+    action_log to an ActionLog (see game/replay.py) to record every step,
+    and enable timer to time the phases of each step. step_count counts
+    the steps taken since the game began, which is the number of records
+    in its action log.
+    """
+    
+    def __init__(self, width: int = 80, height: int = 40, prefetch: bool = False,
+                 horde: bool = False, seed: Optional[int] = None,
+                 level_cache: Optional[LevelCache] = None):
+        """Initialize a new game session.
+        
+        Args:
+            width: Width of generated maps
+            height: Height of generated maps
+            prefetch: Whether to pre-generate the next level in a worker thread
+            horde: Whether to fill levels with a horde scaled to the map size
+            seed: Seed every level and combat roll derives from, random if None
+            level_cache: Cache of compiled levels to load levels from
+        """
+        self.width = width
+        self.height = height
+        self.horde = horde
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.level_cache = level_cache
+        self.level_prefetcher: Optional[LevelPrefetcher] = (
+            LevelPrefetcher(level_cache) if prefetch else None
+        )
+        self.action_log = None
+        self.timer = PhaseTimer()
+        self.step_count = 0
+        self.reset()
+    
+    @classmethod
+    def restore(cls, level: Level, player: Player, game_state: GameState,
+                combat_system: CombatSystem, width: int, height: int,
+                horde: bool, seed: int, step_count: int = 0, prefetch: bool = False,
+                level_cache: Optional[LevelCache] = None) -> 'GameSession':
+        """Rebuild a session around saved game state instead of a new game.
+        
+        Args:
+            level: Current level, with its monsters and items in play
+            player: Player with their stats and inventory
+            game_state: Level, score and win/lose flags
+            combat_system: Combat system holding the saved random stream
+            width: Width of generated maps
+            height: Height of generated maps
+            horde: Whether levels are filled with a horde
+            seed: Seed of the game
+            step_count: Steps taken before the game was saved
+            prefetch: Whether to pre-generate the next level in a worker thread
+            level_cache: Cache of compiled levels to load levels from
+        
+        Returns:
+            Session that continues the saved game
+        """
+        session = cls.__new__(cls)
+        session.width = width
+        session.height = height
+        session.horde = horde
+        session.seed = seed
+        session.level_cache = level_cache
+        session.level_prefetcher = LevelPrefetcher(level_cache) if prefetch else None
+        session.action_log = None
+        session.timer = PhaseTimer()
+        session.step_count = step_count
+        session.combat_system = combat_system
+        session.game_state = game_state
+        session.player = player
+        
+        session._load_level(level)
+        session._prefetch_next_level()
+        return session
+    
+    def reset(self):
+        """Start a new game from the first level."""
+        self.combat_system = CombatSystem(subsystem_rng(self.seed, 0, 'combat'))
+        self.game_state = GameState()
+        
+        self._load_level(self._build_level(self.game_state.current_level))
+        start_x, start_y = self.game_map.player_start
+        self.player = Player(start_x, start_y)
+        
+        self._prefetch_next_level()
+    
+    def shutdown(self):
+        """Stop background level generation."""
+        if self.level_prefetcher:
+            self.level_prefetcher.shutdown()
+    
+    def step(self, action: Action) -> List[GameEvent]:
+        """Perform one player action and let the world respond.
+        
+        Args:
+            action: Action to perform
+        
+        Returns:
+            List of events that happened during the step
+        """
+        timer = self.timer
+        step_start = timer.start()
+        
+        if action in MOVE_DELTAS:
+            dx, dy = MOVE_DELTAS[action]
+            events = self._try_move(dx, dy)
+        elif action == Action.USE_POTION or action == Action.USE_ITEM:
+            events = self._use_item(ItemType.HEALTH_POTION, "No health potions available!")
+        elif action == Action.USE_SCROLL:
+            events = self._use_item(ItemType.MAGIC_SCROLL, "No magic scrolls available!")
+        else:
+            events = self.restart_level()
+        
+        fov_start = timer.start()
+        self.game_map.update_fov(self.player.x, self.player.y)
+        timer.stop('update_fov', fov_start)
+        
+        self.step_count += 1
+        if self.action_log is not None:
+            self.action_log.record(self, action)
+        timer.stop('step', step_start)
+        return events
+    
+    def restart_level(self) -> List[GameEvent]:
+        """Rebuild the current level from its seed and restore the player's health.
+        
+        Returns:
+            List of events describing the restart
+        """
+        current_level = self.game_state.current_level
+        
+        self._load_level(self._build_level(current_level))
+        
+        start_x, start_y = self.game_map.player_start
+        self.player.x = start_x
+        self.player.y = start_y
+        self.player.hp = self.player.max_hp
+        
+        self.game_state.game_over = False
+        self.game_state.victory = False
+        
+        message = f"Level {current_level} restarted!"
+        self.combat_system.clear_log()
+        self.combat_system.combat_log.append(message)
+        
+        return [GameEvent(EventType.LEVEL_RESTARTED, message)]
+    
+    def _try_move(self, dx: int, dy: int) -> List[GameEvent]:
+        """Try to move the player or attack if there's a monster.
+        
+        Args:
+            dx: Change in X coordinate
+            dy: Change in Y coordinate
+        
+        Returns:
+            List of events from the move and the monster turn
+        """
+        if self.game_state.game_over:
+            return []
+        
+        events = []
+        new_x = self.player.x + dx
+        new_y = self.player.y + dy
+        
+        target_monster = self.monster_manager.get_monster_at(new_x, new_y)
+        
+        if target_monster and target_monster.is_alive:
+            for message in self.combat_system.player_attack_monster(
+                self.player, target_monster
+            ):
+                events.append(GameEvent(EventType.ATTACKED, message))
+            self.monster_manager.make_noise(new_x, new_y, self.combat_system.NOISE_RADIUS)
+            if not target_monster.is_alive:
+                self.monster_manager.remove_monster(target_monster)
+                events.append(GameEvent(EventType.MONSTER_KILLED, target_monster.name))
+            
+            events.extend(self._process_turn())
+        
+        elif self.player.move(dx, dy, self.game_map.tiles):
+            events.append(GameEvent(EventType.MOVED))
+            
+            item = self.item_manager.collect_item(self.player.x, self.player.y)
+            if item:
+                pickup_message = self.player.inventory.add_item(item)
+                self.combat_system.combat_log.append(pickup_message)
+                events.append(GameEvent(EventType.ITEM_PICKED_UP, pickup_message))
+            
+            if self.game_state.check_victory_condition(
+                self.player.x, self.player.y, self.game_map.tiles
+            ):
+                events.extend(self._advance_to_next_level())
+                return events
+            
+            events.extend(self._process_turn())
+        
+        else:
+            events.append(GameEvent(EventType.BLOCKED))
+        
+        if self.game_state.check_defeat_condition(self.player):
+            events.append(GameEvent(EventType.PLAYER_DIED, "You have died!"))
+        
+        return events
+    
+    def _process_turn(self) -> List[GameEvent]:
+        """Let the monsters act after the player.
+        
+        Returns:
+            List of monster turn events
+        """
+        start = self.timer.start()
+        turn_messages = self.combat_system.process_turn(
+            self.player, self.monster_manager, self.game_map.tiles,
+            self.game_map.visibility_tracker
+        )
+        self.timer.stop('process_turn', start)
+        return [GameEvent(EventType.MONSTER_TURN, message) for message in turn_messages]
+    
+    def _use_item(self, item_type: ItemType, missing_message: str) -> List[GameEvent]:
+        """Use an item from the player's inventory.
+        
+        Args:
+            item_type: Type of item to use
+            missing_message: Message logged when no such item is available
+        
+        Returns:
+            List with the item event
+        """
+        result = self.player.inventory.use_item(item_type, self.player,
+                                                self.combat_system.rng)
+        if result:
+            self.combat_system.combat_log.append(result)
+            return [GameEvent(EventType.ITEM_USED, result)]
+        
+        self.combat_system.combat_log.append(missing_message)
+        return [GameEvent(EventType.NO_ITEM, missing_message)]
+    
+    def _advance_to_next_level(self) -> List[GameEvent]:
+        """Advance to the next dungeon level.
+        
+        Returns:
+            List with the level advance event
+        """
+        self.game_state.advance_level()
+        
+        if self.level_prefetcher:
+            level = self.level_prefetcher.take(
+                self.game_state.current_level,
+                self._monster_count(self.game_state.current_level),
+                self.game_state.get_item_count_for_level(),
+                self.width, self.height, self.horde, self.seed,
+            )
+        else:
+            level = self._build_level(self.game_state.current_level)
+        self._load_level(level)
+        
+        start_x, start_y = self.game_map.player_start
+        self.player.x = start_x
+        self.player.y = start_y
+        
+        message = f"Welcome to level {self.game_state.current_level}!"
+        self.combat_system.combat_log.append(message)
+        self.combat_system.combat_log.append("The dungeon grows more dangerous...")
+        
+        self._prefetch_next_level()
+        
+        return [GameEvent(EventType.LEVEL_ADVANCED, message)]
+    
+    def _build_level(self, number: int) -> Level:
+        """Build a level synchronously.
+        
+        Args:
+            number: Dungeon level number
+        
+        Returns:
+            The built level
+        """
+        return build_level(
+            number,
+            self._monster_count(number),
+            self.game_state.get_item_count_for_level(number),
+            self.width, self.height, self.horde, self.seed,
+            self.level_cache,
+        )
+    
+    def _monster_count(self, number: int) -> int:
+        """Get the number of monsters to spawn on a level.
+        
+        Args:
+            number: Dungeon level number
+        
+        Returns:
+            Number of monsters to spawn
+        """
+        if self.horde:
+            return horde_size(self.width, self.height)
+        return self.game_state.get_monster_count_for_level(number)
+    
+    def _load_level(self, level: Level):
+        """Make a built level the current one.
+        
+        Args:
+            level: Level to switch to
+        """
+        self.game_map = level.game_map
+        self.monster_manager = level.monster_manager
+        self.item_manager = level.item_manager
+    
+    def _prefetch_next_level(self):
+        """Start generating the level below the current one in the background."""
+        if not self.level_prefetcher:
+            return
+        
+        next_level = self.game_state.current_level + 1
+        self.level_prefetcher.prefetch(
+            next_level,
+            self._monster_count(next_level),
+            self.game_state.get_item_count_for_level(next_level),
+            self.width, self.height, self.horde, self.seed,
+        )
@@ -0,0 +1,196 @@
+"""Observation planes of a batch of games kept in shared memory."""
+
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+
+# Name and typecode of each per-cell plane, in layout order
+PLANES = (
+    ('tiles', 'B'),
+    ('visible', 'B'),
+    ('explored', 'B'),
+    ('entities', 'B'),
+    ('hp', 'H'),
+)
+
+ITEM_SIZES = {'B': 1, 'H': 2, 'i': 4}
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to a multiple of 8 bytes."""
+    return (offset + 7) & ~7
+
+
+class ObservationLayout:
+    """Byte layout of the observation planes of one game.
+    
+    Each game owns a fixed-size slot holding one plane per entry in
+    PLANES, row-major with width * height cells, followed by the stats
+    as 32-bit integers. Slots are laid out back to back, so plane p of
+    game i starts at i * slot_size + offsets[p].
+    """
+    
+    def __init__(self, width: int, height: int, stat_count: int):
+        """Compute the layout.
+        
+        Args:
+            width: Width of the maps
+            height: Height of the maps
+            stat_count: Number of stats stored after the planes
+        """
+        self.width = width
+        self.height = height
+        self.stat_count = stat_count
+        self.offsets: Dict[str, int] = {}
+        self.typecodes: Dict[str, str] = {}
+        
+        offset = 0
+        for name, typecode in PLANES:
+            self.offsets[name] = offset
+            self.typecodes[name] = typecode
+            offset = _align(offset + width * height * ITEM_SIZES[typecode])
+        self.offsets['stats'] = offset
+        self.typecodes['stats'] = 'i'
+        self.slot_size = _align(offset + stat_count * ITEM_SIZES['i'])
+    
+    def length(self, name: str) -> int:
+        """Number of values in a plane or the stats."""
+        return self.stat_count if name == 'stats' else self.width * self.height
+
+
+class ObservationSlot:
+    """Writable views of one game's planes inside a shared block.
+    
+    The slot also remembers what was drawn last, so a writer can undo
+    it without clearing whole planes.
+    """
+    
+    def __init__(self, buffer: memoryview, layout: ObservationLayout, index: int):
+        """Create the views.
+        
+        Args:
+            buffer: Buffer of the whole shared block
+            layout: Layout of each slot
+            index: Number of the game owning the slot
+        """
+        base = index * layout.slot_size
+        for name in layout.offsets:
+            start = base + layout.offsets[name]
+            size = layout.length(name) * ITEM_SIZES[layout.typecodes[name]]
+            setattr(self, name, buffer[start:start + size].cast(layout.typecodes[name]))
+        self.source = None
+        self.marked: List[int] = []
+    
+    def release(self):
+        """Release the views so the shared block can be closed."""
+        for name, _ in PLANES + (('stats', 'i'),):
+            getattr(self, name).release()
+        self.source = None
+
+
+class SharedObservations:
+    """Observation planes of a batch of games in one shared memory block.
+    
+    The process running the games writes each game's planes straight
+    into its slot and the driver reads them in place, so no observation
+    is pickled or sent through a pipe however large the maps are.
+    """
+    
+    def __init__(self, num_envs: int, width: int, height: int, stat_count: int,
+                 name: Optional[str] = None):
+        """Create a new block, or attach to an existing one.
+        
+        Args:
+            num_envs: Number of games in the batch
+            width: Width of the maps
+            height: Height of the maps
+            stat_count: Number of stats per game
+            name: Name of an existing block to attach to, None to create one
+        """
+        self.num_envs = num_envs
+        self.layout = ObservationLayout(width, height, stat_count)
+        self.owner = name is None
+        size = max(1, num_envs * self.layout.slot_size)
+        
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Worker processes share the creator's resource tracker, which
+            # frees the block once when the creator unlinks it
+            self.shm = shared_memory.SharedMemory(name=name)
+        
+        self.name = self.shm.name
+        self._slots: Dict[int, ObservationSlot] = {}
+    
+    def slot(self, index: int) -> ObservationSlot:
+        """Get the writable views of one game.
+        
+        Args:
+            index: Number of the game
+        
+        Returns:
+            The game's slot
+        """
+        slot = self._slots.get(index)
+        if slot is None:
+            slot = self._slots[index] = ObservationSlot(self.shm.buf, self.layout, index)
+        return slot
+    
+    def plane(self, index: int, name: str) -> memoryview:
+        """Read one plane of one game without copying.
+        
+        Args:
+            index: Number of the game
+            name: Name of a plane in PLANES, or 'stats'
+        
+        Returns:
+            Flat view of the plane, row-major, valid until close()
+        """
+        return getattr(self.slot(index), name)
+    
+    def as_numpy(self, name: str):
+        """View one plane of every game as a NumPy array without copying.
+        
+        Args:
+            name: Name of a plane in PLANES, or 'stats'
+        
+        Returns:
+            Array of shape (num_envs, height, width), or (num_envs,
+            stat_count) for the stats, valid until close()
+        
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("as_numpy() needs NumPy, use plane() without it") from None
+        
+        layout = self.layout
+        dtype = numpy.dtype(layout.typecodes[name])
+        if name == 'stats':
+            shape: Tuple[int, ...] = (self.num_envs, layout.stat_count)
+            strides: Tuple[int, ...] = (layout.slot_size, dtype.itemsize)
+        else:
+            shape = (self.num_envs, layout.height, layout.width)
+            strides = (layout.slot_size, layout.width * dtype.itemsize, dtype.itemsize)
+        return numpy.ndarray(shape, dtype, buffer=self.shm.buf,
+                             offset=layout.offsets[name], strides=strides)
+    
+    def close(self):
+        """Detach from the block, and free it if this process created it.
+        
+        Views from plane() and as_numpy() should be dropped first. While
+        one is still held the mapping cannot be closed, so it is left to
+        be unmapped when the last view goes away, and the block is only
+        unlinked.
+        """
+        for slot in self._slots.values():
+            slot.release()
+        self._slots.clear()
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            self.shm.unlink()
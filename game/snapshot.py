@@ -0,0 +1,326 @@
+"""Versioned binary snapshots for saving and resuming games."""
+
+import mmap
+import os
+import random
+import struct
+import tempfile
+import zlib
+from typing import List, Optional
+
+from .combat import CombatSystem, GameState
+from .game_map import GameMap
+from .horde import MonsterStore
+from .items import Item, ItemManager, ItemType
+from .level import Level
+from .level_cache import LevelCache
+from .monster import MonsterManager, MonsterType
+from .packing import MAX_EXPANSION, Reader, check, on_map, pack_array
+from .player import Player
+from .session import GameSession
+from .tiles import Tile, TileGrid
+
+
+MAGIC = b'TVSV'
+# Bump when the layout below changes
+VERSION = 1
+
+SUFFIX = ".tvs"
+
+FLAG_ZLIB = 1
+COMPRESS_LEVEL = 1
+
+# Only the tail of the combat log is kept, so saves do not grow with play
+LOG_LINES = 50
+
+MONSTER_KINDS = list(MonsterType)
+ITEM_KINDS = list(ItemType)
+
+# Magic, version, flags and payload size before compression
+_HEADER = struct.Struct('<4sHHI')
+# Map size, level, score, seed, turn count, step count, horde, game over
+# and victory flags, player start and exit
+_GAME = struct.Struct('<IIIqQIQBBBxiiii')
+# Position, hp, max hp, attack power, gold and number of item stacks
+_PLAYER = struct.Struct('<iiiiiiI')
+_STACK = struct.Struct('<Bi')
+# Random state version, whether a gauss value is cached, the value and
+# the length of the state tuple
+_RNG = struct.Struct('<BBdI')
+# Scheduler clock, monsters, queued monsters, items and log lines
+_COUNTS = struct.Struct('<qIIII')
+
+
+def default_data_dir() -> str:
+    """Get the directory saved games and action logs are kept in.
+    
+    Returns:
+        Path under XDG_DATA_HOME, or ~/.local/share when it is not set
+    """
+    base = (os.environ.get("XDG_DATA_HOME") or
+            os.path.join(os.path.expanduser("~"), ".local", "share"))
+    return os.path.join(base, "terminus-veil")
+
+
+def default_save_path() -> str:
+    """Get the file the game is saved to when quitting.
+    
+    Returns:
+        Path in default_data_dir()
+    """
+    return os.path.join(default_data_dir(), "save" + SUFFIX)
+
+
+def encode_snapshot(session: GameSession) -> bytes:
+    """Serialize the state of a game session, uncompressed.
+    
+    The payload is a run of fixed-size struct records followed by the
+    map planes and one packed array per monster and item field, so its
+    size and the time to build it grow linearly with the map and the
+    number of entities.
+    
+    Args:
+        session: Session to serialize
+    
+    Returns:
+        Snapshot payload, without the header
+    """
+    game_map = session.game_map
+    game_state = session.game_state
+    combat_system = session.combat_system
+    player = session.player
+    inventory = player.inventory
+    
+    chunks: List[bytes] = [
+        _GAME.pack(game_map.width, game_map.height, game_state.current_level,
+                   game_state.score, session.seed, combat_system.turn_count,
+                   session.step_count, session.horde, game_state.game_over, game_state.victory,
+                   *game_map.player_start, *game_map.exit_pos),
+        _PLAYER.pack(player.x, player.y, player.hp, player.max_hp,
+                     player.attack_power, inventory.gold, len(inventory.items)),
+    ]
+    for item_type, count in inventory.items.items():
+        chunks.append(_STACK.pack(ITEM_KINDS.index(item_type), count))
+    
+    rng_version, rng_state, gauss_next = combat_system.rng.getstate()
+    chunks.append(_RNG.pack(rng_version, gauss_next is not None, gauss_next or 0.0,
+                            len(rng_state)))
+    chunks.append(pack_array('I', rng_state))
+    
+    monster_manager = session.monster_manager
+    scheduler = monster_manager.scheduler
+    monsters = [monster for monster in monster_manager.monsters if monster.is_alive]
+    rows = {monster: row for row, monster in enumerate(monsters)}
+    queue = [(time, rows[actor]) for time, actor in scheduler.pending() if actor in rows]
+    items = [item for item in session.item_manager.items if not item.is_collected]
+    log = [line.encode('utf-8') for line in combat_system.combat_log[-LOG_LINES:]]
+    
+    chunks.append(_COUNTS.pack(scheduler.now, len(monsters), len(queue), len(items), len(log)))
+    chunks.append(bytes(game_map.tiles.cells))
+    chunks.append(bytes(game_map.visibility_tracker.explored_mask))
+    
+    for field in ('x', 'y', 'hp', 'max_hp', 'attack_power'):
+        chunks.append(pack_array('i', [getattr(monster, field) for monster in monsters]))
+    chunks.append(bytes(MONSTER_KINDS.index(monster.monster_type) for monster in monsters))
+    alerted = monster_manager._alerted
+    chunks.append(bytes(monster in alerted for monster in monsters))
+    chunks.append(pack_array('I', [row for _, row in queue]))
+    chunks.append(pack_array('q', [time for time, _ in queue]))
+    
+    for field in ('x', 'y', 'value'):
+        chunks.append(pack_array('i', [getattr(item, field) for item in items]))
+    chunks.append(bytes(ITEM_KINDS.index(item.item_type) for item in items))
+    
+    chunks.append(pack_array('I', [len(line) for line in log]))
+    chunks.extend(log)
+    return b''.join(chunks)
+
+
+def decode_snapshot(payload, prefetch: bool = False,
+                    level_cache: Optional[LevelCache] = None) -> GameSession:
+    """Rebuild a game session from a snapshot payload.
+    
+    Args:
+        payload: Bytes-like payload built by encode_snapshot()
+        prefetch: Whether the session pre-generates the next level
+        level_cache: Cache of compiled levels for the session
+    
+    Returns:
+        Session that continues the saved game
+    
+    Raises:
+        ValueError: If the payload is truncated or holds values out of range
+    """
+    reader = Reader(payload)
+    try:
+        (width, height, level_number, score, seed, turn_count, step_count, horde,
+         game_over, victory, start_x, start_y, exit_x, exit_y) = reader.unpack(_GAME)
+        x, y, hp, max_hp, attack_power, gold, stack_count = reader.unpack(_PLAYER)
+        stacks = [reader.unpack(_STACK) for _ in range(stack_count)]
+        rng_version, has_gauss, gauss_next, state_length = reader.unpack(_RNG)
+        rng_state = reader.array('I', state_length)
+        now, monster_count, queue_count, item_count, log_count = reader.unpack(_COUNTS)
+    except struct.error:
+        raise ValueError("snapshot is truncated") from None
+    
+    # The tile and explored planes follow, so the map size is checked
+    # against the payload before anything is allocated for it
+    size = width * height
+    check(0 < size and 2 * size <= reader.remaining)
+    check(on_map((x, start_x, exit_x), (y, start_y, exit_y), width, height))
+    check(all(kind < len(ITEM_KINDS) for kind, _ in stacks))
+    
+    tiles = TileGrid(width, height)
+    tiles.cells[:] = reader.bytes(size)
+    check(max(tiles.cells) <= max(Tile))
+    game_map = GameMap.from_compiled(tiles, None, (start_x, start_y), (exit_x, exit_y))
+    game_map.visibility_tracker.explored_mask[:] = reader.bytes(size)
+    check(max(game_map.visibility_tracker.explored_mask) <= 1)
+    
+    monster_manager = MonsterManager(MonsterStore() if horde else None)
+    columns = [reader.array('i', monster_count) for _ in range(5)]
+    kinds = reader.bytes(monster_count)
+    alerted = reader.bytes(monster_count)
+    check(on_map(columns[0], columns[1], width, height))
+    check(max(kinds, default=0) < len(MONSTER_KINDS))
+    monsters = []
+    for row, (mx, my, mhp, mmax_hp, mattack) in enumerate(zip(*columns)):
+        monster = monster_manager.create_monster(mx, my, MONSTER_KINDS[kinds[row]])
+        monster.hp = mhp
+        monster.max_hp = mmax_hp
+        monster.attack_power = mattack
+        monster_manager.add_monster(monster)
+        game_map.floor_index.reserve(mx, my)
+        if alerted[row]:
+            monster_manager._alerted.add(monster)
+        monsters.append(monster)
+    
+    # Queued monsters are scheduled in the order they were due to act, so
+    # ties between equal times break the same way as before saving
+    scheduler = monster_manager.scheduler
+    scheduler.now = now
+    queue_rows = reader.array('I', queue_count)
+    queue_times = reader.array('q', queue_count)
+    check(all(row < monster_count for row in queue_rows))
+    for row, time in zip(queue_rows, queue_times):
+        scheduler.schedule(monsters[row], time - now)
+    
+    item_manager = ItemManager()
+    columns = [reader.array('i', item_count) for _ in range(3)]
+    kinds = reader.bytes(item_count)
+    check(on_map(columns[0], columns[1], width, height))
+    check(max(kinds, default=0) < len(ITEM_KINDS))
+    for row, (ix, iy, value) in enumerate(zip(*columns)):
+        item_manager.add_item(Item(ix, iy, ITEM_KINDS[kinds[row]], value))
+        game_map.floor_index.reserve(ix, iy)
+    
+    lengths = reader.array('I', log_count)
+    combat_system = CombatSystem(random.Random())
+    combat_system.rng.setstate((rng_version, tuple(rng_state),
+                                gauss_next if has_gauss else None))
+    combat_system.turn_count = turn_count
+    combat_system.combat_log = [reader.bytes(length).decode('utf-8') for length in lengths]
+    
+    game_state = GameState()
+    game_state.current_level = level_number
+    game_state.score = score
+    game_state.game_over = bool(game_over)
+    game_state.victory = bool(victory)
+    
+    player = Player(x, y)
+    player.hp = hp
+    player.max_hp = max_hp
+    player.attack_power = attack_power
+    player.inventory.gold = gold
+    for kind, count in stacks:
+        player.inventory.items[ITEM_KINDS[kind]] = count
+    
+    game_map.update_fov(x, y)
+    
+    level = Level(level_number, game_map, monster_manager, item_manager)
+    return GameSession.restore(level, player, game_state, combat_system,
+                               width, height, bool(horde), seed, step_count,
+                               prefetch, level_cache)
+
+
+def save_snapshot(session: GameSession, path: str, compress: bool = True):
+    """Write a snapshot of a game session to a file.
+    
+    The file is written to a temporary name and renamed into place, so
+    an interrupted save never replaces a good snapshot with a partial one.
+    
+    Args:
+        session: Session to save
+        path: File to write
+        compress: Whether to compress the payload with zlib
+    """
+    payload = encode_snapshot(session)
+    flags = 0
+    body = payload
+    if compress:
+        flags |= FLAG_ZLIB
+        body = zlib.compress(payload, COMPRESS_LEVEL)
+    
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            temp_file.write(_HEADER.pack(MAGIC, VERSION, flags, len(payload)))
+            temp_file.write(body)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_snapshot(path: str, prefetch: bool = False,
+                  level_cache: Optional[LevelCache] = None) -> GameSession:
+    """Resume a game session from a snapshot file.
+    
+    The file is memory-mapped, so an uncompressed snapshot is decoded
+    straight from the page cache without reading it into a buffer first.
+    
+    Args:
+        path: File written by save_snapshot()
+        prefetch: Whether the session pre-generates the next level
+        level_cache: Cache of compiled levels for the session
+    
+    Returns:
+        Session that continues the saved game
+    
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a snapshot of this version
+    """
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size < _HEADER.size:
+            raise ValueError(f"{path} is not a snapshot")
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, flags, size = _HEADER.unpack_from(mapped)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a snapshot")
+            if version != VERSION:
+                raise ValueError(f"{path} is a version {version} snapshot, "
+                                 f"expected version {VERSION}")
+            
+            if flags & FLAG_ZLIB:
+                if size > (len(mapped) - _HEADER.size) * MAX_EXPANSION:
+                    raise ValueError(f"{path} is corrupt")
+                try:
+                    payload = zlib.decompress(mapped[_HEADER.size:], bufsize=size)
+                except zlib.error:
+                    raise ValueError(f"{path} is corrupt") from None
+                return decode_snapshot(payload, prefetch, level_cache)
+            
+            # Views of the map must be released before it can be closed
+            view = memoryview(mapped)
+            payload = view[_HEADER.size:]
+            try:
+                return decode_snapshot(payload, prefetch, level_cache)
+            finally:
+                payload.release()
+                view.release()
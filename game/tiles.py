@@ -0,0 +1,245 @@
+"""Compact tile grid used to represent dungeon maps."""
+
+from enum import IntEnum
+from itertools import compress
+from typing import Iterable, List, Sequence, Tuple
+
+
+class Tile(IntEnum):
+    """Tile codes stored in a TileGrid, one byte per cell."""
+    WALL = 0
+    FLOOR = 1
+    EXIT = 2
+
+
+TILE_CHARS = {
+    Tile.WALL: '#',
+    Tile.FLOOR: '.',
+    Tile.EXIT: '>',
+}
+
+CHAR_TILES = {char: tile for tile, char in TILE_CHARS.items()}
+
+
+def _lookup_table(tiles: Iterable[Tile]) -> bytes:
+    """Build a 256-entry table that maps the given tile codes to 1.
+    
+    Args:
+        tiles: Tile codes that should map to 1
+    
+    Returns:
+        Lookup table usable with indexing and bytes.translate
+    """
+    table = bytearray(256)
+    for tile in tiles:
+        table[tile] = 1
+    return bytes(table)
+
+
+WALKABLE = _lookup_table((Tile.FLOOR, Tile.EXIT))
+OPAQUE = _lookup_table((Tile.WALL,))
+
+
+class TileGrid:
+    """A width x height grid of tile codes backed by a single bytearray.
+    
+    Cells are stored row by row, so the cell at (x, y) lives at index
+    y * width + x. Rows and columns can be carved with slice assignment
+    and whole-map masks can be built with bytes.translate.
+    """
+    
+    def __init__(self, width: int, height: int, fill: Tile = Tile.WALL):
+        """Initialize a tile grid.
+        
+        Args:
+            width: Width of the grid
+            height: Height of the grid
+            fill: Tile every cell starts as
+        """
+        self.width = width
+        self.height = height
+        self.cells = bytearray([fill]) * (width * height)
+    
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[str]]) -> 'TileGrid':
+        """Build a grid from rows of tile characters.
+        
+        Args:
+            rows: Rows of characters such as '#', '.' and '>'
+        
+        Returns:
+            Tile grid with the same contents
+        """
+        height = len(rows)
+        width = len(rows[0]) if rows else 0
+        grid = cls(width, height)
+        grid.cells = bytearray(CHAR_TILES[char] for row in rows for char in row)
+        return grid
+    
+    def to_rows(self) -> List[List[str]]:
+        """Convert the grid into rows of tile characters.
+        
+        Returns:
+            2D list of characters representing the grid
+        """
+        chars = [TILE_CHARS.get(code, '#') for code in self.cells]
+        width = self.width
+        return [chars[y * width:(y + 1) * width] for y in range(self.height)]
+    
+    def copy(self) -> 'TileGrid':
+        """Create an independent copy of the grid.
+        
+        Returns:
+            Copy of this grid
+        """
+        grid = TileGrid(self.width, self.height)
+        grid.cells = bytearray(self.cells)
+        return grid
+    
+    def in_bounds(self, x: int, y: int) -> bool:
+        """Check if a position lies inside the grid.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        
+        Returns:
+            True if the position is inside the grid
+        """
+        return 0 <= x < self.width and 0 <= y < self.height
+    
+    def get(self, x: int, y: int) -> int:
+        """Get the tile code at a position.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        
+        Returns:
+            Tile code, or Tile.WALL outside the grid
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.cells[y * self.width + x]
+        return Tile.WALL
+    
+    def set(self, x: int, y: int, tile: Tile):
+        """Set the tile code at a position inside the grid.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+            tile: Tile code to store
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.cells[y * self.width + x] = tile
+    
+    def is_walkable(self, x: int, y: int) -> bool:
+        """Check if a position can be walked on.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        
+        Returns:
+            True if the position is inside the grid and walkable
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return WALKABLE[self.cells[y * self.width + x]] == 1
+        return False
+    
+    def is_opaque(self, x: int, y: int) -> bool:
+        """Check if a position blocks line of sight.
+        
+        Args:
+            x: X coordinate
+            y: Y coordinate
+        
+        Returns:
+            True if the position is outside the grid or opaque
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return OPAQUE[self.cells[y * self.width + x]] == 1
+        return True
+    
+    def fill_rect(self, x: int, y: int, width: int, height: int, tile: Tile):
+        """Fill a rectangle with a tile, clipped to the grid.
+        
+        Args:
+            x, y: Top-left corner of the rectangle
+            width, height: Dimensions of the rectangle
+            tile: Tile code to fill with
+        """
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(self.width, x + width), min(self.height, y + height)
+        if x1 >= x2 or y1 >= y2:
+            return
+        
+        run = bytes([tile]) * (x2 - x1)
+        cells = self.cells
+        for row in range(y1, y2):
+            start = row * self.width + x1
+            cells[start:start + len(run)] = run
+    
+    def hline(self, x1: int, x2: int, y: int, tile: Tile):
+        """Fill a horizontal line between two columns, inclusive.
+        
+        Args:
+            x1, x2: End columns of the line
+            y: Row of the line
+            tile: Tile code to fill with
+        """
+        if x1 > x2:
+            x1, x2 = x2, x1
+        self.fill_rect(x1, y, x2 - x1 + 1, 1, tile)
+    
+    def vline(self, x: int, y1: int, y2: int, tile: Tile):
+        """Fill a vertical line between two rows, inclusive.
+        
+        Args:
+            x: Column of the line
+            y1, y2: End rows of the line
+            tile: Tile code to fill with
+        """
+        if y1 > y2:
+            y1, y2 = y2, y1
+        y1, y2 = max(0, y1), min(self.height - 1, y2)
+        if not (0 <= x < self.width) or y1 > y2:
+            return
+        
+        width = self.width
+        self.cells[y1 * width + x:y2 * width + x + 1:width] = bytes([tile]) * (y2 - y1 + 1)
+    
+    def positions_of(self, tile: Tile) -> List[Tuple[int, int]]:
+        """Find every position holding a tile code.
+        
+        Args:
+            tile: Tile code to look for
+        
+        Returns:
+            List of (x, y) tuples in row-major order
+        """
+        width = self.width
+        return [(index % width, index // width) for index in self.indices_of(tile)]
+    
+    def indices_of(self, tile: Tile) -> List[int]:
+        """Find the cell index of every position holding a tile code.
+        
+        Args:
+            tile: Tile code to look for
+        
+        Returns:
+            List of y * width + x indices in ascending order
+        """
+        cells = self.cells
+        return list(compress(range(len(cells)), cells.translate(_lookup_table((tile,)))))
+    
+    def mask(self, table: bytes) -> bytearray:
+        """Map every cell through a 256-entry lookup table.
+        
+        Args:
+            table: Lookup table such as WALKABLE or OPAQUE
+        
+        Returns:
+            One byte per cell holding the table value
+        """
+        return self.cells.translate(table)
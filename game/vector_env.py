@@ -0,0 +1,263 @@
+"""Runs many RoguelikeEnv games in parallel worker processes."""
+
+import multiprocessing
+import os
+import traceback
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .env import STAT_NAMES, Observation, RoguelikeEnv
+from .shared_obs import SharedObservations
+
+
+def _run_envs(envs: List[RoguelikeEnv], command: str, payload) -> Any:
+    """Apply one command to a group of environments.
+    
+    Environments writing into shared planes report None in place of
+    their observation, so nothing but the step results is sent back.
+    
+    Args:
+        envs: Environments to drive
+        command: 'reset' or 'step'
+        payload: Seeds for 'reset', actions for 'step'
+    
+    Returns:
+        List of observations for 'reset', list of step results for 'step'
+    """
+    if command == 'reset':
+        return [_strip(env, env.reset(seed)) for env, seed in zip(envs, payload)]
+    
+    results = []
+    for env, action in zip(envs, payload):
+        observation, reward, done, info = env.step(action)
+        if done:
+            # Finished games start over at once, like Gym's vector envs
+            if env.slot is None:
+                info['final_observation'] = observation
+            else:
+                info['final_stats'] = env.stats()
+            observation = env.reset()
+        results.append((_strip(env, observation), reward, done, info))
+    return results
+
+
+def _strip(env: RoguelikeEnv, observation):
+    """Drop observations that already live in shared planes."""
+    return None if env.slot is not None else observation
+
+
+def _worker(connection, count: int, env_kwargs: Dict[str, Any],
+            shared: Optional[Tuple[str, int, int]] = None):
+    """Serve commands for a group of environments until told to close.
+    
+    Args:
+        connection: Pipe end to the VectorEnv
+        count: Number of environments to run
+        env_kwargs: Keyword arguments for RoguelikeEnv
+        shared: Name of the shared planes block, the total number of
+            games in it and the number of this group's first game
+    """
+    envs = [RoguelikeEnv(**env_kwargs) for _ in range(count)]
+    observations = None
+    if shared is not None:
+        name, num_envs, first = shared
+        observations = SharedObservations(num_envs, envs[0].width, envs[0].height,
+                                          len(STAT_NAMES), name)
+        for offset, env in enumerate(envs):
+            env.slot = observations.slot(first + offset)
+    try:
+        while True:
+            command, payload = connection.recv()
+            if command == 'close':
+                break
+            try:
+                connection.send(('ok', _run_envs(envs, command, payload)))
+            except Exception:
+                connection.send(('error', traceback.format_exc()))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for env in envs:
+            env.close()
+        if observations is not None:
+            observations.close()
+        connection.close()
+
+
+class VectorEnv:
+    """A batch of RoguelikeEnv games stepped together.
+    
+    The games are split into contiguous groups, one per worker process,
+    and each step costs one message each way per worker rather than per
+    game. Games that end are reset automatically; the last observation
+    of the finished game is kept in info['final_observation'].
+    
+    With shared_memory=True the workers write observations into planes
+    of a SharedObservations block instead (see game/shared_obs.py).
+    reset() and step() then return that block in place of the list of
+    observations, only rewards, flags and infos go through the pipes,
+    and info['final_stats'] replaces info['final_observation']. The
+    planes are overwritten by the next call.
+    """
+    
+    def __init__(self, num_envs: int, processes: Optional[int] = None,
+                 shared_memory: bool = False,
+                 context: Optional[multiprocessing.context.BaseContext] = None,
+                 **env_kwargs):
+        """Start the worker processes.
+        
+        Args:
+            num_envs: Number of games to run
+            processes: Number of worker processes, defaults to the CPU count.
+                0 runs every game in the calling process.
+            shared_memory: Whether to return observations in shared planes
+            context: Multiprocessing context to start the workers with,
+                defaults to the platform's start method
+            **env_kwargs: Keyword arguments for each RoguelikeEnv
+        """
+        self.num_envs = num_envs
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = min(processes, num_envs)
+        
+        self.observations: Optional[SharedObservations] = None
+        if shared_memory:
+            # Falls back to RoguelikeEnv's default map size
+            width = env_kwargs.get('width', 80)
+            height = env_kwargs.get('height', 40)
+            self.observations = SharedObservations(num_envs, width, height,
+                                                   len(STAT_NAMES))
+        
+        self.closed = False
+        self._local: Optional[List[RoguelikeEnv]] = None
+        self._connections = []
+        self._processes = []
+        self._groups: List[Tuple[int, int]] = []
+        
+        if processes <= 0:
+            self._local = [RoguelikeEnv(**env_kwargs) for _ in range(num_envs)]
+            if self.observations is not None:
+                for index, env in enumerate(self._local):
+                    env.slot = self.observations.slot(index)
+            return
+        
+        if context is None:
+            context = multiprocessing.get_context()
+        start = 0
+        for worker in range(processes):
+            count = num_envs // processes + (1 if worker < num_envs % processes else 0)
+            parent, child = context.Pipe()
+            shared = None
+            if self.observations is not None:
+                shared = (self.observations.name, num_envs, start)
+            process = context.Process(target=_worker,
+                                      args=(child, count, env_kwargs, shared),
+                                      name=f"roguelike-env-{worker}", daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+            self._groups.append((start, start + count))
+            start += count
+    
+    def __enter__(self) -> 'VectorEnv':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def reset(self, seed: Optional[int] = None) -> Union[List[Observation], SharedObservations]:
+        """Start a new episode in every game.
+        
+        Args:
+            seed: Base seed, game i is seeded with seed + i. Random if None.
+        
+        Returns:
+            First observation of each game, or the shared planes
+        """
+        if seed is None:
+            seeds = [None] * self.num_envs
+        else:
+            seeds = [seed + i for i in range(self.num_envs)]
+        observations = self._dispatch('reset', seeds)
+        return self.observations if self.observations is not None else observations
+    
+    def step(self, actions: Sequence[int]) -> Tuple[Union[List[Observation], SharedObservations],
+                                                     List[float], List[bool],
+                                                     List[Dict[str, Any]]]:
+        """Perform one action in every game.
+        
+        Args:
+            actions: One action index per game
+        
+        Returns:
+            Tuple of (observations, rewards, dones, infos), where
+            observations is the shared planes in shared memory mode
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"expected {self.num_envs} actions, got {len(actions)}")
+        
+        results = self._dispatch('step', list(actions))
+        observations, rewards, dones, infos = map(list, zip(*results))
+        if self.observations is not None:
+            observations = self.observations
+        return observations, rewards, dones, infos
+    
+    def close(self):
+        """Stop the worker processes."""
+        self.closed = True
+        if self._local is not None:
+            for env in self._local:
+                env.close()
+            self._local = None
+        
+        for connection in self._connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._connections = []
+        self._processes = []
+        
+        if self.observations is not None:
+            self.observations.close()
+            self.observations = None
+    
+    def _dispatch(self, command: str, payload: List) -> List:
+        """Send a command to every worker and gather the replies in order.
+        
+        Args:
+            command: 'reset' or 'step'
+            payload: One entry per game
+        
+        Returns:
+            One result per game
+        
+        Raises:
+            RuntimeError: If the batch is closed or a worker failed to run
+                the command
+        """
+        if self.closed:
+            raise RuntimeError("VectorEnv is closed")
+        if self._local is not None:
+            return _run_envs(self._local, command, payload)
+        
+        # Send everything first so the workers run concurrently
+        for connection, (start, end) in zip(self._connections, self._groups):
+            connection.send((command, payload[start:end]))
+        
+        results = []
+        errors = []
+        for connection in self._connections:
+            status, value = connection.recv()
+            if status == 'ok':
+                results.extend(value)
+            else:
+                errors.append(value)
+        if errors:
+            raise RuntimeError("environment worker failed:\n" + errors[0])
+        return results
@@ -1,54 +1,174 @@
 """Main game file for the roguelike using Textualize."""
 
+import os
+from typing import Dict, Optional
+
+from rich.segment import Segment
+from rich.style import Style
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical
+from textual.geometry import Region
+from textual.strip import Strip
+from textual.widget import Widget
 from textual.widgets import Static, Header, Footer
 from textual.binding import Binding
 
 from game.player import Player
-from game.game_map import GameMap
-from game.monster import MonsterManager
 from game.combat import CombatSystem, GameState
-from game.items import ItemManager, ItemType
-from game.fov import FOVCalculator, VisibilityTracker
+from game.ascii_art import ColorScheme, coalesce_glyphs
+from game.map_renderer import Camera, MapRenderer
+from game.session import Action, GameSession
+from game.snapshot import default_save_path, load_snapshot, save_snapshot
+from game.replay import ActionLog, default_log_path, prune_logs, start_recording
+from game.profiling import PhaseTimer
+
+
+GAME_OVER_LINES = [
+    "",
+    "╔══════════════════════════════════════╗",
+    "║                                      ║",
+    "║              GAME OVER               ║",
+    "║                                      ║",
+    "║         Press 'r' to restart         ║",
+    "║         Press 'q' to quit            ║",
+    "║                                      ║",
+    "╚══════════════════════════════════════╝",
+]
+
+
+def build_style_atlas(base: Style) -> Dict[str, Style]:
+    """Parse every ColorScheme color into a Rich style once.
+    
+    Args:
+        base: Style the map is drawn on, combined into every entry
+    
+    Returns:
+        Dictionary mapping ColorScheme markup to styles, with the empty
+        color mapping to the base style
+    """
+    atlas = {'': base}
+    for name, color in vars(ColorScheme).items():
+        if name.isupper() and color != ColorScheme.RESET:
+            atlas[color] = base + Style.parse(color[1:-1])
+    return atlas
 
 
-class GameDisplay(Static):
-    """Widget to display the game map and player."""
+class GameDisplay(Widget):
+    """Widget to display the game map and player.
+    
+    The map is drawn through the line API: each row of the renderer's
+    glyphs becomes a Strip with one pre-styled segment per color run,
+    cached until the renderer reports the row dirty, so no markup is
+    built or parsed.
+    """
     
-    def __init__(self, game_map: GameMap, player: Player, monster_manager: MonsterManager, 
-                 item_manager: ItemManager, game_state: GameState):
+    def __init__(self, session: GameSession):
         super().__init__()
-        self.game_map = game_map
-        self.player = player
-        self.monster_manager = monster_manager
-        self.item_manager = item_manager
-        self.game_state = game_state
+        self.session = session
+        self.camera = Camera()
+        self.renderer = MapRenderer(self.camera)
+        self._strips: Dict[int, Strip] = {}
+        self._view: Optional[tuple] = None
+        self._game_over = False
+        self._set_base_style(Style.parse("white on black"))
+    
+    def on_mount(self) -> None:
+        """Combine the widget's CSS text style into the style atlas."""
+        self._set_base_style(self.rich_style + Style.parse("white on black"))
+        self.update_display()
+    
+    def _set_base_style(self, base: Style):
+        """Rebuild the style atlas on top of a new base style.
+        
+        Args:
+            base: Style the map is drawn on
+        """
+        self.base_style = base
+        self._style_atlas = build_style_atlas(base)
+        self.game_over_style = base + Style.parse("bold red")
+        self._strips.clear()
+    
+    def on_resize(self, event) -> None:
+        """Fit the camera to the widget's new size."""
+        self.camera.resize(self.size.width, self.size.height)
+        self._strips.clear()
         self.update_display()
+        self.refresh()
     
     def update_display(self):
         """Update the display with current game state."""
-        # Check if game is over and show game over message
-        if self.game_state and self.game_state.game_over:
-            # Create a centered game over message
-            game_over_text = """
-[bold red on black]
-╔══════════════════════════════════════╗
-║                                      ║
-║              GAME OVER               ║
-║                                      ║
-║         Press 'r' to restart         ║
-║         Press 'q' to quit            ║
-║                                      ║
-╚══════════════════════════════════════╝
-[/]
-"""
-            self.update(game_over_text)
+        session = self.session
+        game_over = session.game_state.game_over
+        
+        if game_over != self._game_over:
+            self._game_over = game_over
+            self.renderer.invalidate()
+            self._strips.clear()
+            self.refresh()
+        
+        if game_over:
+            return
+        
+        game_map = session.game_map
+        dirty_rows = self.renderer.update_rows(
+            game_map, session.player.x, session.player.y,
+            session.monster_manager, session.item_manager
+        )
+        width = self.size.width
+        
+        # Strips of rows the new view no longer covers, or covers with
+        # other cells, must not be served if those lines come back
+        view = (self.camera.rect(game_map.width, game_map.height), width)
+        if view != self._view:
+            self._view = view
+            self._strips.clear()
+            self.refresh()
+        
+        for row in dirty_rows:
+            self._strips.pop(row, None)
+            self.refresh(Region(0, row, width, 1))
+    
+    def render_line(self, y: int) -> Strip:
+        """Render one line of the widget.
+        
+        Args:
+            y: Line of the widget to render
+        
+        Returns:
+            Strip for the line, reused until the row changes
+        """
+        strip = self._strips.get(y)
+        if strip is None:
+            strip = self._render_strip(y)
+            self._strips[y] = strip
+        return strip
+    
+    def _render_strip(self, y: int) -> Strip:
+        """Build the strip for one line of the widget.
+        
+        Args:
+            y: Line of the widget to render
+        
+        Returns:
+            Strip padded to the widget's width
+        """
+        width = self.size.width
+        
+        if self._game_over:
+            if y >= len(GAME_OVER_LINES):
+                return Strip.blank(width, self.base_style)
+            segments = [Segment(GAME_OVER_LINES[y], self.game_over_style)]
         else:
-            map_str = self.game_map.render_with_entities(
-                self.player.x, self.player.y, self.monster_manager, self.item_manager
-            )
-            self.update(f"[white on black]{map_str}[/]")
+            glyph_rows = self.renderer.glyph_rows
+            if y >= len(glyph_rows):
+                return Strip.blank(width, self.base_style)
+            styles = self._style_atlas
+            segments = [
+                Segment(text, styles[color])
+                for text, color in coalesce_glyphs(glyph_rows[y])
+            ]
+        
+        return Strip(segments).extend_cell_length(width, self.base_style).crop(0, width)
 
 
 class StatusDisplay(Static):
@@ -96,6 +216,32 @@ class MessageDisplay(Static):
         self.update(f"[bold]Messages[/bold]\n{message_text}")
 
 
+class PerformanceDisplay(Static):
+    """Widget showing how long each phase of recent turns took."""
+    
+    # Phases in the order they run, ending with the whole frame
+    PHASES = ('process_turn', 'update_fov', 'step', 'render', 'widgets', 'refresh', 'frame')
+    
+    def __init__(self, timer: PhaseTimer):
+        super().__init__()
+        self.timer = timer
+        self.update_stats()
+    
+    def update_stats(self):
+        """Update the display from the timer's histograms."""
+        lines = ["[bold]Performance[/bold]", f"{'phase':<13}{'p50 ms':>8}{'p99 ms':>8}"]
+        histograms = self.timer.histograms
+        for phase in self.PHASES:
+            histogram = histograms.get(phase)
+            if histogram is None:
+                continue
+            lines.append(f"{phase:<13}{histogram.percentile(0.5) / 1e6:>8.2f}"
+                         f"{histogram.percentile(0.99) / 1e6:>8.2f}")
+        if len(lines) == 2:
+            lines.append("Take a turn to start timing")
+        self.update("\n".join(lines))
+
+
 class RoguelikeApp(App):
     """Main application class for the roguelike game."""
     
@@ -108,7 +254,7 @@ class RoguelikeApp(App):
         width: 4fr;
         border: solid white;
         padding: 1;
-        overflow: auto;
+        overflow: hidden;
     }
     
     #info_area {
@@ -131,9 +277,18 @@ class RoguelikeApp(App):
         padding: 1;
     }
     
+    #performance_area {
+        height: auto;
+        border: solid white;
+        padding: 1;
+        margin-bottom: 1;
+        display: none;
+    }
+    
     GameDisplay {
         text-style: bold;
-        overflow: auto;
+        width: 100%;
+        height: 100%;
     }
     """
     
@@ -147,263 +302,156 @@ class RoguelikeApp(App):
         Binding("i", "use_item", "Use Item"),
         Binding("1", "use_potion", "Use Potion"),
         Binding("2", "use_scroll", "Use Scroll"),
+        Binding("p", "toggle_performance", "Performance"),
     ]
     
-    def __init__(self):
-        super().__init__()
-        self._initialize_game()
-    
-    def _initialize_game(self):
-        """Initialize or restart the game."""
-        self.game_map = GameMap()
-        # Use the generated start position
-        start_x, start_y = self.game_map.player_start
-        self.player = Player(start_x, start_y)
-        
-        # Initialize game systems
-        self.monster_manager = MonsterManager()
-        self.combat_system = CombatSystem()
-        self.game_state = GameState()
-        self.item_manager = ItemManager()
-        
-        # Place the exit on the map
-        self.game_map.place_exit()
-        
-        # Spawn monsters and items based on level
-        monster_count = self.game_state.get_monster_count_for_level()
-        item_count = self.game_state.get_item_count_for_level()
-        
-        self.monster_manager.spawn_monsters(self.game_map.tiles, monster_count, 
-                                          self.game_state.current_level)
-        self.item_manager.spawn_items(self.game_map.tiles, item_count)
-        
-        # Ensure FOV is completely reset and follows player
-        self.game_map.fov_calculator = FOVCalculator(self.game_map.tiles)
-        self.game_map.visibility_tracker = VisibilityTracker()
-        self.game_map.update_fov(self.player.x, self.player.y)
-    
-    def _advance_to_next_level(self):
-        """Advance to the next dungeon level."""
-        # Advance game state
-        self.game_state.advance_level()
-        
-        # Generate completely new map
-        self.game_map = GameMap()
-        
-        # Move player to new start position
-        start_x, start_y = self.game_map.player_start
-        self.player.x = start_x
-        self.player.y = start_y
-        
-        # Clear old entities completely
-        self.monster_manager = MonsterManager()
-        self.item_manager = ItemManager()
-        
-        # Place new exit
-        self.game_map.place_exit()
-        
-        # Spawn new monsters and items with increased difficulty
-        monster_count = self.game_state.get_monster_count_for_level()
-        item_count = self.game_state.get_item_count_for_level()
-        
-        self.monster_manager.spawn_monsters(self.game_map.tiles, monster_count, 
-                                          self.game_state.current_level)
-        self.item_manager.spawn_items(self.game_map.tiles, item_count)
-        
-        # Completely reset FOV for new map
-        self.game_map.fov_calculator = FOVCalculator(self.game_map.tiles)
-        self.game_map.visibility_tracker = VisibilityTracker()
-        self.game_map.update_fov(self.player.x, self.player.y)
-        
-        # Update GameDisplay references to new objects
-        game_display = self.query_one(GameDisplay)
-        game_display.game_map = self.game_map
-        game_display.player = self.player
-        game_display.monster_manager = self.monster_manager
-        game_display.item_manager = self.item_manager
-        game_display.game_state = self.game_state
-        
-        # Add level advancement message
-        self.combat_system.combat_log.append(f"Welcome to level {self.game_state.current_level}!")
-        self.combat_system.combat_log.append("The dungeon grows more dangerous...")
+    def __init__(self, save_path: Optional[str] = None):
+        """Resume the saved game if there is one, otherwise start a new game.
         
+        Args:
+            save_path: File the game is saved to on quit, defaults to
+                default_save_path()
+        """
+        super().__init__()
+        self.save_path = save_path or default_save_path()
+        # Levels are not cached, as every run's levels come from a fresh
+        # random seed and would never be built again
+        try:
+            self.session = load_snapshot(self.save_path, prefetch=True)
+            resumed = True
+        except (OSError, ValueError):
+            self.session = GameSession(prefetch=True)
+            resumed = False
+        
+        # A resumed game continues the log its run started from the step
+        # it was saved at, and goes unrecorded when that log is gone
+        self.action_log: Optional[ActionLog] = None
+        try:
+            self.action_log = start_recording(self.session,
+                                              default_log_path(self.session.seed),
+                                              checksums=True, resume=resumed)
+        except (OSError, ValueError):
+            pass
+    
     def compose(self) -> ComposeResult:
         """Create the UI layout."""
         yield Header()
         with Horizontal():
             with Container(id="game_area"):
-                yield GameDisplay(self.game_map, self.player, self.monster_manager, 
-                                self.item_manager, self.game_state)
+                yield GameDisplay(self.session)
             with Container(id="info_area"):
                 with Container(id="status_area"):
-                    yield StatusDisplay(self.player, self.game_state)
+                    yield StatusDisplay(self.session.player, self.session.game_state)
+                with Container(id="performance_area"):
+                    yield PerformanceDisplay(self.session.timer)
                 with Container(id="message_area"):
-                    yield MessageDisplay(self.combat_system)
+                    yield MessageDisplay(self.session.combat_system)
         yield Footer()
     
+    def on_unmount(self) -> None:
+        """Save the run and stop background level generation when the app closes."""
+        self.session.shutdown()
+        if self.action_log is not None:
+            self.action_log.close()
+            # This run's log was just written to, so only older runs' logs go
+            prune_logs(os.path.dirname(self.action_log.path))
+        try:
+            if self.session.game_state.game_over:
+                # A dead character is not resumed
+                if os.path.exists(self.save_path):
+                    os.remove(self.save_path)
+            else:
+                save_snapshot(self.session, self.save_path)
+        except OSError:
+            pass
+    
     def action_move_up(self) -> None:
         """Move player up."""
-        self._try_move(0, -1)
+        self._perform(Action.MOVE_UP)
     
     def action_move_down(self) -> None:
         """Move player down."""
-        self._try_move(0, 1)
+        self._perform(Action.MOVE_DOWN)
     
     def action_move_left(self) -> None:
         """Move player left."""
-        self._try_move(-1, 0)
+        self._perform(Action.MOVE_LEFT)
     
     def action_move_right(self) -> None:
         """Move player right."""
-        self._try_move(1, 0)
+        self._perform(Action.MOVE_RIGHT)
     
     def action_restart(self) -> None:
         """Restart the current level."""
-        # Store current level before restart
-        current_level = self.game_state.current_level
-        
-        # Generate new map for current level
-        self.game_map = GameMap()
-        
-        # Reset player to start position with current HP
-        start_x, start_y = self.game_map.player_start
-        self.player.x = start_x
-        self.player.y = start_y
-        self.player.hp = self.player.max_hp  # Restore full health
-        
-        # Clear old entities
-        self.monster_manager = MonsterManager()
-        self.item_manager = ItemManager()
-        
-        # Reset game state but keep current level
-        self.game_state.game_over = False
-        self.game_state.victory = False
-        self.game_state.current_level = current_level
-        
-        # Place new exit
-        self.game_map.place_exit()
-        
-        # Spawn monsters and items for current level
-        monster_count = self.game_state.get_monster_count_for_level()
-        item_count = self.game_state.get_item_count_for_level()
-        
-        self.monster_manager.spawn_monsters(self.game_map.tiles, monster_count, 
-                                          self.game_state.current_level)
-        self.item_manager.spawn_items(self.game_map.tiles, item_count)
-        
-        # Reset FOV for new map
-        self.game_map.fov_calculator = FOVCalculator(self.game_map.tiles)
-        self.game_map.visibility_tracker = VisibilityTracker()
-        self.game_map.update_fov(self.player.x, self.player.y)
-        
-        # Update GameDisplay references to new objects
-        game_display = self.query_one(GameDisplay)
-        game_display.game_map = self.game_map
-        game_display.player = self.player
-        game_display.monster_manager = self.monster_manager
-        game_display.item_manager = self.item_manager
-        game_display.game_state = self.game_state
-        
-        # Clear combat log and add restart message
-        self.combat_system.clear_log()
-        self.combat_system.combat_log.append(f"Level {current_level} restarted!")
+        self._perform(Action.RESTART)
         
         # Force complete UI refresh
         self.refresh()
-        self._update_displays()
     
     def action_use_item(self) -> None:
         """Open item usage menu."""
         # For now, just use the first available potion
-        self.action_use_potion()
+        self._perform(Action.USE_ITEM)
     
     def action_use_potion(self) -> None:
         """Use a health potion."""
-        result = self.player.inventory.use_item(ItemType.HEALTH_POTION, self.player)
-        if result:
-            self.combat_system.combat_log.append(result)
-        else:
-            self.combat_system.combat_log.append("No health potions available!")
-        self._update_displays()
+        self._perform(Action.USE_POTION)
     
     def action_use_scroll(self) -> None:
         """Use a magic scroll."""
-        result = self.player.inventory.use_item(ItemType.MAGIC_SCROLL, self.player)
-        if result:
-            self.combat_system.combat_log.append(result)
-        else:
-            self.combat_system.combat_log.append("No magic scrolls available!")
-        self._update_displays()
+        self._perform(Action.USE_SCROLL)
     
-    def _try_move(self, dx: int, dy: int):
-        """Try to move the player or attack if there's a monster.
+    def _perform(self, action: Action):
+        """Advance the game session by one action and redraw.
         
         Args:
-            dx: Change in X coordinate
-            dy: Change in Y coordinate
+            action: Action to perform
         """
-        if self.game_state.game_over:
-            return
-        
-        new_x = self.player.x + dx
-        new_y = self.player.y + dy
-        
-        # Check for monster at target position
-        target_monster = self.monster_manager.get_monster_at(new_x, new_y)
-        
-        if target_monster and target_monster.is_alive:
-            # Attack the monster
-            combat_messages = self.combat_system.player_attack_monster(
-                self.player, target_monster
-            )
-            
-            # Process monster turn
-            turn_messages = self.combat_system.process_turn(
-                self.player, self.monster_manager, self.game_map.tiles, 
-                self.game_map.visibility_tracker
-            )
-            
-        elif self.player.move(dx, dy, self.game_map.tiles):
-            # Player moved successfully
-            
-            # Check for items at new position
-            item = self.item_manager.collect_item(self.player.x, self.player.y)
-            if item:
-                pickup_message = self.player.inventory.add_item(item)
-                self.combat_system.combat_log.append(pickup_message)
-            
-            # Check for victory condition
-            if self.game_state.check_victory_condition(
-                self.player.x, self.player.y, self.game_map.tiles
-            ):
-                # Player reached the exit - advance to next level
-                self._advance_to_next_level()
-                self._update_displays()
-                return
-            
-            # Process monster turn
-            turn_messages = self.combat_system.process_turn(
-                self.player, self.monster_manager, self.game_map.tiles, 
-                self.game_map.visibility_tracker
-            )
+        timer = self.session.timer
+        frame_start = timer.start()
+        self.session.step(action)
+        self._update_displays()
         
-        # Check defeat condition
-        self.game_state.check_defeat_condition(self.player)
+        if frame_start:
+            # Textual repaints after this handler returns, so the frame
+            # ends once the refresh it queued has run
+            self.call_after_refresh(self._end_frame, frame_start, timer.start())
+    
+    def _end_frame(self, frame_start: int, refresh_start: int) -> None:
+        """Record the refresh and whole frame times of the last action.
         
-        self._update_displays()
+        Args:
+            frame_start: Time the action started at
+            refresh_start: Time the widgets were updated at
+        """
+        timer = self.session.timer
+        frame_end = timer.stop('refresh', refresh_start)
+        timer.record('frame', frame_end - frame_start)
+        self.query_one(PerformanceDisplay).update_stats()
+    
+    def action_toggle_performance(self) -> None:
+        """Show or hide the performance overlay, timing turns while it is shown."""
+        area = self.query_one("#performance_area")
+        area.display = not area.display
+        timer = self.session.timer
+        timer.enabled = area.display
+        if timer.enabled:
+            timer.clear()
+        self.query_one(PerformanceDisplay).update_stats()
     
     def _update_displays(self) -> None:
         """Update all display widgets."""
-        # Update FOV
-        self.game_map.update_fov(self.player.x, self.player.y)
-        
         game_display = self.query_one(GameDisplay)
         status_display = self.query_one(StatusDisplay)
         message_display = self.query_one(MessageDisplay)
+        timer = self.session.timer
         
+        start = timer.start()
         game_display.update_display()
+        start = timer.stop('render', start)
         status_display.update_status()
         message_display.update_messages()
+        timer.stop('widgets', start)
 
 
 def main():
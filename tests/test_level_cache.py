@@ -0,0 +1,91 @@
+"""Tests for the on-disk level cache."""
+
+import os
+import random
+import tempfile
+import unittest
+
+from game.level import Level, build_level
+from game.level_cache import LevelCache
+
+
+KEY = (7, 60, 30, 2, 6, 5, False)
+
+
+def level_state(level: Level) -> tuple:
+    """Collect what a cached level has to reproduce.
+    
+    Args:
+        level: Level to inspect
+    
+    Returns:
+        Tuple of the tiles, wall atlas, regions, special positions and spawns
+    """
+    game_map = level.game_map
+    regions = game_map.regions
+    monsters = [(m.x, m.y, m.monster_type, m.hp, m.attack_power)
+                for m in level.monster_manager.monsters]
+    items = [(item.x, item.y, item.item_type, item.value)
+             for item in level.item_manager.items]
+    return (bytes(game_map.tiles.cells), game_map.wall_renderer.glyphs,
+            list(regions.starts), list(regions.ends), regions.region_runs,
+            game_map.player_start, game_map.exit_pos, monsters, items,
+            len(game_map.floor_index))
+
+
+class LevelCacheTest(unittest.TestCase):
+    """Cached levels match fresh builds, and bad files are cache misses."""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = LevelCache(self.directory.name)
+        self.path = self.cache.path_for(KEY)
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def build(self, cache=None) -> Level:
+        seed, width, height, number, monster_count, item_count, horde = KEY
+        return build_level(number, monster_count, item_count, width, height,
+                           horde, seed, cache)
+    
+    def test_round_trip(self):
+        fresh = self.build(self.cache)
+        self.assertTrue(os.path.exists(self.path))
+        self.assertIsNotNone(self.cache.load(KEY))
+        self.assertEqual(level_state(self.build(self.cache)), level_state(fresh))
+    
+    def test_foreign_file_is_discarded(self):
+        with open(self.path, "wb") as handle:
+            handle.write(b"\x80\x04not a level")
+        self.assertIsNone(self.cache.load(KEY))
+        self.assertFalse(os.path.exists(self.path))
+    
+    def test_damaged_files_are_misses(self):
+        self.build(self.cache)
+        with open(self.path, "rb") as handle:
+            data = handle.read()
+        expected = level_state(self.build())
+        
+        rng = random.Random(0)
+        damaged = [data[:size] for size in (0, 5, len(data) // 2, len(data) - 1)]
+        for _ in range(200):
+            corrupt = bytearray(data)
+            for _ in range(rng.randint(1, 4)):
+                corrupt[rng.randrange(len(corrupt))] = rng.randrange(256)
+            damaged.append(bytes(corrupt))
+        
+        for corrupt in damaged:
+            with open(self.path, "wb") as handle:
+                handle.write(corrupt)
+            if self.cache.load(KEY) is None:
+                self.assertFalse(os.path.exists(self.path))
+            # A miss rebuilds the level and stores it again
+            with open(self.path, "wb") as handle:
+                handle.write(corrupt)
+            self.build(self.cache)
+            self.assertEqual(level_state(self.build(self.cache)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for resuming the action log of a saved game."""
+
+import os
+import random
+import tempfile
+import unittest
+
+from game.replay import prune_logs, read_action_log, replay, start_recording, state_checksum
+from game.session import Action, GameSession
+from game.snapshot import load_snapshot, save_snapshot
+
+
+MOVES = [Action.MOVE_UP, Action.MOVE_DOWN, Action.MOVE_LEFT, Action.MOVE_RIGHT]
+
+
+def play(session: GameSession, turns: int, seed: int):
+    """Step a session through random moves.
+    
+    Args:
+        session: Session to step
+        turns: Number of moves
+        seed: Seed of the moves
+    """
+    rng = random.Random(seed)
+    for _ in range(turns):
+        session.step(rng.choice(MOVES))
+
+
+class ResumeActionLogTest(unittest.TestCase):
+    """A resumed game's log replays the run it was resumed into."""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.directory.name, "run.tvl")
+        self.save_path = os.path.join(self.directory.name, "save.tvs")
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_steps_logged_after_the_save_are_dropped_on_resume(self):
+        session = GameSession(seed=1234)
+        log = start_recording(session, self.log_path, checksums=True)
+        play(session, 100, seed=1)
+        save_snapshot(session, self.save_path)
+        
+        # These steps reach the log but the game crashes before saving them
+        play(session, 40, seed=2)
+        log.close()
+        
+        resumed = load_snapshot(self.save_path)
+        self.assertEqual(resumed.step_count, 100)
+        with start_recording(resumed, self.log_path, checksums=True, resume=True):
+            play(resumed, 40, seed=3)
+        
+        game = read_action_log(self.log_path)
+        self.assertEqual(len(game), 140)
+        result = replay(game)
+        self.assertIsNone(result.divergence)
+        self.assertEqual(state_checksum(result.session), state_checksum(resumed))
+    
+    def test_resuming_a_log_shorter_than_the_save_fails(self):
+        session = GameSession(seed=1234)
+        with start_recording(session, self.log_path, checksums=True):
+            play(session, 10, seed=1)
+        session.action_log = None
+        play(session, 10, seed=2)
+        save_snapshot(session, self.save_path)
+        
+        resumed = load_snapshot(self.save_path)
+        with self.assertRaises(ValueError):
+            start_recording(resumed, self.log_path, checksums=True, resume=True)
+
+
+
+class PruneLogsTest(unittest.TestCase):
+    """Only the most recently written logs are kept."""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_oldest_logs_are_deleted(self):
+        for seed in range(5):
+            path = os.path.join(self.directory.name, f"{seed}.tvl")
+            with open(path, "wb"):
+                pass
+            os.utime(path, (seed, seed))
+        other = os.path.join(self.directory.name, "save.tvs")
+        with open(other, "wb"):
+            pass
+        os.utime(other, (0, 0))
+        
+        self.assertEqual(prune_logs(self.directory.name, keep=2), 3)
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ["3.tvl", "4.tvl", "save.tvs"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Tests for saving and resuming games."""
+
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from game.session import Action, GameSession
+from game.snapshot import _HEADER, load_snapshot, save_snapshot
+
+
+MOVES = [Action.MOVE_UP, Action.MOVE_DOWN, Action.MOVE_LEFT, Action.MOVE_RIGHT]
+
+
+def play(session: GameSession, turns: int, seed: int):
+    """Step a session through random moves.
+    
+    Args:
+        session: Session to step
+        turns: Number of moves
+        seed: Seed of the moves
+    """
+    rng = random.Random(seed)
+    for _ in range(turns):
+        session.step(rng.choice(MOVES))
+
+
+def game_state(session: GameSession) -> tuple:
+    """Collect the state a resumed game has to match.
+    
+    Args:
+        session: Session to inspect
+    
+    Returns:
+        Tuple of the player, progress, clocks and living monsters
+    """
+    player = session.player
+    monster_manager = session.monster_manager
+    monsters = [(monster.x, monster.y, monster.hp, monster.monster_type)
+                for monster in monster_manager.monsters if monster.is_alive]
+    return (player.x, player.y, player.hp, player.inventory.gold,
+            session.game_state.current_level, session.game_state.score,
+            session.combat_system.turn_count, session.step_count,
+            monster_manager.scheduler.now, monsters)
+
+
+class SnapshotRoundTripTest(unittest.TestCase):
+    """A loaded snapshot continues the game exactly where it was saved."""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "save.tvs")
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def check_round_trip(self, compress: bool, horde: bool):
+        session = GameSession(60, 30, horde=horde, seed=99)
+        play(session, 150, seed=1)
+        save_snapshot(session, self.path, compress=compress)
+        
+        resumed = load_snapshot(self.path)
+        self.assertEqual(game_state(resumed), game_state(session))
+        
+        # The saved random streams and turn order carry on identically
+        play(session, 100, seed=2)
+        play(resumed, 100, seed=2)
+        self.assertEqual(game_state(resumed), game_state(session))
+    
+    def test_round_trip(self):
+        self.check_round_trip(compress=True, horde=False)
+    
+    def test_round_trip_uncompressed(self):
+        self.check_round_trip(compress=False, horde=False)
+    
+    def test_round_trip_horde(self):
+        self.check_round_trip(compress=True, horde=True)
+
+
+class CorruptSnapshotTest(unittest.TestCase):
+    """Damaged save files are rejected with ValueError."""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "save.tvs")
+        session = GameSession(40, 20, seed=5)
+        play(session, 50, seed=1)
+        save_snapshot(session, self.path, compress=False)
+        with open(self.path, "rb") as handle:
+            self.data = handle.read()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def load(self, data: bytes):
+        with open(self.path, "wb") as handle:
+            handle.write(data)
+        return load_snapshot(self.path)
+    
+    def test_huge_map_size(self):
+        data = bytearray(self.data)
+        struct.pack_into('<II', data, _HEADER.size, 1 << 30, 1 << 30)
+        with self.assertRaises(ValueError):
+            self.load(bytes(data))
+    
+    def test_flipped_bytes(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            data = bytearray(self.data)
+            for _ in range(rng.randint(1, 4)):
+                data[rng.randrange(_HEADER.size, len(data))] = rng.randrange(256)
+            try:
+                self.load(bytes(data))
+            except ValueError:
+                pass
+    
+    def test_truncated(self):
+        for size in (0, _HEADER.size, len(self.data) // 2, len(self.data) - 1):
+            with self.assertRaises(ValueError):
+                self.load(self.data[:size])
+
+
+if __name__ == "__main__":
+    unittest.main()
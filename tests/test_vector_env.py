@@ -0,0 +1,35 @@
+"""Tests for running games in worker processes."""
+
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from game.level_cache import LevelCache
+from game.vector_env import VectorEnv
+
+
+class SpawnedWorkersTest(unittest.TestCase):
+    """Workers started without fork receive everything they need."""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_level_cache_reaches_spawned_workers(self):
+        cache = LevelCache(self.directory.name)
+        context = multiprocessing.get_context('spawn')
+        with VectorEnv(2, processes=2, context=context, width=40, height=20,
+                       level_cache=cache) as env:
+            observations = env.reset(seed=3)
+            env.step([0, 1])
+        
+        self.assertEqual(len(observations), 2)
+        # Each worker built and cached its game's first level
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()